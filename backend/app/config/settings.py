@@ -1,10 +1,84 @@
 from pydantic import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     SECRET_KEY:str
     DB_PATH:str
     QDRANT_KEY:str
     QDRANT_URL:str
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_PRECISION: str = "fp32"     # fp32 | fp16 | bf16 | int8 (CPU inference path)
+    EMBEDDING_BACKEND: str = "torch"      # torch (sentence-transformers) | onnx (ONNX Runtime, no torch import)
+    EMBEDDING_ONNX_PATH: str = "backend/app/database/onnx"  # Exported model dir (*.onnx + tokenizer.json)
+    EMBEDDING_ONNX_FILE: str = "model.onnx"  # model.onnx | model_int8.onnx (int8-quantized export)
+    EMBEDDING_MAX_SEQ_LENGTH: int = 256   # Tokens per text for the ONNX backend (MiniLM's limit)
+    EMBEDDING_THREADS: int = 0            # ONNX Runtime intra-op threads (0 = all cores)
+    EMBEDDING_WARMUP_BATCH: int = 8       # Dummy texts encoded before startup finishes (0 = no warm-up)
+    EMBEDDING_CACHE_SIZE: int = 2048      # Max cached query embeddings
+    EMBEDDING_CACHE_TTL: float = 3600     # Seconds a cached query embedding stays valid
+    EMBED_BATCH_MAX: int = 32             # Max queries encoded in one micro-batch
+    EMBED_BATCH_WINDOW_MS: float = 5.0    # How long a micro-batch waits for more queries
+    COLLECTION_CACHE_TTL: float = 300     # Seconds the Qdrant collection list is cached
+    DB_POOL_SIZE: int = 16                # Max pooled SQLite connections
+    DB_POOL_TIMEOUT: float = 30           # Seconds to wait for a free connection
+    DB_BUSY_TIMEOUT_MS: int = 5000        # SQLite busy_timeout for lock contention
+    DB_CACHE_SIZE_KIB: int = 16384        # Page cache per connection
+    DB_MMAP_SIZE: int = 268435456         # Memory-mapped I/O size in bytes
+    DB_WORKERS: int = 8                   # Threads serving blocking SQLite calls from async routes
+    CPU_WORKERS: int = 2                  # Threads for CPU-heavy work
+    PROCESS_WORKERS: int = 2              # Worker processes for PDF rendering
+    INGEST_WORKERS: int = 2               # Worker processes reading and chunking documents
+    INGEST_QUEUE_SIZE: int = 32           # Chunked documents buffered ahead of the embedder
+    INGEST_EMBED_BATCH: int = 64          # Max chunks encoded per embedding batch
+    INGEST_EMBED_TOKEN_BUDGET: int = 2048 # Max padded tokens (chunks x longest chunk) per batch
+    INGEST_SORT_WINDOW: int = 1024        # Chunks collected across documents before length-sorting
+    INGEST_UPSERT_BATCH: int = 256        # Points per Qdrant upsert request
+    INGEST_MAX_INFLIGHT: int = 4          # Concurrent Qdrant upsert requests
+    INDEX_JOB_RESUME: bool = True         # Re-queue index jobs left unfinished by a restart
+    INDEX_JOB_SHUTDOWN_TIMEOUT: float = 30  # Seconds shutdown waits for the running job to checkpoint
+    INDEX_WATCH: bool = False             # Re-index changed files of backend/resources/data live (watchfiles)
+    INDEX_WATCH_DEBOUNCE_MS: int = 1600   # Changes within this window are re-indexed as one batch
+    INDEX_WATCH_POLLING: bool = False     # Poll instead of OS events (e.g. bind mounts without inotify)
+    CSV_ROWS_PER_CHUNK: int = 20          # CSV rows per chunk (each chunk repeats the header)
+    CSV_PART_CHUNKS: int = 256            # Max CSV chunks per worker result (large files are read in parts)
+    CSV_KEY_COLUMNS: str = "employee_id,full_name,role,department,location,manager_id,performance_rating"  # Typed, indexed payload fields
+    PDF_CACHE_SIZE: int = 128             # Max cached rendered PDFs
+    PDF_CACHE_BYTES: int = 64 * 1024 * 1024  # Max total bytes of cached PDFs
+    OPENAI_BASE_URL: Optional[str] = None # Point at an OpenAI-compatible server (e.g. a local stub)
+    OPENAI_TIMEOUT: float = 60            # Seconds per OpenAI request
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_POOL_SIZE: int = 64            # Max pooled OpenAI clients (one per API key)
+    OPENAI_MAX_CONNECTIONS: int = 100     # Per-client HTTP connection limit
+    OPENAI_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30   # Seconds an idle keep-alive connection is kept
+    BCRYPT_ROUNDS: int = 12               # bcrypt cost factor for new password hashes
+    PASSWORD_WORKERS: int = 2             # Threads dedicated to bcrypt hashing/verification
+    PASSWORD_QUEUE_LIMIT: int = 16        # Pending bcrypt jobs before returning 503
+    USER_CACHE_SIZE: int = 10000          # Max users cached for authentication
+    USER_CACHE_TTL: float = 300           # Seconds a cached user stays valid
+    HISTORY_WINDOW: int = 3               # Past exchanges loaded into the LLM prompt
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.92  # Min prompt similarity to reuse an answer
+    ANSWER_CACHE_TTL: float = 3600        # Seconds a cached answer stays valid
+    ANSWER_CACHE_SIZE: int = 256          # Cached answers per role
+    CONTEXT_TOKEN_BUDGET: int = 2000      # Max RAG context tokens sent to the LLM
+    CONTEXT_MIN_SCORE: float = 0.2        # Drop search hits below this similarity
+    CONTEXT_DEDUP_THRESHOLD: float = 0.85 # Word-shingle Jaccard above which passages are duplicates
+    CONTEXT_TOKENIZER_MODEL: str = "gpt-4o"
+    VECTOR_STORE: str = "qdrant"          # qdrant (server at QDRANT_URL) | qdrant_local (embedded) | numpy (in-process, no server)
+    QDRANT_LOCAL_PATH: str = ":memory:"   # Storage of the embedded Qdrant: ":memory:" or a directory
+    NUMPY_STORE_PATH: str = "backend/app/database/vectors"  # Where the NumPy store persists collections
+    NUMPY_STORE_DTYPE: str = "float32"    # float32 | float16 (half the memory, upcast per search)
+    VECTOR_QUANTIZATION: str = "none"     # none | scalar (int8) | binary; applies to newly created collections
+    SEARCH_OVERSAMPLING: float = 2.0      # Quantized search: candidates = limit x oversampling
+    SEARCH_RESCORE: bool = True           # Re-rank quantized candidates with full-precision vectors
+    VECTOR_VERSIONING: bool = True        # Index jobs build a new collection version and swap its alias when verified
+    VECTOR_KEEP_VERSIONS: int = 2         # Previous versions kept per collection for rollback
+    VECTOR_ROLLBACK_WAIT: float = 5       # Seconds a rollback waits for a running build before answering 409
+    VECTOR_LAYOUT: str = "per_role"       # per_role (one collection per role) | shared (one collection, role payload filter)
+    SHARED_COLLECTION: str = "documents"  # Collection used by the shared layout
+    INDEX_MANIFEST_PATH: str = "backend/app/database/index_manifest.json"
+    ADMIN_USERS: str = ""                 # Comma-separated usernames allowed to read /metrics and run index admin endpoints (none by default)
     env: str = "development"
 
     class Config:
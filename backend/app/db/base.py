@@ -1,14 +1,27 @@
-import sqlite3
+from contextlib import contextmanager
+from .pool import ConnectionPool
 from ..config.settings import Settings
 
 settings = Settings() # type: ignore
 
+# Process-wide pool of pre-configured (WAL, tuned pragmas) SQLite connections
+db_pool = ConnectionPool(
+    settings.DB_PATH,
+    size=settings.DB_POOL_SIZE,
+    timeout=settings.DB_POOL_TIMEOUT,
+    busy_timeout_ms=settings.DB_BUSY_TIMEOUT_MS,
+    cache_size_kib=settings.DB_CACHE_SIZE_KIB,
+    mmap_size=settings.DB_MMAP_SIZE
+)
+
+@contextmanager
+def db_session():
+    # Borrow a connection from the pool
+    with db_pool.connection() as conn:
+        # Yield the connection object for use
+        yield conn
+
 def get_db():
-    # Connect to SQLite database (thread-safe disabled for FastAPI compatibility)
-    conn = sqlite3.connect(settings.DB_PATH, check_same_thread=False)
-    try:
-        # Yield the connection object for use (e.g., in dependency injection)
+    # Dependency-injection wrapper around db_session
+    with db_session() as conn:
         yield conn
-    finally:
-        # Ensure the connection is closed after use
-        conn.close()
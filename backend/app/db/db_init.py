@@ -12,10 +12,19 @@ def create_tables():
     with sqlite3.connect(settings.DB_PATH) as conn:
         cursor = conn.cursor()
 
+        # WAL mode is persistent: concurrent readers no longer block the writer
+        cursor.execute("PRAGMA journal_mode=WAL;")
+
         # Create users table
         cursor.execute(Queries.create_user_table)
 
         # Create conversations table
         cursor.execute(Queries.create_conversation_table)
 
+        # Apply pending migrations
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(Queries.migrations[version:], start=version + 1):
+            cursor.execute(migration)
+            cursor.execute(f"PRAGMA user_version = {number}")
+
         conn.commit()
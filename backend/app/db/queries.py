@@ -20,6 +20,59 @@ class Queries:
         );
     """
 
+    create_conversation_user_index = """
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_id
+        ON conversations (userId, id);
+    """
+
+    create_index_jobs_table = """
+        CREATE TABLE IF NOT EXISTS index_jobs (
+            id TEXT PRIMARY KEY,
+            scope TEXT NOT NULL,
+            collections TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            progress TEXT,
+            error TEXT
+        );
+    """
+
+    create_index_jobs_status_index = """
+        CREATE INDEX IF NOT EXISTS idx_index_jobs_status
+        ON index_jobs (status);
+    """
+
+    # Chunks upserted by a job, so an interrupted job resumes after its last completed batch
+    create_index_job_chunks_table = """
+        CREATE TABLE IF NOT EXISTS index_job_chunks (
+            jobId TEXT NOT NULL,
+            collection TEXT NOT NULL,
+            source TEXT NOT NULL,
+            chunkHash TEXT NOT NULL,
+            PRIMARY KEY (jobId, collection, source, chunkHash)
+        ) WITHOUT ROWID;
+    """
+
+    # Collection versions that went live, so gc and rollback never pick a half-built one
+    create_collection_versions_table = """
+        CREATE TABLE IF NOT EXISTS collection_versions (
+            name TEXT PRIMARY KEY,
+            collection TEXT NOT NULL,
+            published_at TEXT NOT NULL
+        );
+    """
+
+    # Schema migrations, applied in order and tracked with PRAGMA user_version
+    migrations = [
+        create_conversation_user_index,
+        create_index_jobs_table,
+        create_index_jobs_status_index,
+        create_index_job_chunks_table,
+        create_collection_versions_table,
+    ]
+
     insert_user = """
         INSERT INTO users 
         (username, role, password) 
@@ -50,8 +103,125 @@ class Queries:
         WHERE userId = ?;
     """
 
+    fetch_recent_chats = """
+        SELECT * FROM (
+            SELECT *
+            FROM conversations
+            WHERE userId = ?
+            ORDER BY id DESC
+            LIMIT ?
+        )
+        ORDER BY id ASC;
+    """
+
+    fetch_chats_before = """
+        SELECT *
+        FROM conversations
+        WHERE userId = ? AND id < ?
+        ORDER BY id DESC
+        LIMIT ?;
+    """
+
     get_chat_by_id = """
         SELECT * 
         FROM conversations
         WHERE id =?;
     """
+
+    insert_index_job = """
+        INSERT INTO index_jobs
+        (id, scope, collections, status, created_at)
+        VALUES (?, ?, ?, ?, ?);
+    """
+
+    get_index_job = """
+        SELECT *
+        FROM index_jobs
+        WHERE id = ?;
+    """
+
+    fetch_recent_index_jobs = """
+        SELECT *
+        FROM index_jobs
+        ORDER BY created_at DESC
+        LIMIT ?;
+    """
+
+    fetch_active_index_jobs = """
+        SELECT *
+        FROM index_jobs
+        WHERE status IN ('queued', 'running')
+        ORDER BY created_at ASC;
+    """
+
+    fetch_unfinished_index_jobs = """
+        SELECT *
+        FROM index_jobs
+        WHERE status IN ('queued', 'running', 'interrupted')
+        ORDER BY created_at ASC;
+    """
+
+    set_index_job_status = """
+        UPDATE index_jobs
+        SET status = ?
+        WHERE id = ?;
+    """
+
+    start_index_job = """
+        UPDATE index_jobs
+        SET status = 'running', started_at = ?, finished_at = NULL, error = NULL
+        WHERE id = ?;
+    """
+
+    update_index_job_progress = """
+        UPDATE index_jobs
+        SET progress = ?
+        WHERE id = ?;
+    """
+
+    finish_index_job = """
+        UPDATE index_jobs
+        SET status = ?, finished_at = ?, progress = ?, error = ?
+        WHERE id = ?;
+    """
+
+    insert_index_job_chunk = """
+        INSERT OR IGNORE INTO index_job_chunks
+        (jobId, collection, source, chunkHash)
+        VALUES (?, ?, ?, ?);
+    """
+
+    fetch_index_job_chunks = """
+        SELECT collection, source, chunkHash
+        FROM index_job_chunks
+        WHERE jobId = ?;
+    """
+
+    delete_index_job_chunks = """
+        DELETE FROM index_job_chunks
+        WHERE jobId = ?;
+    """
+
+    fetch_checkpointed_collections = """
+        SELECT DISTINCT c.collection
+        FROM index_job_chunks c
+        JOIN index_jobs j ON j.id = c.jobId
+        WHERE j.status IN ('queued', 'running', 'interrupted');
+    """
+
+    insert_collection_version = """
+        INSERT OR IGNORE INTO collection_versions
+        (name, collection, published_at)
+        VALUES (?, ?, ?);
+    """
+
+    fetch_collection_versions = """
+        SELECT name
+        FROM collection_versions
+        WHERE collection = ?;
+    """
+
+    delete_collection_version = """
+        DELETE FROM collection_versions
+        WHERE name = ?;
+    """
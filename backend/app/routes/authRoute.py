@@ -2,20 +2,31 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from ..utils.jwtAuth import AccessTokenBearer
 from ..schemas.schemes import User, LoginModel, RegisterModel, AuthResponseModel
 from ..services.usersServices import UsersServices
-from ..db.base import get_db
-from ..utils.accessUtils import hash_password, check_password, generate_token
+from ..db.base import db_session
+from ..utils.accessUtils import hash_password_async, check_password_async, generate_token
+from ..utils.executors import db_executor, run_in_executor
 
 auth_router = APIRouter()
 
+
+def find_user_by_username(username: str):
+    # Short-lived pooled connection: never hold a connection while bcrypt runs
+    with db_session() as conn:
+        return UsersServices(conn).get_user_by_username(username)
+
+
+def create_user(user: RegisterModel):
+    with db_session() as conn:
+        return UsersServices(conn).insert_user(user)
+
+
 @auth_router.post('/login')
-def handle_login(request: LoginModel, db=Depends(get_db)):
+async def handle_login(request: LoginModel):
     """
     Authenticate user and return JWT token if successful.
     """
-    user_service = UsersServices(db)
-
     # Find user by username
-    user = user_service.get_user_by_username(request.username)
+    user = await run_in_executor(db_executor, find_user_by_username, request.username)
 
     # If no user found, raise Unauthorized error
     if not user:
@@ -24,8 +35,8 @@ def handle_login(request: LoginModel, db=Depends(get_db)):
             status_code=status.HTTP_401_UNAUTHORIZED
         )
     
-    # Check if password matches stored hash
-    check_pwd = check_password(request.password, user['password'])
+    # Check if password matches stored hash (dedicated bcrypt pool)
+    check_pwd = await check_password_async(request.password, user['password'])
 
     if not check_pwd:
         raise HTTPException(
@@ -44,15 +55,13 @@ def handle_login(request: LoginModel, db=Depends(get_db)):
 
 
 @auth_router.post('/register', response_model=AuthResponseModel)
-async def handle_register(request: RegisterModel, db=Depends(get_db)):
+async def handle_register(request: RegisterModel):
     """
     Register a new user after hashing the password.
     Prevent duplicate usernames.
     """
-    user_service = UsersServices(db)
-    
     # Check if username already exists
-    existing_user = user_service.get_user_by_username(request.username)
+    existing_user = await run_in_executor(db_executor, find_user_by_username, request.username)
 
     if existing_user:
         raise HTTPException(
@@ -60,11 +69,11 @@ async def handle_register(request: RegisterModel, db=Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    # Hash password before saving
-    request.password = hash_password(request.password)
+    # Hash password before saving (dedicated bcrypt pool)
+    request.password = await hash_password_async(request.password)
 
     # Insert user into DB and get inserted user data
-    result = user_service.insert_user(request)
+    result = await run_in_executor(db_executor, create_user, request)
 
     # Create User schema instance for response
     user = User(id=result['id'], role=result['role'], username=result['username'])
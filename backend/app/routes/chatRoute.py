@@ -1,18 +1,91 @@
-from fastapi import APIRouter, status, Request, HTTPException, Depends
-from ..schemas.schemes import ChatModel, User
+from fastapi import APIRouter, status, Request, Response, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from ..schemas.schemes import ChatModel, LookupModel, User
 from ..utils.markdownPDF import download_pdf
-from ..db.base import get_db
+from ..db.base import get_db, db_session
 from ..services.llmServices import LLMServices
 from ..services.ragServices import RAGService
+from ..services.chatServices import ChatServices
+from ..services.answerCacheServices import answer_cache
+from ..services.contextServices import context_builder
+from ..config.settings import Settings
 from ..utils.jwtAuth import AccessTokenBearer
+from ..utils.executors import db_executor, run_in_executor
+from ..utils.serverTiming import StageTimer
+from typing import Any, Dict, Optional
+import json
 import re
 
 
+settings = Settings() # type: ignore
+
 chat_router = APIRouter()
 
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """
+    Format a Server-Sent Event; data is JSON encoded so tokens may contain newlines.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def load_llm(prompt: str, user: User, api_key: Optional[str]) -> LLMServices:
+    # Short-lived pooled connection: only held while the history loads, never across the LLM call
+    with db_session() as conn:
+        return LLMServices(prompt=prompt, user=user, db=conn, api_key=api_key)
+
+
+def persist_conversation(llm: LLMServices, response_text: str) -> None:
+    # A fresh connection for the insert; the one that loaded the history is back in the pool
+    with db_session() as conn:
+        llm.save_conversation(response=response_text, db=conn)
+
+
+async def stream_cached(llm: LLMServices, response_text: str):
+    """
+    Send a cached answer as a single SSE `token` event, persist it, then send `done`.
+    """
+    yield sse_event({"token": response_text})
+    await run_in_executor(db_executor, persist_conversation, llm, response_text)
+    yield sse_event({"response": response_text, "cached": True}, event="done")
+
+
+async def stream_chat(llm: LLMServices, rag_context: str, source_url: str, usage: Dict, on_complete=None):
+    """
+    Yield the LLM answer as SSE `token` events, append the source link,
+    persist the full response, then send a final `done` event with token usage.
+    `on_complete` is called with the final response (e.g. to cache it).
+    """
+    try:
+        parts = []
+        async for token in llm.stream_conversation_prompt(rag_context=rag_context):
+            parts.append(token)
+            yield sse_event({"token": token})
+
+        response_text = "".join(parts)
+
+        # Append source URL if response has valid info and a passage was sent to the model
+        if source_url and "That information is not available" not in response_text:
+            source_token = f"\n\n{source_url}"
+            response_text += source_token
+            yield sse_event({"token": source_token})
+
+        # Save chat conversation to history once the stream is complete
+        await run_in_executor(db_executor, persist_conversation, llm, response_text)
+        if on_complete:
+            on_complete(response_text)
+
+        yield sse_event({"response": response_text, "usage": usage}, event="done")
+
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield sse_event({"msg": detail}, event="error")
+
 @chat_router.post('/start')
-async def handle_chat(request: ChatModel, req: Request, auth=Depends(AccessTokenBearer()), db=Depends(get_db)):
+async def handle_chat(request: ChatModel, req: Request, response: Response, auth=Depends(AccessTokenBearer())):
     try:
+        timer = StageTimer()  # Per-stage durations, sent back as a Server-Timing header
         prompt = request.prompt
         user = User(**auth["user"])    # Convert dict to User model
 
@@ -22,7 +95,9 @@ async def handle_chat(request: ChatModel, req: Request, auth=Depends(AccessToken
             re.IGNORECASE
         )
 
-        llm = LLMServices(prompt=prompt, user=user, db=db, api_key=auth['api_key'])
+        # Loading history hits SQLite, keep it off the event loop
+        llm = await run_in_executor(db_executor, load_llm, prompt, user, auth['api_key'])
+        timer.mark("history")
 
         # If prompt requests a download action and chat history exists, generate PDF
         if re.search(pattern, prompt):
@@ -34,29 +109,72 @@ async def handle_chat(request: ChatModel, req: Request, auth=Depends(AccessToken
         
         # Otherwise, perform Retrieval-Augmented Generation (RAG) workflow
         model = req.app.state.chunk_model
-        client = req.app.state.qdrant_client
-
-        rag = RAGService(model, client)   # Initialize the RAG service
-        vectors = rag.retrive_vectors(prompt, user.role)
-
-        # Combine retrieved text as context
-        rag_context = "\n\n".join([v['text'] for v in vectors]) if vectors else ""
-        source_path = vectors[0]['source'] if vectors else "no_source_found"
-
-        # Link to source repo or docs
-        source_url = f"[🔗 View source](https://raw.githubusercontent.com/guavacoderepo/Role-based-chatbot/refs/heads/main/backend/{source_path})"
+        store = req.app.state.vector_store
+        batcher = req.app.state.embedding_batcher
+
+        rag = RAGService(model, store, batcher=batcher, timer=timer)   # Initialize the RAG service
+        vectors = await rag.retrive_vectors(prompt, user.role)
+        timer.mark("search")
+
+        # Merge overlapping chunks, drop duplicates/weak hits and pack into the token budget
+        context = context_builder.build(vectors)
+        rag_context = context["text"]
+        passages = context["passages"]
+        usage = {"context_tokens": context["tokens"], "prompt_tokens": llm.prompt_tokens(rag_context)}
+
+        # Link to source repo or docs, only for a passage the model actually received
+        source_url = ""
+        if passages:
+            source_url = f"[🔗 View source](https://raw.githubusercontent.com/guavacoderepo/Role-based-chatbot/refs/heads/main/backend/{passages[0]['source']})"
+        timer.mark("context")
+
+        # Semantic answer cache: same role, similar prompt, same retrieved context and chat history
+        fingerprint = answer_cache.fingerprint(vectors, llm.history)
+        cached_text = None
+        if settings.ANSWER_CACHE_ENABLED and vectors and rag.prompt_embedding:
+            cached_text = answer_cache.lookup(user.role, rag.prompt_embedding, fingerprint)
+        timer.mark("cache")
+
+        def remember(response_text: str) -> None:
+            # Only cache grounded answers
+            if settings.ANSWER_CACHE_ENABLED and vectors and rag.prompt_embedding \
+                    and "That information is not available" not in response_text:
+                answer_cache.store(user.role, rag.prompt_embedding, fingerprint, response_text)
+
+        # Streams only report the stages before the first token
+        sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Server-Timing": timer.header()}
+
+        if cached_text is not None:
+            if request.stream:
+                return StreamingResponse(stream_cached(llm, cached_text), media_type="text/event-stream", headers=sse_headers)
+            await run_in_executor(db_executor, persist_conversation, llm, cached_text)
+            timer.mark("save")
+            response.headers["Server-Timing"] = timer.header()
+            return {"response": cached_text, "cached": True}
+
+        # Streaming mode: send tokens as Server-Sent Events
+        if request.stream:
+            return StreamingResponse(
+                stream_chat(llm, rag_context, source_url, usage, on_complete=remember),
+                media_type="text/event-stream",
+                headers=sse_headers
+            )
 
         # Generate answer from LLM using context and source URL
-        response_text = llm.gpt_conversation_prompt(rag_context=rag_context)
+        response_text = await llm.gpt_conversation_prompt(rag_context=rag_context)
+        timer.mark("llm")
 
-        # Append source URL if response has valid info
-        if "That information is not available" not in response_text:
+        # Append source URL if response has valid info and a passage was sent to the model
+        if source_url and "That information is not available" not in response_text:
             response_text = f"{response_text}\n\n{source_url}"
 
         # Save chat conversation to history
-        llm.save_conversation(response=response_text)
+        await run_in_executor(db_executor, persist_conversation, llm, response_text)
+        remember(response_text)
+        timer.mark("save")
 
-        return {"response": response_text}
+        response.headers["Server-Timing"] = timer.header()
+        return {"response": response_text, "usage": usage}
 
     except Exception as e:
         # Return error as HTTP 400 with error message
@@ -64,8 +182,28 @@ async def handle_chat(request: ChatModel, req: Request, auth=Depends(AccessToken
 
 
 @chat_router.get('/history')
-def handle_retrieve_history(auth=Depends(AccessTokenBearer()), db=Depends(get_db)):
-    # Initialize LLM service with authenticated user and db
-    llm = LLMServices(user=User(**auth['user']), db=db)
-    # Return stored conversation history for user
-    return llm.history
+def handle_retrieve_history(
+    auth=Depends(AccessTokenBearer()),
+    db=Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[int] = Query(None, description="Cursor: return chats older than this id")
+):
+    user = User(**auth['user'])
+    # Return one page of stored conversation history, plus the cursor for the next (older) page
+    return ChatServices(db).fetch_chats_page(user.id, limit=limit, before=before)
+
+
+@chat_router.post('/lookup')
+async def handle_lookup(request: LookupModel, req: Request, auth=Depends(AccessTokenBearer())):
+    user = User(**auth['user'])
+
+    # Same access rule as chat: own collection only, executives see everything
+    if user.role.value not in ("executives", request.collection.value):
+        raise HTTPException(detail="Not allowed to query this collection", status_code=status.HTTP_403_FORBIDDEN)
+    if not request.filters:
+        raise HTTPException(detail="At least one filter is required", status_code=status.HTTP_400_BAD_REQUEST)
+
+    rag = RAGService(req.app.state.chunk_model, req.app.state.vector_store, batcher=req.app.state.embedding_batcher)
+    limit = max(1, min(request.limit, 1000))
+    rows = await rag.lookup_rows(request.collection.value, request.filters, prompt=request.prompt, limit=limit)
+    return {"rows": rows, "count": len(rows)}
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+# Create a new API router for liveness / readiness probes
+health_router = APIRouter()
+
+# Liveness: the process is up and serving requests
+@health_router.get("/live")
+def handle_live():
+    return {"status": "ok"}
+
+# Readiness: the embedding model is loaded and warmed up (503 until then, and while shutting down)
+@health_router.get("/ready")
+def handle_ready(req: Request):
+    status = getattr(req.app.state, "embedding_status", None) or {"ready": False}
+    return JSONResponse(status_code=200 if status.get("ready") else 503, content=status)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Request
+from ..services.usersServices import user_cache
+from ..services.vectorServices import embedding_cache
+from ..services.answerCacheServices import answer_cache
+from ..db.base import db_pool
+from ..utils.openaiClients import openai_clients
+from ..utils.executors import password_executor
+from ..utils.markdownPDF import pdf_cache
+from ..utils.jwtAuth import AdminBearer
+
+# Create a new API router for runtime metrics
+metrics_router = APIRouter()
+
+# Endpoint exposing cache hit rates and pool counters (ADMIN_USERS only)
+@metrics_router.get("/")
+def handle_metrics(req: Request, auth=Depends(AdminBearer())):
+    batcher = getattr(req.app.state, "embedding_batcher", None)
+    store = getattr(req.app.state, "vector_store", None)
+    watcher = getattr(req.app.state, "index_watcher", None)
+    return {
+        "user_cache": user_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "embedding_batcher": batcher.stats() if batcher else None,
+        "db_pool": db_pool.stats(),
+        "openai_clients": openai_clients.stats(),
+        "password_pool": password_executor.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "vector_store": store.stats() if store else None,
+        "embedding_model": getattr(req.app.state, "embedding_status", None),
+        "index_watcher": watcher.stats() if watcher else None
+    }
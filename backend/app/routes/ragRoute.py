@@ -1,24 +1,59 @@
-from fastapi import APIRouter, Request
-from ..services.ragServices import RAGService
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, status
+from ..services.jobServices import index_jobs
+from ..services.vectorServices import VectorService
+from ..services.versionServices import CollectionVersions
+from ..services.layoutServices import migrate_to_shared_layout
+from ..utils.jwtAuth import AdminBearer
 
 # Create a new API router for RAG-related endpoints
 rag_router = APIRouter()
 
-# Endpoint to trigger RAG vector indexing process
-@rag_router.get("/")
-def rag_contents(req: Request):
-    try:
-        model = req.app.state.chunk_model
-        client = req.app.state.qdrant_client
+# Endpoint to start RAG vector indexing as a background job (all folders, or one collection; ADMIN_USERS only)
+@rag_router.post("/", status_code=status.HTTP_202_ACCEPTED)
+def rag_contents(req: Request, collection: Optional[str] = None, auth=Depends(AdminBearer())):
+    model = req.app.state.chunk_model
+    store = req.app.state.vector_store
 
-        rag = RAGService(model, client)   # Initialize the RAG service
-        rag.retrie_text()    # Retrieve text to be indexed
-        rag.save_document()  # Save the processed document/vector
+    # Returns the already queued/running job for these collections instead of starting a duplicate
+    job, created = index_jobs.submit(model, store, collection)
 
+    message = "RAGging started ✅ --- poll the job for progress" if created else "RAGging already in progress"
+    return {"message": message, "job": job}
 
-        
-        print("RAGing done ✅") 
 
-        return "RAGging done ✅ --- proceed" # Return a simple confirmation message
-    except Exception as e:
-        print(f"Rag error -> {e}")
+# Endpoint listing recent index jobs (ADMIN_USERS only)
+@rag_router.get("/jobs")
+def list_jobs(limit: int = 20, auth=Depends(AdminBearer())):
+    return {"items": index_jobs.recent(limit)}
+
+
+# Endpoint with the status and progress of one index job (ADMIN_USERS only)
+@rag_router.get("/jobs/{job_id}")
+def job_status(job_id: str, auth=Depends(AdminBearer())):
+    return index_jobs.status(job_id)
+
+
+# Endpoint listing the versions of every collection and the live one behind each alias (ADMIN_USERS only)
+@rag_router.get("/versions")
+def list_versions(req: Request, auth=Depends(AdminBearer())):
+    vector = VectorService(req.app.state.chunk_model, req.app.state.vector_store)
+    return CollectionVersions(vector).status()
+
+
+# Endpoint switching a collection back to an earlier published version (default: the previous one; ADMIN_USERS only)
+@rag_router.post("/rollback")
+def rollback(req: Request, collection: str, version: Optional[int] = None, auth=Depends(AdminBearer())):
+    return index_jobs.rollback(req.app.state.chunk_model, req.app.state.vector_store, collection, version)
+
+
+# Endpoint to copy the per-role collections into the shared collection (ADMIN_USERS only)
+@rag_router.post("/migrate-layout")
+def migrate_layout(req: Request, drop_old: bool = False, auth=Depends(AdminBearer())):
+    # Errors propagate to the global handlers, so a failed migration is never reported as done
+    vector = VectorService(req.app.state.chunk_model, req.app.state.vector_store)
+    stats = migrate_to_shared_layout(vector, drop_old=drop_old)
+
+    print(f"Layout migration done ✅ -> {stats}")
+
+    return {"message": "Layout migration done ✅", "stats": stats}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional, Union
 from enum import Enum
 
 class Roles(Enum):
@@ -23,6 +23,13 @@ class ConversationModel(BaseModel):
 
 class ChatModel(BaseModel):
     prompt:str
+    stream: bool = False    # Stream the answer as Server-Sent Events
+
+class LookupModel(BaseModel):
+    collection: Roles
+    filters: Dict[str, Union[int, float, str]]  # Exact column matches, e.g. {"department": "Sales"}
+    prompt: Optional[str] = None                # Rank the matching rows semantically
+    limit: int = 100
 
 class RegisterModel(BaseModel):
     username:str
@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from ..schemas.schemes import Roles
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = 0.92, ttl: float = 3600, max_entries: int = 256):
+        """
+        Per-role cache of LLM answers looked up by prompt-embedding similarity.
+        - threshold: minimum cosine similarity for a paraphrase to count as a hit
+        - ttl: seconds an answer stays valid
+        - max_entries: answers kept per role (oldest evicted first)
+        Entries are partitioned by role, so one role's answer is never served to another.
+        The key also covers the chat history window the answer was generated with, so a
+        history-dependent answer (e.g. to "explain more") only matches the same history.
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(vectors: List[Dict], history: Sequence[Dict] = ()) -> str:
+        """
+        Fingerprint of the LLM input besides the prompt:
+        - the retrieved context: the (content-derived) point IDs, order-independent
+        - the chat history window sent with the prompt, in order
+        """
+        digest = hashlib.sha256("|".join(sorted(str(v['id']) for v in vectors)).encode('utf-8'))
+        for exchange in history:
+            digest.update(b"\x1e" + exchange['prompt'].encode('utf-8') + b"\x1f" + exchange['response'].encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, role: Roles, embedding: List[float], fingerprint: str) -> Optional[str]:
+        """
+        Return a cached answer for this role if a stored prompt is similar enough
+        and was answered from the same retrieved context; otherwise None.
+        """
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired answers for this role
+            entries = [e for e in self._entries.get(role.value, []) if e['expires'] > now]
+            self._entries[role.value] = entries
+
+            candidates = [e for e in entries if e['fingerprint'] == fingerprint]
+            if candidates:
+                scores = np.stack([e['embedding'] for e in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return candidates[best]['answer']
+
+            self.misses += 1
+            return None
+
+    def store(self, role: Roles, embedding: List[float], fingerprint: str, answer: str) -> None:
+        """
+        Remember an answer for this role, evicting the oldest when the role is full.
+        """
+        with self._lock:
+            entries = self._entries.setdefault(role.value, [])
+            entries.append({
+                "embedding": self._normalize(embedding),
+                "fingerprint": fingerprint,
+                "answer": answer,
+                "expires": time.monotonic() + self.ttl
+            })
+            if len(entries) > self.max_entries:
+                del entries[:len(entries) - self.max_entries]
+
+    def clear(self) -> None:
+        """
+        Forget every cached answer (called whenever the index is rebuilt).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        Return per-role sizes and hit/miss counters.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": {role: len(entries) for role, entries in self._entries.items()},
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# Shared answer cache used by the chat route
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    ttl=settings.ANSWER_CACHE_TTL,
+    max_entries=settings.ANSWER_CACHE_SIZE
+)
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import sqlite3
 from ..db.queries import Queries
 from ..schemas.schemes import ConversationModel
@@ -54,3 +54,33 @@ class ChatServices:
         return [
             dict(zip([column[0] for column in cursor.description], row)) for row in rows
         ] if rows else []
+
+    def fetch_recent_chats(self, user_id: int, limit: int) -> List[Dict]:
+        """
+        Retrieve only the last `limit` chats for a user, oldest first.
+        Uses the (userId, id) index, so cost doesn't grow with history size.
+        """
+        cursor = self.db.execute(Queries.fetch_recent_chats, (user_id, limit))
+        rows = cursor.fetchall()
+        return [
+            dict(zip([column[0] for column in cursor.description], row)) for row in rows
+        ] if rows else []
+
+    def fetch_chats_page(self, user_id: int, limit: int, before: Optional[int] = None) -> Dict:
+        """
+        Keyset-paginate a user's chats, newest page first.
+        - before: only return chats with an id lower than this cursor
+        Returns the page (oldest first) and the cursor for the next, older page.
+        """
+        # No cursor -> start from the newest chat (largest SQLite rowid)
+        before = before if before is not None else 2**63 - 1
+        cursor = self.db.execute(Queries.fetch_chats_before, (user_id, before, limit + 1))
+        rows = cursor.fetchall()
+        chats = [dict(zip([column[0] for column in cursor.description], row)) for row in rows]
+
+        # One extra row tells us whether an older page exists
+        has_more = len(chats) > limit
+        chats = chats[:limit]
+        next_cursor = chats[-1]["id"] if has_more else None
+
+        return {"items": list(reversed(chats)), "next_cursor": next_cursor}
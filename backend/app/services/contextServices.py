@@ -0,0 +1,160 @@
+import re
+from typing import Dict, List, Optional, Set
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+_encoder = None
+_encoder_loaded = False
+
+def get_encoder():
+    """
+    Load the tokenizer used by the chat model (tiktoken) once.
+    Returns None if tiktoken or its encoding files are unavailable.
+    """
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.encoding_for_model(settings.CONTEXT_TOKENIZER_MODEL)
+        except Exception as e:
+            print(f"[context] tiktoken unavailable, estimating tokens from length: {e}")
+    return _encoder
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with the chat model's tokenizer (about 4 characters per token as fallback).
+    """
+    encoder = get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """
+    Count the prompt tokens of a chat messages list
+    (content tokens + per-message and reply-priming overhead used by OpenAI chat models).
+    """
+    return sum(count_tokens(str(m.get("content") or "")) + 3 for m in messages) + 3
+
+
+class ContextBuilder:
+    def __init__(self, token_budget: int = 2000, min_score: float = 0.2,
+                 dedup_threshold: float = 0.85, min_overlap_words: int = 5):
+        """
+        Assemble the RAG context from search hits:
+        - drop hits scoring below `min_score`
+        - merge overlapping chunks from the same source into one passage
+        - drop near-duplicates (word-shingle Jaccard similarity >= `dedup_threshold`)
+        - pack the best passages into `token_budget` tokens
+        """
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.dedup_threshold = dedup_threshold
+        self.min_overlap_words = min_overlap_words
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return text.split()
+
+    @staticmethod
+    def _word_end(text: str, count: int) -> int:
+        """
+        Character offset right after the first `count` words of `text`.
+        """
+        ends = [m.end() for m in re.finditer(r"\S+", text)]
+        return ends[count - 1] if count else 0
+
+    def _overlap(self, first: List[str], second: List[str]) -> int:
+        """
+        Length of the longest suffix of `first` that is a prefix of `second` (in words).
+        """
+        for size in range(min(len(first), len(second)) - 1, self.min_overlap_words - 1, -1):
+            if first[-size:] == second[:size]:
+                return size
+        return 0
+
+    def _merge_overlapping(self, hits: List[Dict]) -> List[Dict]:
+        """
+        Join chunks of the same source whose text overlaps (adjacent chunks share
+        `VectorService.overlap` tokens) so the shared text is sent only once.
+        Passages keep their original text (newlines included); a merge appends
+        the rest of the second chunk after the shared words.
+        """
+        passages = [dict(h, words=self._words(h['text'])) for h in hits]
+        merged = True
+        while merged:
+            merged = False
+            for i, a in enumerate(passages):
+                for j, b in enumerate(passages):
+                    if i == j or a['source'] != b['source']:
+                        continue
+                    size = self._overlap(a['words'], b['words'])
+                    if size:
+                        a['text'] = a['text'] + b['text'][self._word_end(b['text'], size):]
+                        a['words'] = a['words'] + b['words'][size:]
+                        a['score'] = max(a['score'], b['score'])
+                        passages.pop(j)
+                        merged = True
+                        break
+                if merged:
+                    break
+        for p in passages:
+            p.pop('words')
+        return passages
+
+    @staticmethod
+    def _shingles(text: str, size: int = 3) -> Set[str]:
+        words = re.findall(r"\w+", text.lower())
+        return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+    def _drop_near_duplicates(self, passages: List[Dict]) -> List[Dict]:
+        """
+        Keep the higher-scoring passage of any near-duplicate pair.
+        """
+        kept: List[Dict] = []
+        kept_shingles: List[Set[str]] = []
+        for p in sorted(passages, key=lambda a: a['score'], reverse=True):
+            shingles = self._shingles(p['text'])
+            duplicate = any(
+                len(shingles & other) / (len(shingles | other) or 1) >= self.dedup_threshold
+                for other in kept_shingles
+            )
+            if not duplicate:
+                kept.append(p)
+                kept_shingles.append(shingles)
+        return kept
+
+    def build(self, hits: List[Dict], token_budget: Optional[int] = None) -> Dict:
+        """
+        Return the packed context text, the passages used and its token count.
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        relevant = [h for h in hits if h['score'] >= self.min_score]
+        passages = self._drop_near_duplicates(self._merge_overlapping(relevant))
+
+        packed: List[Dict] = []
+        used = 0
+        for p in passages:  # Best score first
+            tokens = count_tokens(p['text'])
+            if used + tokens > budget:
+                continue  # Try smaller passages that still fit
+            packed.append(p)
+            used += tokens
+
+        return {
+            "text": "\n\n".join(p['text'] for p in packed),
+            "passages": packed,
+            "tokens": used,
+            "hits": len(hits),
+            "below_min_score": len(hits) - len(relevant)
+        }
+
+
+# Shared context builder used by the chat route
+context_builder = ContextBuilder(
+    token_budget=settings.CONTEXT_TOKEN_BUDGET,
+    min_score=settings.CONTEXT_MIN_SCORE,
+    dedup_threshold=settings.CONTEXT_DEDUP_THRESHOLD
+)
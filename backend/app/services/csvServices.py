@@ -0,0 +1,106 @@
+import csv
+import hashlib
+import io
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+Value = Union[int, float, str]
+
+CSV_FORMAT_VERSION = "csv-rows:v1"  # Bump to force CSV sources to be re-chunked
+
+
+def coerce(value: str) -> Value:
+    """
+    Type a CSV cell: int, then float, otherwise the stripped string (dates stay ISO strings).
+    """
+    value = value.strip()
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def csv_file_hash(path: str, rows_per_chunk: int, key_columns: Sequence[str]) -> str:
+    """
+    Stream the file bytes into a SHA-256 digest, salted with the chunking config,
+    so changing rows-per-chunk or key columns re-indexes the file.
+    """
+    digest = hashlib.sha256(f"{CSV_FORMAT_VERSION}|{rows_per_chunk}|{','.join(key_columns)}|".encode('utf-8'))
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_csv_chunks(path: str, rows_per_chunk: int, key_columns: Sequence[str],
+                    offset: Optional[int] = None) -> Iterator[Tuple[str, Dict, int]]:
+    """
+    Stream a CSV file row by row and yield (text, payload, offset) chunks of `rows_per_chunk` rows:
+    - text: the header line followed by the rows, so every chunk is self-describing
+    - payload: the typed rows plus, per key column, the distinct values in the chunk
+      (Qdrant matches a filter against any element of an array field)
+    - offset: file position after the chunk; pass it back to continue from there
+    Only one chunk worth of rows is held in memory at a time.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        # readline (not file iteration) keeps f.tell() usable between rows
+        reader = csv.reader(iter(f.readline, ''))
+        header = next(reader, None)
+        if not header:
+            return
+        header = [h.strip() for h in header]
+        keys = [k for k in key_columns if k in header]
+        if offset is not None:
+            f.seek(offset)
+
+        rows: List[List[str]] = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue  # Skip blank lines
+            rows.append(row)
+            if len(rows) >= rows_per_chunk:
+                yield _build_chunk(header, rows, keys) + (f.tell(),)
+                rows = []
+        if rows:
+            yield _build_chunk(header, rows, keys) + (f.tell(),)
+
+
+def _build_chunk(header: List[str], rows: List[List[str]], keys: List[str]) -> Tuple[str, Dict]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+
+    typed = [{column: coerce(cell) for column, cell in zip(header, row)} for row in rows]
+    payload: Dict = {"kind": "csv_rows", "columns": header, "rows": typed}
+    for key in keys:
+        values = {row[key] for row in typed if key in row and row[key] != ""}
+        payload[key] = sorted(values, key=str)
+    return buffer.getvalue().strip(), payload
+
+
+def field_schemas(payload: Dict, key_columns: Sequence[str]) -> Dict[str, str]:
+    """
+    Infer a Qdrant payload index type for each key column present in a chunk payload:
+    "integer", "float" or "keyword".
+    """
+    schemas: Dict[str, str] = {}
+    for key in key_columns:
+        values = payload.get(key)
+        if not values:
+            continue
+        if all(isinstance(v, int) for v in values):
+            schemas[key] = "integer"
+        elif all(isinstance(v, (int, float)) for v in values):
+            schemas[key] = "float"
+        else:
+            schemas[key] = "keyword"
+    return schemas
+
+
+def match_rows(rows: List[Dict], filters: Dict[str, Value]) -> List[Dict]:
+    """
+    Keep the rows whose columns equal every filter value.
+    """
+    return [row for row in rows if all(row.get(k) == v for k, v in filters.items())]
@@ -0,0 +1,566 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from .vectorServices import EMBEDDING_FIELD, ROLE_FIELD, VectorService, split_text
+from .manifestServices import IndexManifest
+from .csvServices import csv_file_hash, field_schemas, iter_csv_chunks
+from ..utils.embeddingModel import embedding_fingerprint, plan_batches, token_lengths
+from ..utils.executors import ingest_executor
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+_DONE = None  # End-of-stream marker on the stage queue
+
+
+class IngestCancelled(RuntimeError):
+    """
+    Raised by IngestPipeline.run when cancel() stopped the run before it finished.
+    """
+
+
+def csv_key_columns() -> Tuple[str, ...]:
+    """
+    Key CSV columns stored as typed, indexed payload fields (from settings).
+    """
+    return tuple(c.strip() for c in settings.CSV_KEY_COLUMNS.split(",") if c.strip())
+
+
+def current_embedding() -> str:
+    """
+    Fingerprint of the configured embedding model (from settings).
+    """
+    return embedding_fingerprint(settings.EMBEDDING_BACKEND, settings.EMBEDDING_MODEL, settings.EMBEDDING_PRECISION,
+                                 settings.EMBEDDING_ONNX_PATH, settings.EMBEDDING_ONNX_FILE,
+                                 settings.EMBEDDING_MAX_SEQ_LENGTH)
+
+
+def prepare_document(document: Dict, known_hash: Optional[str], chunk_size: int, overlap: int) -> Dict:
+    """
+    Stage 1, runs in a worker process: read, hash and chunk one document.
+    - `chunks` is None for empty files and for files whose hash equals `known_hash`
+    - Otherwise `chunks` maps chunk hash -> chunk text (duplicate chunks dropped)
+    - CSV files are streamed row by row into header-prefixed row groups;
+      `payloads` maps their chunk hash -> typed payload fields. A result holds at
+      most CSV_PART_CHUNKS chunks: `next` is then the part to submit next
+      (the document with `csv_offset`/`csv_hash`), None once the file is done
+    """
+    started = time.perf_counter()
+    result = {"source": document['source'], "collection": document['collection'],
+              "role": document.get('role', document['collection']), "hash": None, "chunks": None, "payloads": {},
+              "next": None}
+
+    if document['source'].lower().endswith(".csv") and 'text' not in document:
+        prepare_csv(result, known_hash, document)
+    else:
+        text = document.get('text')
+        if text is None:
+            text = VectorService.load_text(document['source'])
+        if text:
+            result['hash'] = VectorService.hash_text(text)
+            if result['hash'] != known_hash:
+                chunks: Dict[str, str] = {}
+                for chunk in split_text(text, chunk_size, overlap):
+                    chunks.setdefault(VectorService.hash_text(chunk), chunk)
+                result['chunks'] = chunks
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def prepare_csv(result: Dict, known_hash: Optional[str], document: Dict) -> None:
+    """
+    Row-aware CSV chunking: the file is hashed and parsed as a stream,
+    never loaded as a whole string, and returned in parts of at most
+    CSV_PART_CHUNKS chunks so no process holds a whole large file.
+    """
+    rows_per_chunk, keys = settings.CSV_ROWS_PER_CHUNK, csv_key_columns()
+    offset = document.get('csv_offset')
+    try:
+        if offset is None:
+            file_hash = csv_file_hash(result['source'], rows_per_chunk, keys)
+            if file_hash == known_hash:
+                result['hash'] = file_hash
+                return
+        else:
+            file_hash = document['csv_hash']  # Continuation part
+        chunks: Dict[str, str] = {}
+        for text, payload, end in iter_csv_chunks(result['source'], rows_per_chunk, keys, offset):
+            chunk_hash = VectorService.hash_text(text)
+            if chunk_hash not in chunks:
+                chunks[chunk_hash] = text
+                result['payloads'][chunk_hash] = payload
+            if len(chunks) >= settings.CSV_PART_CHUNKS:
+                result['next'] = dict(document, csv_offset=end, csv_hash=file_hash)
+                break
+    except Exception as e:
+        print(f"Error reading {result['source']}: {e}")
+        return
+    if chunks or offset is not None:
+        result['hash'], result['chunks'] = file_hash, chunks
+
+
+class StageStats:
+    def __init__(self):
+        """
+        Counters for one pipeline stage: items processed, time spent working
+        and the window between the stage's first start and last finish.
+        """
+        self.items = 0
+        self.busy = 0.0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+            self.first = now - seconds if self.first is None else min(self.first, now - seconds)
+            self.last = now
+
+    def report(self, unit: str) -> Dict:
+        active = (self.last - self.first) if self.first is not None and self.last is not None else 0.0
+        return {
+            unit: self.items,
+            "busy_s": round(self.busy, 3),
+            "active_s": round(active, 3),
+            f"{unit}_per_s": round(self.items / active, 1) if active else 0.0
+        }
+
+
+class IngestPipeline:
+    def __init__(self, vector: VectorService, queue_size: int = 32, embed_batch: int = 64,
+                 upsert_batch: int = 256, max_inflight: int = 4, workers: int = 2,
+                 token_budget: int = 2048, sort_window: int = 1024,
+                 resume: Optional[Dict[Tuple[str, str], Set[str]]] = None,
+                 on_checkpoint: Optional[Callable[[List[Tuple[str, str, str]]], None]] = None,
+                 targets: Optional[Dict[str, str]] = None,
+                 on_commit: Optional[Callable[[IndexManifest, Dict], None]] = None):
+        """
+        Staged document ingestion, every stage running concurrently:
+        1. read + chunk in the ingest process pool (at most 2x `workers` files in flight)
+        2. one embedding consumer: chunks from all documents are sorted by token length
+           and encoded in batches of at most `embed_batch` chunks / `token_budget` padded tokens
+        3. Qdrant upserts of `upsert_batch` points with wait=False, at most `max_inflight` at once
+        Stages are joined by a bounded queue / semaphore, so a slow stage throttles the
+        ones before it. The manifest only records a file once all its points were accepted.
+        Checkpoints: after every embedding window the store is flushed and the
+        (collection, source, chunk hash) of the upserted points are passed to `on_checkpoint`;
+        `resume` maps (written collection, source) -> chunk hashes already stored by an interrupted
+        run, which are not embedded again.
+        Versioned builds: `targets` maps a collection to the physical collection its points
+        are written to (and deleted from) instead, while the manifest keeps the collection
+        name; `on_commit(manifest, stats)` runs right before the manifest is saved and
+        aborts the run (manifest unsaved) by raising.
+        """
+        self.vector = vector
+        self.queue_size = queue_size
+        self.embed_batch = embed_batch
+        self.upsert_batch = upsert_batch
+        self.max_inflight = max_inflight
+        self.workers = workers
+        self.token_budget = token_budget
+        self.sort_window = sort_window
+        self.tokens = 0          # Real tokens embedded
+        self.padded_tokens = 0   # Tokens including batch padding
+        self.stages = {"chunk": StageStats(), "embed": StageStats(), "upsert": StageStats()}
+        self.failed: Set[str] = set()  # Sources with a failed embedding/upsert
+        self.errors: deque = deque(maxlen=20)  # Most recent error messages
+        self._failed_lock = threading.Lock()
+        self.resume = resume or {}
+        self.on_checkpoint = on_checkpoint
+        self.targets = targets or {}
+        self.on_commit = on_commit
+        self._completed: List[Tuple[str, str, str]] = []  # Upserted since the last checkpoint
+        self._cancel = threading.Event()
+        self._embed_error: Optional[BaseException] = None  # Why the embedder thread died, if it did
+        self.files_total = 0
+        self.chunks_resumed = 0
+        self.started: Optional[float] = None
+
+    def _prepare_all(self, documents: List[Dict], known: Dict[str, Optional[str]]) -> Iterator[Dict]:
+        """
+        Submit documents to the process pool with a bounded window and yield results as they finish.
+        Parts of a large CSV are yielded in file order; the next part is submitted
+        once the previous one is back.
+        """
+        pending: Set[Future] = set()
+        remaining = iter(documents)
+        while True:
+            while len(pending) < self.workers * 2:
+                document = next(remaining, None)
+                if document is None:
+                    break
+                pending.add(self._submit(document, known.get(document['source'])))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result['next'] is not None:
+                    pending.add(self._submit(result['next'], None))
+                self.stages["chunk"].record(0 if result['next'] else 1, result['seconds'])  # Files, counted once
+                yield result
+
+    def _submit(self, document: Dict, known_hash: Optional[str]) -> Future:
+        return ingest_executor.submit(prepare_document, document, known_hash,
+                                      self.vector.chunk_size, self.vector.overlap)
+
+    def _target(self, collection: str) -> str:
+        """
+        Physical collection the points of `collection` are written to.
+        """
+        return self.targets.get(collection, collection)
+
+    def _mark_failed(self, sources: Set[str], error: Exception) -> None:
+        print(f"[ingest] Error for {sorted(sources)}: {error}")
+        with self._failed_lock:
+            self.failed |= sources
+            self.errors.append(f"{', '.join(sorted(sources))}: {error}")
+
+    def cancel(self) -> None:
+        """
+        Stop after the documents already handed to the embedder; run() then raises IngestCancelled.
+        """
+        self._cancel.set()
+
+    def _checkpoint(self) -> None:
+        """
+        Make the upserted points durable, then report them as completed.
+        """
+        with self._failed_lock:
+            completed, self._completed = self._completed, []
+        self.vector.store.flush()  # Persist un-awaited (wait=False) writes
+        if completed and self.on_checkpoint:
+            try:
+                self.on_checkpoint(completed)
+            except Exception as e:
+                print(f"[ingest] Checkpoint error: {e}")
+
+    def progress(self) -> Dict:
+        """
+        Live counters, safe to read from another thread while run() is working.
+        """
+        return {
+            "files_total": self.files_total,
+            "files_processed": self.stages["chunk"].items,
+            "chunks_embedded": self.stages["embed"].items,
+            "points_upserted": self.stages["upsert"].items,
+            "chunks_resumed": self.chunks_resumed,
+            "files_failed": len(self.failed),
+            "errors": list(self.errors),
+            "stages": self.stage_report(),
+            "seconds": round(time.perf_counter() - self.started, 3) if self.started else 0.0
+        }
+
+    def stage_report(self) -> Dict:
+        return {
+            "chunk": self.stages["chunk"].report("files"),
+            "embed": dict(
+                self.stages["embed"].report("chunks"),
+                tokens=self.tokens,
+                padded_tokens=self.padded_tokens,
+                padding_waste=round(1 - self.tokens / self.padded_tokens, 4) if self.padded_tokens else 0.0
+            ),
+            "upsert": self.stages["upsert"].report("points")
+        }
+
+    def _index_fields(self, collection: str, payload: Dict, indexed: Set[Tuple[str, str]]) -> bool:
+        """
+        Create payload indexes for the typed key fields of a chunk (once per collection/field).
+        """
+        for field, schema in field_schemas(payload, csv_key_columns()).items():
+            if (collection, field) in indexed:
+                continue
+            try:
+                self.vector.ensure_payload_index(collection, field, schema)
+            except Exception as e:
+                print(f"[ingest] Payload index {collection}.{field}: {e}")
+                return False
+            indexed.add((collection, field))
+        return True
+
+    def _upsert(self, collection: str, points: List) -> None:
+        """
+        Stage 3: send one batch of points to Qdrant without waiting for indexing.
+        """
+        started = time.perf_counter()
+        try:
+            self.vector.upsert_points(collection, points, wait=False)
+            self.stages["upsert"].record(len(points), time.perf_counter() - started)
+            with self._failed_lock:
+                self._completed.extend((collection, p.payload['source'], p.payload['chunk_hash']) for p in points)
+        except Exception as e:
+            self._mark_failed({p.payload['source'] for p in points}, e)
+
+    def _embed_worker(self, work: "queue.Queue") -> None:
+        # Embedder thread body: keep the error for run() instead of dying silently
+        try:
+            self._embed_stage(work)
+        except BaseException as e:
+            self._embed_error = e
+            print(f"[ingest] Embedder stopped: {e!r}")
+
+    def _put(self, work: "queue.Queue", item, embedder: threading.Thread, poll: float = 0.5) -> bool:
+        """
+        Hand an item to the embedder, blocking while the queue is full but only as long as
+        the embedder is alive. Returns False (item dropped) once it has died.
+        """
+        while embedder.is_alive():
+            try:
+                work.put(item, timeout=poll)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _embed_stage(self, work: "queue.Queue") -> None:
+        """
+        Stage 2: collect chunks from all queued documents into a window of `sort_window`,
+        encode it in length-bucketed batches and hand full per-collection point batches
+        to the upsert pool (each vector goes back to its source via the point ID/payload).
+        """
+        semaphore = threading.BoundedSemaphore(self.max_inflight)
+        embedding = current_embedding()  # Stored on every point, so a rollback can restore the manifest
+        ensured: Set[str] = set()
+        indexed: Set[Tuple[str, str]] = set()  # (collection, field) with a payload index
+        pending: List[Tuple] = []  # (collection, source, chunk hash, text, extra payload)
+        points: Dict[str, List] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="upsert") as upserts:
+            def submit(collection: str, batch: List) -> None:
+                semaphore.acquire()  # Blocks the embedder while too many upserts are in flight
+                future = upserts.submit(self._upsert, collection, batch)
+                future.add_done_callback(lambda _: semaphore.release())
+
+            def encode(batch: List[Tuple], lengths: List[int]) -> None:
+                started = time.perf_counter()
+                try:
+                    vectors = self.vector.model.encode([b[3] for b in batch], batch_size=len(batch),
+                                                       show_progress_bar=False)
+                except Exception as e:
+                    self._mark_failed({b[1] for b in batch}, e)
+                    return
+                self.stages["embed"].record(len(batch), time.perf_counter() - started)
+                self.tokens += sum(lengths)
+                self.padded_tokens += len(lengths) * max(lengths)
+                for (collection, source, chunk_hash, text, extra), vector in zip(batch, vectors):
+                    collection = self._target(collection)
+                    buffer = points.setdefault(collection, [])
+                    buffer.append(self.vector.make_point(source, chunk_hash, text, vector.tolist(), extra))
+                    if len(buffer) >= self.upsert_batch:
+                        submit(collection, points.pop(collection))
+
+            def flush() -> None:
+                # Sort the window by token length and encode it in low-padding buckets
+                try:
+                    lengths = token_lengths(self.vector.model, [p[3] for p in pending])
+                except Exception as e:
+                    self._mark_failed({p[1] for p in pending}, e)
+                    pending.clear()
+                    return
+                for batch in plan_batches(lengths, self.embed_batch, self.token_budget):
+                    encode([pending[i] for i in batch], [lengths[i] for i in batch])
+                pending.clear()
+                self._checkpoint()  # Upserts finished so far survive an interruption
+
+            while True:
+                item = work.get()
+                if item is _DONE:
+                    break
+                collection, source, role, chunks = item
+                if collection not in ensured:
+                    try:
+                        self.vector.ensure_collection(self._target(collection))
+                        if role != collection:
+                            # Shared layout: searches filter on the role field
+                            self.vector.ensure_payload_index(self._target(collection), ROLE_FIELD, "keyword")
+                        ensured.add(collection)
+                    except Exception as e:
+                        self._mark_failed({source}, e)
+                        continue
+                for chunk_hash, text, extra in chunks:
+                    if extra and not self._index_fields(self._target(collection), extra, indexed):
+                        self._mark_failed({source}, RuntimeError("payload index creation failed"))
+                    pending.append((collection, source, chunk_hash, text,
+                                    dict(extra or {}, **{ROLE_FIELD: role, EMBEDDING_FIELD: embedding})))
+                if len(pending) >= self.sort_window:
+                    flush()
+
+            # Flush the last partial window and point batches
+            if pending:
+                flush()
+            for collection, batch in points.items():
+                submit(collection, batch)
+        # Leaving the `with` block waits for every in-flight upsert
+
+    def _accept(self, prepared: Dict[str, Dict], part: Dict, manifest: IndexManifest,
+                known: Dict[str, Optional[str]]) -> Optional[List[Tuple]]:
+        """
+        Merge one prepare_document result (a whole file or one CSV part) into `prepared`,
+        keeping only its chunk hashes, and return the chunks still to embed
+        (None when there is nothing to hand to the embedder).
+        """
+        source = part['source']
+        result = prepared.get(source)
+        if result is None:
+            result = prepared[source] = {"source": source, "collection": part['collection'], "hash": part['hash'],
+                                         "chunks": None, "new": 0, "resumed": 0}
+        elif part['hash'] is None:
+            self._mark_failed({source}, RuntimeError("reading a later part of the file failed"))
+            return None
+        if part['hash'] is None or part['chunks'] is None:
+            return None  # Empty or unchanged file
+
+        if result['chunks'] is None:
+            entry = manifest.get(source)
+            # Chunks already stored in this collection can be reused as-is
+            indexed = set(entry['chunks']) if source in known and entry else set()
+            resumable = self.resume.get((self._target(part['collection']), source), set()) - indexed
+            result.update(chunks={}, indexed=indexed, resumable=resumable)
+
+        new = []
+        for chunk_hash, text in part['chunks'].items():
+            if chunk_hash in result['chunks']:
+                continue  # Repeats a chunk of an earlier part
+            result['chunks'][chunk_hash] = None  # Insertion-ordered set of the file's chunks
+            if chunk_hash in result['resumable']:
+                result['resumed'] += 1
+                self.chunks_resumed += 1
+            elif chunk_hash not in result['indexed']:
+                new.append((chunk_hash, text, part['payloads'].get(chunk_hash)))
+        result['new'] += len(new)
+        return new
+
+    def _drop_unrecorded(self, collection: str, manifest: IndexManifest,
+                         scope: Optional[Callable[[str], bool]] = None, batch_size: int = 256) -> int:
+        """
+        Delete the points of `collection` that no manifest entry references (limited to
+        sources accepted by `scope`, so a partial run never drops other files' points).
+        Only scrolls the collection when it holds more points than the manifest records.
+        """
+        target = self._target(collection)
+        expected = {self.vector.point_id(source, chunk_hash)
+                    for source, entry in manifest.entries.items() if entry['collection'] == collection
+                    for chunk_hash in entry['chunks']}
+        if self.vector.store.count(target) <= len(expected):
+            return 0
+        unrecorded: List = []
+        offset = None
+        while True:
+            points, offset = self.vector.store.scroll(target, limit=batch_size, offset=offset)
+            unrecorded.extend(p.id for p in points if str(p.id) not in expected
+                              and (scope is None or scope((p.payload or {}).get('source', ''))))
+            if offset is None:
+                break
+        if unrecorded:
+            self.vector.delete_points(target, unrecorded, wait=False)  # After the scroll: deletes may move points
+            print(f"[ingest] {target}: dropped {len(unrecorded)} points missing from the manifest")
+        return len(unrecorded)
+
+    def run(self, documents: List[Dict], prune: bool = True,
+            prune_scope: Optional[Callable[[str], bool]] = None) -> Dict:
+        """
+        Index the documents incrementally against the index manifest (unchanged files
+        are skipped, only new chunks are embedded, stale points are deleted).
+        With `prune`, manifest sources missing from `documents` are removed
+        (only those accepted by `prune_scope`, when given). Points of in-scope sources that the
+        manifest doesn't reference (e.g. written before it existed) are deleted as well.
+        Returns work counters plus per-stage throughput.
+        """
+        self.started = started = time.perf_counter()
+        self.files_total = len(documents)
+        manifest = IndexManifest(settings.INDEX_MANIFEST_PATH)
+        existing = set(self.vector.get_collections()) | set(self.vector.get_aliases())
+        stats = {"files_skipped": 0, "files_indexed": 0, "files_removed": 0, "files_failed": 0,
+                 "chunks_embedded": 0, "chunks_resumed": 0, "chunks_deleted": 0}
+
+        # Known hashes let workers skip chunking unchanged files still present in their collection;
+        # files embedded by another model configuration (or an unrecorded one) are re-embedded in full
+        embedding = current_embedding()
+        known: Dict[str, Optional[str]] = {}
+        for document in documents:
+            entry = manifest.get(document['source'])
+            if entry and entry['collection'] == document['collection'] and entry['collection'] in existing \
+                    and entry.get('embedding') == embedding:
+                known[document['source']] = entry['file_hash']
+
+        work: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        embedder = threading.Thread(target=self._embed_worker, args=(work,), name="ingest-embed", daemon=True)
+        embedder.start()
+
+        prepared: Dict[str, Dict] = {}  # Source -> chunk hashes and counters (texts only travel to the embedder)
+        try:
+            for part in self._prepare_all(documents, known):
+                if self._cancel.is_set():
+                    break
+                new = self._accept(prepared, part, manifest, known)
+                if new is None:
+                    continue  # Empty, unchanged or failed
+                # Blocks when the embedder lags; stops early if it died
+                if not self._put(work, (part['collection'], part['source'], part['role'], new), embedder):
+                    break
+        finally:
+            self._put(work, _DONE, embedder)
+            embedder.join()
+            self._checkpoint()
+
+        if self._embed_error is not None:
+            raise RuntimeError(f"Embedding stage failed: {self._embed_error!r}") from self._embed_error
+
+        if self._cancel.is_set():
+            raise IngestCancelled("Ingestion cancelled; completed batches are checkpointed")
+
+        for result in prepared.values():
+            source, collection = result['source'], result['collection']
+            if result['hash'] is None:
+                continue  # Empty file: treated as removed below
+            if result['chunks'] is None:
+                stats["files_skipped"] += 1
+                continue
+            if source in self.failed:
+                stats["files_failed"] += 1  # Manifest untouched -> retried on the next run
+                continue
+
+            # Remove points whose chunk no longer exists (or lived in another collection)
+            entry = manifest.get(source)
+            if entry:
+                keep = set(result['chunks']) if entry['collection'] == collection else set()
+                stale = [self.vector.point_id(source, h) for h in entry['chunks'] if h not in keep]
+                self.vector.delete_points(self._target(entry['collection']), stale, wait=False)
+                stats["chunks_deleted"] += len(stale)
+
+            manifest.update(source, collection, result['hash'], list(result['chunks']), embedding)
+            stats["files_indexed"] += 1
+            stats["chunks_embedded"] += result['new']
+            stats["chunks_resumed"] += result['resumed']
+
+        # Remove points of files that were deleted from disk (or are now empty)
+        loaded = {r['source'] for r in prepared.values() if r['hash'] is not None}
+        for source in manifest.sources():
+            if not prune or source in loaded or (prune_scope and not prune_scope(source)):
+                continue
+            entry = manifest.get(source) or {}
+            stale = [self.vector.point_id(source, h) for h in entry.get('chunks', [])]
+            self.vector.delete_points(self._target(entry.get('collection', '')), stale, wait=False)
+            manifest.remove(source)
+            stats["files_removed"] += 1
+            stats["chunks_deleted"] += len(stale)
+
+        # Points the manifest doesn't know about, e.g. random-ID points from before the manifest existed
+        written = {document['collection'] for document in documents} & existing
+        for collection in sorted(written):
+            stats["chunks_deleted"] += self._drop_unrecorded(collection, manifest, prune_scope)
+
+        self.vector.store.flush()  # Persist the deletes in one go, before the manifest forgets the points
+        if self.on_commit:
+            self.on_commit(manifest, stats)  # E.g. verify + publish a new version; raises to abort
+        manifest.save()
+        stats["errors"] = list(self.errors)
+        stats["stages"] = self.stage_report()
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
@@ -0,0 +1,286 @@
+import json
+import threading
+import uuid
+from concurrent.futures import Future, wait
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from .ragServices import RAGService
+from .ingestServices import IngestCancelled, IngestPipeline
+from .versionServices import CollectionVersions, versions_lock
+from ..db.base import db_session
+from ..db.queries import Queries
+from ..utils.executors import index_executor
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+ALL_SCOPE = "*"  # Job scope covering every role folder
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobServices:
+    def __init__(self, db: Any):
+        self.db = db  # Database connection
+
+    def _job(self, cursor, row) -> Dict:
+        """
+        Turn an index_jobs row into a dict (collections as a list, progress decoded).
+        """
+        job = dict(zip([column[0] for column in cursor.description], row))
+        job['collections'] = job['collections'].split(",") if job['collections'] else []
+        job['progress'] = json.loads(job['progress']) if job['progress'] else None
+        return job
+
+    def create_job(self, scope: str, collections: Set[str]) -> Tuple[Dict, bool]:
+        """
+        Create a queued job, unless a queued/running job already covers one of
+        `collections`: then return that job instead (created = False).
+        """
+        self.db.execute("BEGIN IMMEDIATE")  # Serialise check + insert, also across processes
+        try:
+            for job in self.active_jobs():
+                if collections & set(job['collections']):
+                    self.db.commit()
+                    return job, False
+            job_id = uuid.uuid4().hex
+            self.db.execute(Queries.insert_index_job, (job_id, scope, ",".join(sorted(collections)), "queued", _now()))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return self.get_job(job_id), True
+
+    def get_job(self, job_id: str) -> Dict:
+        """
+        Retrieve a job by its ID; empty dict if not found.
+        """
+        cursor = self.db.execute(Queries.get_index_job, (job_id,))
+        row = cursor.fetchone()
+        return self._job(cursor, row) if row else {}
+
+    def list_jobs(self, limit: int = 20) -> List[Dict]:
+        cursor = self.db.execute(Queries.fetch_recent_index_jobs, (limit,))
+        return [self._job(cursor, row) for row in cursor.fetchall()]
+
+    def active_jobs(self) -> List[Dict]:
+        cursor = self.db.execute(Queries.fetch_active_index_jobs)
+        return [self._job(cursor, row) for row in cursor.fetchall()]
+
+    def unfinished_jobs(self) -> List[Dict]:
+        """
+        Jobs left queued, running or interrupted (e.g. by a restart), oldest first.
+        """
+        cursor = self.db.execute(Queries.fetch_unfinished_index_jobs)
+        return [self._job(cursor, row) for row in cursor.fetchall()]
+
+    def set_status(self, job_id: str, job_status: str) -> None:
+        self.db.execute(Queries.set_index_job_status, (job_status, job_id))
+        self.db.commit()
+
+    def start_job(self, job_id: str) -> None:
+        self.db.execute(Queries.start_index_job, (_now(), job_id))
+        self.db.commit()
+
+    def save_progress(self, job_id: str, progress: Dict) -> None:
+        self.db.execute(Queries.update_index_job_progress, (json.dumps(progress), job_id))
+        self.db.commit()
+
+    def finish_job(self, job_id: str, job_status: str, progress: Optional[Dict], error: Optional[str]) -> None:
+        self.db.execute(Queries.finish_index_job,
+                        (job_status, _now(), json.dumps(progress) if progress else None, error, job_id))
+        self.db.commit()
+
+    def add_checkpoint(self, job_id: str, chunks: List[Tuple[str, str, str]]) -> None:
+        """
+        Record (collection, source, chunk hash) of points the job has durably upserted.
+        """
+        self.db.executemany(Queries.insert_index_job_chunk, [(job_id, *chunk) for chunk in chunks])
+        self.db.commit()
+
+    def load_checkpoint(self, job_id: str) -> Dict[Tuple[str, str], Set[str]]:
+        """
+        Chunks already upserted by the job, as (collection, source) -> chunk hashes.
+        """
+        done: Dict[Tuple[str, str], Set[str]] = {}
+        for collection, source, chunk_hash in self.db.execute(Queries.fetch_index_job_chunks, (job_id,)):
+            done.setdefault((collection, source), set()).add(chunk_hash)
+        return done
+
+    def clear_checkpoint(self, job_id: str) -> None:
+        self.db.execute(Queries.delete_index_job_chunks, (job_id,))
+        self.db.commit()
+
+
+class IndexJobManager:
+    def __init__(self):
+        """
+        Runs indexing as background jobs on the single-threaded index executor:
+        - one queued/running job per collection (a second request returns the existing job)
+        - live progress from the running pipeline, persisted at every checkpoint
+        - jobs interrupted by a shutdown or crash resume on the next startup,
+          skipping the chunks their completed batches already stored
+        - with VECTOR_VERSIONING, a job builds new versions of its collections and
+          swaps their aliases once verified (see CollectionVersions); a failed job
+          drops its versions, an interrupted one keeps them to resume into
+        """
+        self._lock = threading.Lock()
+        self._pipelines: Dict[str, IngestPipeline] = {}
+        self._futures: Set[Future] = set()
+        self._stopping = threading.Event()
+
+    def submit(self, model, store, role: Optional[str] = None) -> Tuple[Dict, bool]:
+        """
+        Start indexing the folder of `role` (all folders when None) unless a job
+        already covers the same collections. Returns (job, created).
+        """
+        rag = RAGService(model, store)
+        documents = rag.retrie_text({role} if role else None)
+        if not documents:
+            raise HTTPException(detail=f"No documents to index for {role!r}", status_code=status.HTTP_404_NOT_FOUND)
+
+        with db_session() as db:
+            job, created = JobServices(db).create_job(role or ALL_SCOPE, {d['collection'] for d in documents})
+        if created:
+            self._schedule(job['id'], model, store, role)
+        return job, created
+
+    def _schedule(self, job_id: str, model, store, role: Optional[str]) -> None:
+        future = index_executor.submit(self._run, job_id, model, store, role)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+    def _checkpoint(self, job_id: str, pipeline: IngestPipeline, chunks: List[Tuple[str, str, str]]) -> None:
+        with db_session() as db:
+            service = JobServices(db)
+            service.add_checkpoint(job_id, chunks)
+            service.save_progress(job_id, pipeline.progress())
+
+    def _run(self, job_id: str, model, store, role: Optional[str]) -> None:
+        """
+        Execute one job on the index executor and record its outcome.
+        """
+        if self._stopping.is_set():
+            return  # Still queued in the database: resumed on the next startup
+
+        with db_session() as db:
+            service = JobServices(db)
+            service.start_job(job_id)
+            resume = service.load_checkpoint(job_id)
+
+        rag = RAGService(model, store)
+        rag.retrie_text({role} if role else None)
+        versions = CollectionVersions(rag.vector) if settings.VECTOR_VERSIONING else None
+        pipeline = rag.make_pipeline(resume=resume,
+                                     on_checkpoint=lambda chunks: self._checkpoint(job_id, pipeline, chunks),
+                                     on_commit=versions.publish if versions else None)
+        with self._lock:
+            self._pipelines[job_id] = pipeline
+            if self._stopping.is_set():
+                pipeline.cancel()  # Shutdown began while the job was starting
+
+        job_status, progress, error = "completed", None, None
+        try:
+            with versions_lock:
+                if versions is not None:
+                    # Points are written to new versions; queries keep hitting the live ones until publish
+                    pipeline.targets = versions.stage({d['collection'] for d in rag.documents}, resume)
+                progress = rag.save_document(pipeline=pipeline)
+        except IngestCancelled:
+            job_status, progress = "interrupted", pipeline.progress()
+        except Exception as e:
+            job_status, progress, error = "failed", pipeline.progress(), str(e)
+            print(f"[index job {job_id}] Error -> {e}")
+            if versions is not None:
+                versions.discard()
+        finally:
+            with self._lock:
+                self._pipelines.pop(job_id, None)
+
+        with db_session() as db:
+            service = JobServices(db)
+            service.finish_job(job_id, job_status, progress, error)
+            if job_status != "interrupted":
+                service.clear_checkpoint(job_id)  # The manifest now records the indexed chunks
+        print(f"[index job {job_id}] {job_status} -> {progress}")
+
+    def rollback(self, model, store, collection: str, version: Optional[int] = None) -> Dict:
+        """
+        Point `collection` back at an earlier version (409 while a job covers it).
+        Only an alias swap: runs in the request under the versions lock, so it never
+        interleaves with a build or watcher batch, and answers 409 rather than
+        waiting more than VECTOR_ROLLBACK_WAIT seconds for one to finish.
+        """
+        with db_session() as db:
+            active = JobServices(db).active_jobs()
+        if any(collection in job['collections'] for job in active):
+            raise HTTPException(detail=f"An index job for {collection!r} is in progress",
+                                status_code=status.HTTP_409_CONFLICT)
+        if not versions_lock.acquire(timeout=settings.VECTOR_ROLLBACK_WAIT):
+            raise HTTPException(detail="Indexing in progress, retry the rollback later",
+                                status_code=status.HTTP_409_CONFLICT)
+        try:
+            rag = RAGService(model, store)
+            return CollectionVersions(rag.vector).rollback(collection, version)
+        finally:
+            versions_lock.release()
+
+    def status(self, job_id: str) -> Dict:
+        """
+        Job record with live progress while it is running; 404 if unknown.
+        """
+        with db_session() as db:
+            job = JobServices(db).get_job(job_id)
+        if not job:
+            raise HTTPException(detail="Index job not found", status_code=status.HTTP_404_NOT_FOUND)
+        with self._lock:
+            pipeline = self._pipelines.get(job_id)
+        if pipeline is not None:
+            job['progress'] = pipeline.progress()
+        return job
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        with db_session() as db:
+            jobs = JobServices(db).list_jobs(limit)
+        for job in jobs:
+            with self._lock:
+                pipeline = self._pipelines.get(job['id'])
+            if pipeline is not None:
+                job['progress'] = pipeline.progress()
+        return jobs
+
+    def resume(self, model, store) -> int:
+        """
+        Re-queue the jobs a previous process left unfinished (called on startup).
+        With INDEX_JOB_RESUME off they are only marked interrupted.
+        """
+        with db_session() as db:
+            service = JobServices(db)
+            jobs = service.unfinished_jobs()
+            for job in jobs:
+                service.set_status(job['id'], "queued" if settings.INDEX_JOB_RESUME else "interrupted")
+        if not settings.INDEX_JOB_RESUME:
+            return 0
+        for job in jobs:
+            self._schedule(job['id'], model, store, None if job['scope'] == ALL_SCOPE else job['scope'])
+        return len(jobs)
+
+    def shutdown(self, timeout: float) -> None:
+        """
+        Stop the running job at its next document (its batches are checkpointed)
+        and wait up to `timeout` seconds for it to record its state.
+        """
+        self._stopping.set()
+        with self._lock:
+            for pipeline in self._pipelines.values():
+                pipeline.cancel()
+            futures = set(self._futures)
+        wait(futures, timeout=timeout)
+
+
+# Process-wide background index job manager
+index_jobs = IndexJobManager()
@@ -0,0 +1,59 @@
+from typing import Dict
+from qdrant_client.http.models import PointStruct
+from .vectorServices import ROLE_FIELD, VectorService
+from .manifestServices import IndexManifest
+from .versionServices import CollectionVersions
+from ..schemas.schemes import Roles
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+
+def migrate_to_shared_layout(vector: VectorService, drop_old: bool = False, batch_size: int = 256) -> Dict:
+    """
+    Copy every per-role collection into the shared collection without re-embedding:
+    - points keep their IDs and vectors, and get the role as an indexed payload field
+    - manifest entries are re-pointed at the shared collection, so the next
+      indexing run (with VECTOR_LAYOUT=shared) skips unchanged files
+    - with `drop_old`, the per-role collections (and their versions) are deleted afterwards
+    Safe to re-run: upserts are idempotent by point ID.
+    Suggested order: migrate, switch VECTOR_LAYOUT to "shared" and restart, then migrate with drop_old.
+    """
+    shared = settings.SHARED_COLLECTION
+    role_collections = {r.value for r in Roles} - {Roles.Executives.value}
+    sources = [name for name in vector.get_collection_names() if name in role_collections and name != shared]
+
+    vector.ensure_collection(shared)
+    vector.ensure_payload_index(shared, ROLE_FIELD, "keyword")
+
+    stats = {"collections": {}, "points": 0, "dropped": []}
+    for name in sources:
+        copied = 0
+        offset = None
+        while True:
+            points, offset = vector.store.scroll(name, limit=batch_size, offset=offset, with_vectors=True)
+            if points:
+                vector.upsert_points(shared, [
+                    PointStruct(id=p.id, vector=p.vector, payload=dict(p.payload, **{ROLE_FIELD: name}))
+                    for p in points
+                ])
+                copied += len(points)
+            if offset is None:
+                break
+        stats["collections"][name] = copied
+        stats["points"] += copied
+
+    # Point the manifest at the shared collection
+    manifest = IndexManifest(settings.INDEX_MANIFEST_PATH)
+    for source in manifest.sources():
+        entry = manifest.get(source) or {}
+        if entry.get('collection') in sources:
+            manifest.update(source, shared, entry['file_hash'], entry['chunks'], entry.get('embedding'))
+    manifest.save()
+
+    if drop_old:
+        for name in sources:
+            stats["dropped"].extend(CollectionVersions(vector).drop(name))
+
+    vector.invalidate_collections()
+    return stats
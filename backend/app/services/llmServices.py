@@ -1,11 +1,12 @@
 from fastapi import HTTPException, status
-from openai import OpenAI
 from openai.types.chat import ChatCompletionMessageParam
 from ..schemas.schemes import User, ConversationModel
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from ..config.settings import Settings
 from ..services.chatServices import ChatServices
+from ..utils.openaiClients import openai_clients
+from .contextServices import count_message_tokens
 
 settings = Settings() # type: ignore
 
@@ -13,7 +14,7 @@ class LLMServices:
     def __init__(self, user: User, api_key:Optional[str] = None, prompt: str = "", db=None):
         """
         Initialize with user, optional prompt, and DB connection.
-        Also load previous conversation history from the DB.
+        Also load the most recent conversation history (HISTORY_WINDOW exchanges) from the DB.
         """
         self.user = user
         self.prompt = prompt
@@ -25,7 +26,7 @@ class LLMServices:
         Build the messages list for the LLM:
         - system instructions with user's role
         - optionally add RAG context
-        - include last 3 conversation exchanges
+        - include last HISTORY_WINDOW conversation exchanges
         - finally add current user prompt
         """
         system_prompt = (
@@ -44,9 +45,8 @@ class LLMServices:
         
         prompt:List[ChatCompletionMessageParam] = [{"role": "system", "content": system_prompt}]
 
-        # Include up to last 3 conversation exchanges for context
-        history = self.history[-3:] if len(self.history) > 3 else self.history
-        for message in history:
+        # Include the last HISTORY_WINDOW conversation exchanges for context
+        for message in self.history:
             prompt.extend([
                 {"role": "user", "content": message["prompt"]}, 
                 {"role": "assistant", "content": message["response"]}
@@ -56,14 +56,20 @@ class LLMServices:
         prompt.append({"role": "user", "content": self.prompt})
         return prompt 
 
-    def gpt_conversation_prompt(self, rag_context: Optional[str] = None) -> str:
+    def prompt_tokens(self, rag_context: Optional[str] = None) -> int:
         """
-        Send the prompt to OpenAI's GPT API and return the assistant's reply.
+        Count the tokens of the full prompt (system, context, history and question).
+        """
+        return count_message_tokens(self.prompt_formate(rag_context))  # type: ignore
+
+    async def gpt_conversation_prompt(self, rag_context: Optional[str] = None) -> str:
+        """
+        Send the prompt to OpenAI's GPT API (pooled async client) and return the assistant's reply.
         Raises any errors encountered during the API call.
         """
         try:
-            client = OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
+            client = openai_clients.get(self.api_key)
+            response = await client.chat.completions.create(
                 model='gpt-4o',
                 messages=self.prompt_formate(rag_context)
             )
@@ -73,17 +79,39 @@ class LLMServices:
             print(f"[gpt_conversation_prompt] Error: {e}")
             raise  HTTPException(detail=f"[gpt_conversation_prompt] Error: {e}", status_code=status.HTTP_400_BAD_REQUEST)
 
+    async def stream_conversation_prompt(self, rag_context: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the assistant's reply from OpenAI's GPT API token by token.
+        Raises any errors encountered during the API call.
+        """
+        try:
+            client = openai_clients.get(self.api_key)
+            stream = await client.chat.completions.create(
+                model='gpt-4o',
+                messages=self.prompt_formate(rag_context),
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            print(f"[stream_conversation_prompt] Error: {e}")
+            raise  HTTPException(detail=f"[stream_conversation_prompt] Error: {e}", status_code=status.HTTP_400_BAD_REQUEST)
+
     def retrieve_conversations(self) -> List[Dict]:
         """
-        Fetch past conversation history for the current user from DB.
-        Returns list of dicts with prompt and response.
+        Fetch the most recent conversation history for the current user from DB.
+        Returns list of dicts with prompt and response, oldest first.
         """
-        chats = self.chat_service.fetch_chats_by_user(self.user.id)
+        chats = self.chat_service.fetch_recent_chats(self.user.id, settings.HISTORY_WINDOW)
         return [{"prompt": chat["prompt"], "response": chat["response"]} for chat in chats]
 
-    def save_conversation(self, response: str) -> None:
+    def save_conversation(self, response: str, db=None) -> None:
         """
         Save a new conversation (prompt + response) to the database.
+        Pass an explicit `db` connection when the one the history was loaded
+        with has already gone back to the pool (the chat route always does).
         """
         new_chat = ConversationModel(
             userId=self.user.id,
@@ -91,4 +119,5 @@ class LLMServices:
             response=response,
             date=datetime.now().isoformat()
         )
-        self.chat_service.insert_chat(new_chat)
+        chat_service = ChatServices(db) if db is not None else self.chat_service
+        chat_service.insert_chat(new_chat)
@@ -0,0 +1,72 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class IndexManifest:
+    def __init__(self, path: str):
+        """
+        Initialize the index manifest stored at `path`.
+        The manifest maps each source file to its collection,
+        its file content hash, the hashes of its indexed chunks and
+        the fingerprint of the embedding model that produced their vectors.
+        """
+        self.path = path
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """
+        Read the manifest from disk.
+        Return an empty manifest if the file is missing or unreadable.
+        """
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[manifest] Error reading {self.path}: {e}")
+            return {}
+
+    def get(self, source: str) -> Optional[Dict]:
+        """
+        Return the manifest entry for a source file, if any.
+        """
+        return self.entries.get(source)
+
+    def sources(self) -> List[str]:
+        """
+        Return all source files currently recorded in the manifest.
+        """
+        return list(self.entries.keys())
+
+    def update(self, source: str, collection: str, file_hash: str, chunk_hashes: List[str],
+               embedding: Optional[str] = None) -> None:
+        """
+        Record the indexed state of a source file
+        (`embedding`: see embeddingModel.embedding_fingerprint; None when unknown).
+        """
+        self.entries[source] = {
+            "collection": collection,
+            "file_hash": file_hash,
+            "chunks": chunk_hashes,
+            "embedding": embedding
+        }
+
+    def remove(self, source: str) -> None:
+        """
+        Forget a source file (e.g. after it was deleted from disk).
+        """
+        self.entries.pop(source, None)
+
+    def save(self) -> None:
+        """
+        Write the manifest to disk atomically (temp file + rename),
+        so an interrupted run never leaves a truncated manifest behind.
+        """
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
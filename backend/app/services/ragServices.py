@@ -1,63 +1,175 @@
+import asyncio
 import glob
+import heapq
+import os
+from starlette.concurrency import run_in_threadpool
 from .vectorServices import VectorService
-from typing import List, Dict
+from .ingestServices import IngestPipeline
+from .answerCacheServices import answer_cache
+from .csvServices import coerce, match_rows
+from typing import Callable, Iterable, List, Dict, Optional, Set, Tuple
 from ..schemas.schemes import Roles
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+DATA_DIR = 'backend/resources/data'  # One folder per role, indexed into that role's collection
 
 class RAGService:
-    def __init__(self, model, client, documents: List[Dict] = []):
+    def __init__(self, model, store, documents: Optional[List[Dict]] = None, batcher=None, timer=None):
         """
-        Initialize with optional list of documents.
+        Initialize with the vector store, optional list of documents and embedding batcher.
         VectorService handles text loading, chunking, embedding, and vector storage.
+        An optional StageTimer gets an "embed" mark once the prompt is embedded.
         """
-        self.vector = VectorService(model, client)
-        self.documents: List[Dict] = documents
+        self.vector = VectorService(model, store, batcher)
+        self.documents: List[Dict] = documents if documents is not None else []
+        self.prune_scope: Optional[Callable[[str], bool]] = None  # Sources the loaded set is authoritative for
+        self.prompt_embedding: Optional[List[float]] = None  # Set by retrive_vectors
+        self.timer = timer
+
+    @staticmethod
+    def source_role(path: str) -> str:
+        return path.split('/')[-2]  # Role (collection name) is the file's folder
 
-    def retrie_text(self) ->  List[Dict]:
+    def _add_document(self, path: str) -> None:
+        role = self.source_role(path)
+        self.documents.append({
+            "source": path,
+            "role": role,
+            "collection": self.vector.collection_for(role)
+        })
+
+    def retrie_text(self, roles: Optional[Set[str]] = None) ->  List[Dict]:
         """
-        Load text files from 'resources/data/*/*' folder,
-        read content, add metadata, and store in self.documents.
+        List files in the 'resources/data/*/*' folder with their collection
+        (only the folders of `roles`, when given) and store them in self.documents.
+        Reading and chunking happen in the ingestion pipeline's worker processes.
         """
-        paths: List[str] = glob.glob('backend/resources/data/*/*')  # Get all nested files
+        if roles:
+            self.prune_scope = lambda source: self.source_role(source) in roles
+        paths: List[str] = glob.glob(f'{DATA_DIR}/*/*')  # Get all nested files
         for path in paths:
-            text = self.vector.load_text(path)  # Load file content
-            if not text:
-                continue  # Skip if empty
-            self.documents.append({
-                "text": text,
-                "source": path,
-                "collection": path.split('/')[-2]  # Extract collection name from path
-            })
+            if roles and self.source_role(path) not in roles:
+                continue
+            self._add_document(path)
+        return self.documents
+
+    def retrie_files(self, paths: Iterable[str]) -> List[Dict]:
+        """
+        Load only the given 'resources/data/<role>/<file>' paths (e.g. changed files).
+        Paths that no longer exist are left out, so save_document removes their points.
+        """
+        sources = set(paths)
+        self.prune_scope = lambda source: source in sources
+        for path in sorted(sources):
+            if os.path.isfile(path):
+                self._add_document(path)
         return self.documents
 
-    def save_document(self) -> None:
+    def make_pipeline(self, resume: Optional[Dict[Tuple[str, str], Set[str]]] = None,
+                      on_checkpoint: Optional[Callable] = None, targets: Optional[Dict[str, str]] = None,
+                      on_commit: Optional[Callable] = None) -> IngestPipeline:
         """
-        For each document:
-        - Split text into chunks
-        - Generate vector embeddings for chunks
-        - Save embeddings to the respective collection
+        Ingestion pipeline configured from settings (see IngestPipeline for
+        resume/checkpoints and versioned builds).
         """
-        for document in self.documents:
-            chunks: List[str] = self.vector.chunk_text(document['text'])  # Chunk the text
-            embeddings = self.vector.embed_chunks(chunks, document['source'])  # Create embeddings
-            self.vector.save_vectors(document['collection'], embeddings)  # Save to vector DB
+        return IngestPipeline(
+            self.vector,
+            queue_size=settings.INGEST_QUEUE_SIZE,
+            embed_batch=settings.INGEST_EMBED_BATCH,
+            upsert_batch=settings.INGEST_UPSERT_BATCH,
+            max_inflight=settings.INGEST_MAX_INFLIGHT,
+            workers=settings.INGEST_WORKERS,
+            token_budget=settings.INGEST_EMBED_TOKEN_BUDGET,
+            sort_window=settings.INGEST_SORT_WINDOW,
+            resume=resume,
+            on_checkpoint=on_checkpoint,
+            targets=targets,
+            on_commit=on_commit
+        )
 
-    def retrive_vectors(self, prompt: str, collection: Roles) -> List:
+    def save_document(self, prune: bool = True, pipeline: Optional[IngestPipeline] = None) -> Dict:
+        """
+        Incrementally index the loaded documents through the staged ingestion pipeline:
+        - Skip files whose content hash is unchanged
+        - Chunk changed files in worker processes, embed only chunks not indexed yet
+        - Upsert points in batches and delete points of chunks that disappeared
+          (and, when `prune` is set, of files no longer among the loaded documents,
+          limited to the loaded roles / files)
+        Returns counters describing the work done and per-stage throughput.
+        """
+        pipeline = pipeline or self.make_pipeline()
+        stats = pipeline.run(self.documents, prune=prune, prune_scope=self.prune_scope)
+
+        self.vector.invalidate_collections()  # Refresh cached collection list after re-index
+        if stats["files_indexed"] or stats["files_removed"]:
+            answer_cache.clear()  # Cached answers may be built on outdated context
+        return stats
+
+    async def retrive_vectors(self, prompt: str, collection: Roles) -> List:
         """
         Retrieve relevant vectors for a prompt:
-        - Embed the prompt
-        - If collection is 'executives', search all collections
-        - Otherwise, search only in specified collection
+        - Embed the prompt (cached / micro-batched), kept in self.prompt_embedding
+        - Shared layout: one search of the shared collection, filtered on
+          the role payload field (no filter for executives)
+        - Per-role layout: if collection is 'executives', search all collections
+          concurrently and keep the overall top-k hits; otherwise search only
+          in the specified collection
         - Return vectors sorted by similarity score descending
         """
-        prompt_embedding = self.vector.embed_text(text=prompt)
+        prompt_embedding = await self.vector.aembed_text(text=prompt)
+        self.prompt_embedding = prompt_embedding
+        if self.timer:
+            self.timer.mark("embed")
+
+        if self.vector.shared_layout:
+            collection_name, conditions = self.vector.scope(collection.value)
+            return await self.vector.asearch(collection_name, prompt_embedding, conditions)
 
-        # For executives, search across all collections
+        # For executives, fan out over all collections at once
         if collection.value == "executives":
-            vectors = []
-            for role in self.vector.get_collections():
-                vectors.extend(self.vector.search(role.name, prompt_embedding))
-            # Sort by score descending
-            return sorted(vectors, key=lambda a: a['score'], reverse=True)
+            names = await self.vector.aget_collection_names()
+            results = await asyncio.gather(*[
+                self.vector.asearch(name, prompt_embedding) for name in names
+            ])
+            # Merge with a bounded top-k heap instead of sorting every hit
+            hits = (hit for result in results for hit in result)
+            return heapq.nlargest(self.vector.search_limit, hits, key=lambda a: a['score'])
         else:
             # Search in specified collection only
-            return self.vector.search(collection.value, prompt_embedding)
+            return await self.vector.asearch(collection.value, prompt_embedding)
+
+    async def lookup_rows(self, collection: str, filters: Dict, prompt: Optional[str] = None,
+                          limit: int = 100) -> List[Dict]:
+        """
+        Exact lookup over row-aware (CSV) chunks using the indexed payload fields:
+        - Without a prompt: scroll the chunks whose key fields match, no embedding or vector search,
+          until `limit` rows matched or the chunks run out
+        - With a prompt: semantic search for the `limit` best matching chunks
+          (a matching chunk holds at least one matching row)
+        Returns the typed rows matching every filter (at most `limit`).
+        """
+        conditions = {k: coerce(v) if isinstance(v, str) else v for k, v in filters.items()}
+        collection_name, scope = self.vector.scope(collection)
+        if prompt:
+            embedding = await self.vector.aembed_text(text=prompt)
+            chunks = await self.vector.asearch(collection_name, embedding, dict(conditions, **scope),
+                                               limit=max(limit, self.vector.search_limit))
+        else:
+            return await run_in_threadpool(self._scroll_rows, collection_name, dict(conditions, **scope),
+                                           conditions, limit)
+
+        rows: List[Dict] = []
+        for chunk in chunks:
+            rows.extend(match_rows(chunk.get('rows') or [], conditions))
+        return rows[:limit]
+
+    def _scroll_rows(self, collection: str, point_conditions: Dict, conditions: Dict, limit: int) -> List[Dict]:
+        # Chunk-level conditions only narrow the candidates: keep scrolling until enough rows match
+        rows: List[Dict] = []
+        for payload in self.vector.iter_points(collection, point_conditions):
+            rows.extend(match_rows(payload.get('rows') or [], conditions))
+            if len(rows) >= limit:
+                break
+        return rows[:limit]
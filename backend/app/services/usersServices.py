@@ -3,6 +3,27 @@ import sqlite3
 from ..db.queries import Queries
 from ..schemas.schemes import RegisterModel
 from fastapi import HTTPException, status
+from ..config.settings import Settings
+from ..utils.cache import LRUCache
+
+settings = Settings() # type: ignore
+
+# In-process cache of user rows (without password hash) used by authentication
+user_cache = LRUCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drop a user from the auth cache; call whenever a user row is created or changed.
+    """
+    user_cache.invalidate(user_id)
+
+def cache_user(user: Dict) -> Dict:
+    """
+    Store a user row (without password hash) in the auth cache and return a copy.
+    """
+    cached = {k: v for k, v in user.items() if k != "password"}
+    user_cache.set(cached["id"], cached)
+    return dict(cached)
 
 class UsersServices:
     def __init__(self, db: Any):
@@ -21,6 +42,7 @@ class UsersServices:
             self.db.commit()  # Commit transaction
 
             last_id = cursor.lastrowid  # Get inserted user's ID
+            invalidate_user(last_id)  # Never serve a stale cached row for this ID
 
             # Retrieve inserted user details by ID
             inserted_user = self.get_user_by_id(last_id)
@@ -1,24 +1,103 @@
-from qdrant_client.models import VectorParams, Distance
 from qdrant_client.http.models import PointStruct
 from haystack.nodes import PreProcessor
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import itertools
+import re
 import uuid
-from typing import List
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from ..config.settings import Settings
+from ..utils.cache import LRUCache
+from ..utils.embeddingModel import lowercases_input
+from ..vectorstores.base import VectorStore
+
+settings = Settings() # type: ignore
+
+# Process-wide cache of query embeddings, shared by all VectorService instances
+embedding_cache = LRUCache(maxsize=settings.EMBEDDING_CACHE_SIZE, ttl=settings.EMBEDDING_CACHE_TTL)
+
+# Payload field holding the owning role of each point (not "role": CSV rows may have such a column)
+ROLE_FIELD = "access_role"
+
+# Payload field holding the embedding fingerprint of each point's vector
+EMBEDDING_FIELD = "embedding_model"
+
+# Cached list of collection names (saves a store round-trip per executive query)
+collection_cache = LRUCache(maxsize=1, ttl=settings.COLLECTION_CACHE_TTL)
+
+# Physical collection holding one version of a logical collection ("finance_v7"), served through an alias
+VERSION_NAME = re.compile(r"^(?P<collection>.+)_v(?P<version>\d+)$")
+
+def version_name(collection: str, version: int) -> str:
+    return f"{collection}_v{version}"
+
+@lru_cache(maxsize=8)
+def get_preprocessor(split_length: int, split_overlap: int) -> PreProcessor:
+    """
+    Build one Haystack PreProcessor per chunking config and reuse it (per process).
+    """
+    return PreProcessor(
+        split_length=split_length,
+        split_overlap=split_overlap,
+        split_respect_sentence_boundary=True
+    )
+
+def split_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """
+    Split text into overlapping chunks, respecting sentence boundaries.
+    Module-level so ingestion worker processes can call it directly.
+    """
+    processed = get_preprocessor(chunk_size, overlap).process([{"content": text}])
+    # Extract content from processed chunks
+    return [str(d.content) for d in processed]
 
 class VectorService:
-    def __init__(self, model, client):
+    def __init__(self, model, store: VectorStore, batcher=None):
         """
         Initialize the vector service:
         - Load the sentence transformer model for embeddings.
+        - Optionally use a shared EmbeddingBatcher for query embeddings.
         - Set chunk size and overlap for text splitting.
-        - Connect to Qdrant vector database.
+        - Use the configured vector store (Qdrant or in-process NumPy).
         """
         self.model = model
+        self.batcher = batcher
         self.chunk_size = 300  # Tokens per chunk
         self.overlap = 40      # Overlap tokens between chunks
         self.search_limit = 8  # Number of search results to return
-        self.client = client
+        self.store = store
+        self.shared_layout = settings.VECTOR_LAYOUT == "shared"  # One collection + role payload filter
+        self._dimension: Optional[int] = None
+        self._lowercase: Optional[bool] = None
+
+    @property
+    def dimension(self) -> int:
+        """
+        Embedding size of the loaded model (e.g. 384 for MiniLM), used for new collections.
+        """
+        if self._dimension is None:
+            self._dimension = int(self.model.get_sentence_embedding_dimension())
+        return self._dimension
+
+    def collection_for(self, role: str) -> str:
+        """
+        Physical collection holding a role's documents in the configured layout.
+        """
+        return settings.SHARED_COLLECTION if self.shared_layout else role
 
-    def load_text(self, path: str) -> str:
+    def scope(self, role: str) -> Tuple[str, Dict]:
+        """
+        Collection and payload conditions restricting a search to a role's documents.
+        Executives get the shared collection unfiltered.
+        """
+        if not self.shared_layout:
+            return role, {}
+        return settings.SHARED_COLLECTION, ({} if role == "executives" else {ROLE_FIELD: role})
+
+    @staticmethod
+    def load_text(path: str) -> str:
         """
         Read raw text from a file.
         Return empty string if file reading fails.
@@ -35,90 +114,270 @@ class VectorService:
         Split long text into overlapping chunks using Haystack PreProcessor.
         Respects sentence boundaries for better coherence.
         """
-        preprocessor = PreProcessor(
-            split_length=self.chunk_size,
-            split_overlap=self.overlap,
-            split_respect_sentence_boundary=True
-        )
-        processed = preprocessor.process([{"content": text}])
-        # Extract content from processed chunks
-        return [str(d.content) for d in processed]
+        return split_text(text, self.chunk_size, self.overlap)
     
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """
+        Return a stable content hash (SHA-256 hex digest) for a text.
+        """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def point_id(source: str, chunk_hash: str) -> str:
+        """
+        Build a deterministic point ID from the source path and chunk hash.
+        Re-indexing an unchanged chunk always maps to the same point.
+        """
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{chunk_hash}"))
+
+    def normalize_query(self, text: str) -> str:
+        """
+        Normalize a query for cache lookups: trim and collapse whitespace; lowercase only
+        when the model's tokenizer does too (uncased, e.g. MiniLM), so the case can't
+        change the embedding. Queries are embedded as given either way.
+        """
+        if self._lowercase is None:
+            self._lowercase = lowercases_input(self.model)
+        text = re.sub(r"\s+", " ", text).strip()
+        return text.lower() if self._lowercase else text
+
     def embed_text(self, text: str) -> List:
         """
         Generate embedding vector for a single text string.
+        Repeated queries are served from the process-wide embedding cache.
+        """
+        key = (settings.EMBEDDING_MODEL, self.normalize_query(text))
+        vector = embedding_cache.get(key)
+        if vector is None:
+            vector = self.model.encode(text).tolist()
+            embedding_cache.set(key, vector)
+        return vector
+
+    async def aembed_text(self, text: str) -> List:
+        """
+        Async variant of embed_text for request handlers.
+        Cache misses go through the micro-batching executor when available,
+        otherwise the encode call runs in the threadpool so it never blocks the event loop.
         """
-        return self.model.encode(text).tolist()
+        key = (settings.EMBEDDING_MODEL, self.normalize_query(text))
+        vector = embedding_cache.get(key)
+        if vector is None:
+            if self.batcher:
+                vector = await self.batcher.embed(text)
+            else:
+                vector = (await run_in_threadpool(self.model.encode, text)).tolist()
+            embedding_cache.set(key, vector)
+        return vector
 
     def embed_chunks(self, chunks: List[str], source: str) -> List[PointStruct]:
         """
         Embed multiple text chunks and prepare them as Qdrant points.
-        Each chunk gets a unique UUID and metadata including original text and source.
+        Each chunk gets a deterministic ID derived from its source and content hash,
+        and metadata including original text, source and chunk hash.
         """
-        sources = [source] * len(chunks)  # Same source for all chunks
+        if not chunks:
+            return []
+
         # Ensure all chunks are strings before encoding
         str_chunks = [str(c) for c in chunks]
         vectors = self.model.encode(str_chunks, show_progress_bar=False)  # Batch encode
 
         # Create Qdrant point payloads with id, vector, and metadata
-        return [
-            PointStruct(
-                id=str(uuid.uuid4()),
-                vector=v.tolist(),
-                payload={"text": c, "source": s}
-            )
-            for c, v, s in zip(str_chunks, vectors, sources)
-        ]
+        return [self.make_point(source, self.hash_text(c), c, v.tolist()) for c, v in zip(str_chunks, vectors)]
+
+    @classmethod
+    def make_point(cls, source: str, chunk_hash: str, text: str, vector: List[float],
+                   extra: Optional[Dict] = None) -> PointStruct:
+        """
+        Build a Qdrant point with a deterministic ID and text/source/hash payload,
+        plus optional extra payload fields (e.g. typed CSV columns).
+        """
+        payload = {"text": text, "source": source, "chunk_hash": chunk_hash}
+        if extra:
+            payload.update(extra)
+        return PointStruct(id=cls.point_id(source, chunk_hash), vector=vector, payload=payload)
 
     def save_vectors(self, collection: str, points: List[PointStruct]) -> None:
         """
-        Save vectors to a Qdrant collection.
+        Save vectors to a collection.
         Creates the collection if it doesn't exist.
         """
-        if not self.client.collection_exists(collection_name=collection):
-            self.client.create_collection(
-                collection_name=collection,
-                vectors_config=VectorParams(
-                    size=384,           # Embedding dimension of MiniLM
-                    distance=Distance.COSINE   # Similarity metric for search
-                ),
-                timeout=120
-            )
-        self.client.upsert(collection, points)  # Insert points
+        self.ensure_collection(collection)
+        if points:
+            self.store.upsert(collection, points)  # Insert points
 
         print(f"Save in collect ->  {collection}")
 
-    def search(self, collection: str, query_vector: List[float]) -> List[dict]:
+    def upsert_points(self, collection: str, points: List[PointStruct], wait: bool = True) -> None:
+        """
+        Upsert a batch of points into an existing collection.
+        With wait=False the store may acknowledge before the points are indexed/persisted.
+        """
+        self.store.upsert(collection, points, wait=wait)
+
+    def ensure_collection(self, collection: str) -> None:
+        """
+        Create the collection if it doesn't exist yet.
+        With VECTOR_VERSIONING, a new logical collection starts as version 1
+        behind an alias of its name, so later rebuilds can be swapped in.
+        """
+        if self.store.collection_exists(collection):
+            return
+        if settings.VECTOR_VERSIONING and not VERSION_NAME.match(collection):
+            physical = version_name(collection, 1)
+            self.store.create_collection(physical, dim=self.dimension, quantization=settings.VECTOR_QUANTIZATION)
+            self.store.update_aliases({collection: physical})
+        else:
+            self.store.create_collection(collection, dim=self.dimension, quantization=settings.VECTOR_QUANTIZATION)
+        self.invalidate_collections()  # New collection -> refresh cached list
+
+    def ensure_payload_index(self, collection: str, field: str, schema: str) -> None:
+        """
+        Create a payload index ("keyword", "integer" or "float") so filters on `field` are fast.
+        """
+        self.store.create_payload_index(collection, field, schema)
+
+    def iter_points(self, collection: str, conditions: Dict, batch_size: int = 256) -> Iterator[Dict]:
+        """
+        Lazily page through the payloads of points matching the conditions,
+        without any vector search (stop iterating to stop scrolling).
+        """
+        offset = None
+        while True:
+            points, offset = self.store.scroll(collection, conditions=conditions, limit=batch_size, offset=offset)
+            yield from (p.payload for p in points)
+            if offset is None:
+                return
+
+    def scroll_points(self, collection: str, conditions: Dict, limit: int = 100) -> List[Dict]:
+        """
+        Page through the payloads of points matching the conditions, without any vector search.
+        Returns at most `limit` payloads.
+        """
+        return list(itertools.islice(self.iter_points(collection, conditions, min(limit, 256) or 1), limit))
+
+    def delete_points(self, collection: str, point_ids: List[str], wait: bool = True) -> None:
         """
-        Search the vector collection for top matching vectors to the query.
+        Delete points by ID from a collection.
+        Missing collections are ignored. With wait=False the delete is made
+        durable by the next store.flush().
+        """
+        if not point_ids or not self.store.collection_exists(collection):
+            return
+        self.store.delete(collection, point_ids, wait=wait)
+
+    def search(self, collection: str, query_vector: List[float], conditions: Optional[Dict] = None,
+               oversampling: Optional[float] = None, rescore: Optional[bool] = None,
+               limit: Optional[int] = None) -> List[dict]:
+        """
+        Search the vector collection for the top `limit` (default: search_limit) matching
+        vectors to the query, optionally restricted to points whose payload matches `conditions`.
+        On quantized collections, `oversampling` x limit candidates are rescored
+        with full-precision vectors (defaults: SEARCH_OVERSAMPLING / SEARCH_RESCORE).
         Returns a list of results with id, similarity score, text, and source.
         """
         try:
-            results = self.client.search(
-                collection_name=collection,
-                query_vector=query_vector,
-                limit=self.search_limit
-            )
-            return [{
-                "id": str(result.id),
-                "score": result.score,
-                "text": result.payload.get("text", "") if result.payload else "",
-                "source": result.payload.get("source", "") if result.payload else ""
-            } for result in results]
+            return self.format_results(self.store.search(
+                collection, query_vector, limit or self.search_limit, conditions, *self.search_options(oversampling, rescore)
+            ))
         except Exception as e:
             print(f"[search] Error: {e}")
             return []
 
+    async def asearch(self, collection: str, query_vector: List[float], conditions: Optional[Dict] = None,
+                      oversampling: Optional[float] = None, rescore: Optional[bool] = None,
+                      limit: Optional[int] = None) -> List[dict]:
+        """
+        Async variant of search (async Qdrant client, threadpool fallback,
+        or inline for the in-process store).
+        """
+        try:
+            return self.format_results(await self.store.asearch(
+                collection, query_vector, limit or self.search_limit, conditions, *self.search_options(oversampling, rescore)
+            ))
+        except Exception as e:
+            print(f"[asearch] Error: {e}")
+            return []
+
+    @staticmethod
+    def search_options(oversampling: Optional[float], rescore: Optional[bool]) -> Tuple[Optional[float], bool]:
+        """
+        Quantized-search options, falling back to the configured defaults.
+        """
+        if settings.VECTOR_QUANTIZATION == "none" and oversampling is None:
+            return None, True
+        return (oversampling if oversampling is not None else settings.SEARCH_OVERSAMPLING,
+                rescore if rescore is not None else settings.SEARCH_RESCORE)
+
+    @staticmethod
+    def format_results(results) -> List[dict]:
+        """
+        Convert scored points into plain result dicts.
+        """
+        return [{
+            "id": str(result.id),
+            "score": result.score,
+            "text": result.payload.get("text", "") if result.payload else "",
+            "source": result.payload.get("source", "") if result.payload else "",
+            "rows": result.payload.get("rows") if result.payload else None  # Typed rows of CSV chunks
+        } for result in results]
+
     def delete_all_collections(self) -> None:
         """
-        Delete all collections in the Qdrant database.
+        Delete all collections in the vector store.
         Use with caution as this removes all data.
         """
-        for c in self.client.get_collections().collections:
-            self.client.delete_collection(c.name)
+        for name in self.store.list_collections():
+            self.store.delete_collection(name)
+        self.invalidate_collections()
+
+    def get_collections(self) -> List[str]:
+        """
+        Get the names of all physical collections in the vector store (uncached).
+        """
+        return self.store.list_collections()
+
+    def get_aliases(self) -> Dict[str, str]:
+        """
+        Alias -> physical collection (uncached).
+        """
+        return self.store.list_aliases()
+
+    @staticmethod
+    def logical_names(collections: Iterable[str], aliases: Dict[str, str]) -> List[str]:
+        """
+        Names queries use: aliases plus unversioned collections.
+        Versions ('finance_v7') are only reached through their alias, so a fan-out
+        never searches a version being built or kept for rollback.
+        """
+        return sorted(set(aliases) | {c for c in collections if not VERSION_NAME.match(c)})
+
+    def get_collection_names(self) -> List[str]:
+        """
+        Get the logical collection names, served from a short-lived cache.
+        The cache is refreshed on re-index and whenever collections are created or deleted.
+        """
+        names = collection_cache.get("names")
+        if names is None:
+            names = self.logical_names(self.get_collections(), self.get_aliases())
+            collection_cache.set("names", names)
+        return names
+
+    async def aget_collection_names(self) -> List[str]:
+        """
+        Async variant of get_collection_names.
+        """
+        names = collection_cache.get("names")
+        if names is None:
+            collections, aliases = await asyncio.gather(self.store.alist_collections(), self.store.alist_aliases())
+            names = self.logical_names(collections, aliases)
+            collection_cache.set("names", names)
+        return names
 
-    def get_collections(self):
+    @staticmethod
+    def invalidate_collections() -> None:
         """
-        Get a list of all collections in the Qdrant database.
+        Drop the cached collection list so the next lookup hits the store.
         """
-        return self.client.get_collections().collections
+        collection_cache.clear()
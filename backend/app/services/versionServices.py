@@ -0,0 +1,356 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from qdrant_client.http.models import PointStruct
+from .vectorServices import EMBEDDING_FIELD, ROLE_FIELD, VERSION_NAME, VectorService, version_name
+from .manifestServices import IndexManifest
+from .answerCacheServices import answer_cache
+from .csvServices import field_schemas
+from .ingestServices import csv_key_columns
+from ..db.base import db_session
+from ..db.queries import Queries
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+# Held while collections are written or their aliases swapped (index jobs, watcher batches, rollbacks)
+versions_lock = threading.Lock()
+
+
+class VersionCheckFailed(RuntimeError):
+    """
+    Raised when a newly built version fails verification; its alias keeps serving the old version.
+    """
+
+
+class CollectionVersions:
+    def __init__(self, vector: VectorService, keep: int = settings.VECTOR_KEEP_VERSIONS):
+        """
+        Zero-downtime rebuilds of logical collections (e.g. "finance"):
+        - queries go through the alias "finance" -> "finance_v7"
+        - a rebuild writes into "finance_v8": points of unchanged chunks are copied
+          forward from the live version (no re-embedding), then the pipeline adds
+          and removes chunks there
+        - once the build is complete and verified, the alias is switched in one
+          atomic store call, so a search sees either the old or the new version
+        - published versions are recorded (collection_versions table): the `keep` most
+          recent previous ones stay available for rollback, a version that never went
+          live is only ever resumed into or dropped
+        """
+        self.vector = vector
+        self.store = vector.store
+        self.keep = keep
+        self.staged: Dict[str, str] = {}  # Collection -> version being built
+
+    def versions(self, collection: str, names: Optional[List[str]] = None) -> List[int]:
+        """
+        Existing version numbers of a collection, oldest first.
+        """
+        numbers = []
+        for name in names if names is not None else self.store.list_collections():
+            match = VERSION_NAME.match(name)
+            if match and match['collection'] == collection:
+                numbers.append(int(match['version']))
+        return sorted(numbers)
+
+    @staticmethod
+    def _number(name: Optional[str]) -> int:
+        # Version number of a physical collection (0 for none / unversioned)
+        match = VERSION_NAME.match(name) if name else None
+        return int(match['version']) if match else 0
+
+    def published(self, collection: str, names: Optional[List[str]] = None) -> List[int]:
+        """
+        Existing versions of a collection that went live, oldest first.
+        Without any record yet (published before versions were recorded),
+        the versions up to the live one are recorded as published.
+        """
+        existing = self.versions(collection, names)
+        with db_session() as db:
+            recorded = {row[0] for row in db.execute(Queries.fetch_collection_versions, (collection,))}
+        live = self._number(self.store.list_aliases().get(collection))
+        if not recorded and live:
+            recorded = {version_name(collection, v) for v in existing if v <= live}
+            self._record(collection, recorded)
+        return [v for v in existing if version_name(collection, v) in recorded]
+
+    def _record(self, collection: str, names: Iterable[str]) -> None:
+        published_at = datetime.now(timezone.utc).isoformat()
+        with db_session() as db:
+            db.executemany(Queries.insert_collection_version, [(name, collection, published_at) for name in names])
+            db.commit()
+
+    def _forget(self, names: Iterable[str]) -> None:
+        with db_session() as db:
+            db.executemany(Queries.delete_collection_version, [(name,) for name in names])
+            db.commit()
+
+    def live(self, collection: str) -> Optional[str]:
+        """
+        Physical collection currently serving `collection`, None if there is none yet.
+        """
+        target = self.store.list_aliases().get(collection)
+        if target is None and collection in self.store.list_collections():
+            return collection  # Unversioned collection created before versioning
+        return target
+
+    def stage(self, collections: Iterable[str], resume: Optional[Dict[Tuple[str, str], Set[str]]] = None) -> Dict[str, str]:
+        """
+        Create the next version of every collection and copy its live points forward.
+        - a version newer than the live one that this job already checkpointed into
+          (`resume`) is reused, after reconciling it with the current manifest and
+          live version (both may have changed meanwhile, e.g. through the watcher)
+        - versions that never went live and that no unfinished job can resume into
+          (interrupted builds) are dropped
+        Returns collection -> staged version.
+        """
+        manifest = IndexManifest(settings.INDEX_MANIFEST_PATH)
+        names = self.store.list_collections()
+        checkpointed = {name for name, _ in (resume or {})}
+        with db_session() as db:
+            resumable = {row[0] for row in db.execute(Queries.fetch_checkpointed_collections)}
+        for collection in sorted(set(collections)):
+            live = self.live(collection)
+            existing = self.versions(collection, names)
+            published = set(self.published(collection, names))
+            for version in existing:
+                name = version_name(collection, version)
+                if version not in published and name not in (live, *resumable):
+                    self.store.delete_collection(name)
+                    print(f"[versions] Dropped {name}: staged but never published")
+
+            reusable = [v for v in existing if v > self._number(live) and version_name(collection, v) in checkpointed]
+            if reusable:
+                staged = version_name(collection, max(reusable))
+                self.staged[collection] = staged
+                self._reconcile(collection, live, staged, manifest, {
+                    (source, chunk_hash) for (name, source), hashes in (resume or {}).items()
+                    if name == staged for chunk_hash in hashes
+                })
+                continue
+
+            staged = version_name(collection, max(existing, default=0) + 1)
+            self.store.create_collection(staged, dim=self.vector.dimension, quantization=settings.VECTOR_QUANTIZATION)
+            self.staged[collection] = staged
+            if self.vector.shared_layout:
+                self.vector.ensure_payload_index(staged, ROLE_FIELD, "keyword")
+            if live is not None:
+                copied = self._copy_forward(collection, live, staged, manifest)
+                print(f"[versions] {live} -> {staged}: {copied} points copied forward")
+        return dict(self.staged)
+
+    def _reconcile(self, collection: str, live: Optional[str], staged: str, manifest: IndexManifest,
+                   done: Set[Tuple[str, str]], batch_size: int = 256) -> None:
+        """
+        Bring a resumed version in line with the current manifest: drop its points that
+        neither the manifest nor the job's checkpoint (`done`: source, chunk hash) references,
+        then copy forward the referenced live points it lacks.
+        """
+        indexed = self._indexed(collection, manifest)
+        present: Set[Tuple[str, str]] = set()
+        stale: List[str] = []
+        offset = None
+        while True:
+            points, offset = self.store.scroll(staged, limit=batch_size, offset=offset)
+            for p in points:
+                key = (p.payload.get('source'), p.payload.get('chunk_hash'))
+                if key[1] in indexed.get(key[0], ()) or key in done:
+                    present.add(key)
+                else:
+                    stale.append(p.id)
+            if offset is None:
+                break
+        self.vector.delete_points(staged, stale, wait=False)  # After the scroll: deletes may move points
+        copied = self._copy_forward(collection, live, staged, manifest, skip=present) if live else 0
+        self.store.flush()
+        print(f"[versions] Resuming {staged}: {len(stale)} stale points dropped, {copied} copied forward")
+
+    @staticmethod
+    def _indexed(collection: str, manifest: IndexManifest) -> Dict[str, Set[str]]:
+        # Source -> chunk hashes the manifest records for a collection
+        return {source: set(entry['chunks']) for source, entry in manifest.entries.items()
+                if entry['collection'] == collection}
+
+    def _copy_forward(self, collection: str, live: str, staged: str, manifest: IndexManifest,
+                      batch_size: int = 256, skip: Set[Tuple[str, str]] = frozenset()) -> int:
+        """
+        Copy the live points the manifest still references into the staged version
+        (same IDs, vectors and payloads; orphaned points and `skip`ped (source, chunk hash) are left behind).
+        """
+        indexed = self._indexed(collection, manifest)
+        fields: Set[str] = set()
+        copied, offset = 0, None
+        while True:
+            points, offset = self.store.scroll(live, limit=batch_size, offset=offset, with_vectors=True)
+            batch = [PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points
+                     if p.payload.get('chunk_hash') in indexed.get(p.payload.get('source'), ())
+                     and (p.payload.get('source'), p.payload.get('chunk_hash')) not in skip]
+            for point in batch:
+                # Typed CSV key fields keep their payload indexes
+                for field, schema in field_schemas(point.payload, csv_key_columns()).items():
+                    if field not in fields:
+                        self.vector.ensure_payload_index(staged, field, schema)
+                        fields.add(field)
+            if batch:
+                self.vector.upsert_points(staged, batch, wait=False)
+                copied += len(batch)
+            if offset is None:
+                break
+        self.store.flush()
+        return copied
+
+    def verify(self, staged: str, expected: int, timeout: float = 10.0) -> None:
+        """
+        Check a built version before it goes live:
+        - its point count equals the chunks the manifest records for it
+          (polled briefly: un-awaited upserts may still be applying)
+        - a stored vector finds itself, so the version is searchable
+        """
+        deadline = time.monotonic() + timeout
+        count = self.store.count(staged)
+        while count < expected and time.monotonic() < deadline:
+            time.sleep(0.2)
+            count = self.store.count(staged)
+        if count != expected:
+            raise VersionCheckFailed(f"{staged} has {count} points, the manifest expects {expected}")
+        if expected:
+            points, _ = self.store.scroll(staged, limit=1, with_vectors=True)
+            hits = self.store.search(staged, points[0].vector, 1, None, *self.vector.search_options(None, True))
+            if not hits or hits[0].score < 0.99:
+                raise VersionCheckFailed(f"{staged}: a stored vector does not find itself")
+
+    def publish(self, manifest: IndexManifest, stats: Dict) -> None:
+        """
+        Pipeline commit hook: verify every staged version, switch the aliases and
+        delete versions beyond `keep`. Runs before the manifest is saved, so a
+        failed check leaves both the live versions and the manifest untouched.
+        """
+        if stats["files_failed"]:
+            raise VersionCheckFailed(f"{stats['files_failed']} files failed to index; new versions not published")
+        expected: Dict[str, int] = {}
+        for source in manifest.sources():
+            entry = manifest.get(source) or {}
+            expected[entry['collection']] = expected.get(entry['collection'], 0) + len(entry['chunks'])
+        for collection, staged in self.staged.items():
+            self.verify(staged, expected.get(collection, 0))
+
+        aliases = self.store.list_aliases()
+        for collection, staged in self.staged.items():
+            if collection not in aliases and self.store.collection_exists(collection):
+                # One-time switch of an unversioned collection: the alias needs its name,
+                # so it briefly resolves to nothing
+                self.store.delete_collection(collection)
+                self.store.update_aliases({collection: staged})
+        self.store.update_aliases(dict(self.staged))
+        self.vector.invalidate_collections()
+
+        published, self.staged = self.staged, {}
+        for collection, name in published.items():
+            self._record(collection, [name])
+        stats["versions"] = published
+        stats["versions_deleted"] = [name for collection in published for name in self.gc(collection)]
+        print(f"[versions] Published -> {published}")
+
+    def discard(self) -> None:
+        """
+        Drop the staged versions of a failed build.
+        """
+        for staged in self.staged.values():
+            self.store.delete_collection(staged)
+        self.staged = {}
+
+    def gc(self, collection: str) -> List[str]:
+        """
+        Delete the published versions of a collection beyond the `keep` most recent
+        ones that are not live.
+        """
+        live = self.store.list_aliases().get(collection)
+        previous = [version_name(collection, v) for v in reversed(self.published(collection))]
+        previous = [name for name in previous if name != live]
+        for name in previous[self.keep:]:
+            self.store.delete_collection(name)
+        self._forget(previous[self.keep:])
+        return previous[self.keep:]
+
+    def rollback(self, collection: str, version: Optional[int] = None) -> Dict:
+        """
+        Point the alias back at a published `version` (default: the newest one older than the live one).
+        The collection's manifest entries are rebuilt from that version, so the next
+        index run re-chunks its files and embeds only what the version lacks.
+        """
+        live = self.store.list_aliases().get(collection)
+        if live is None:
+            raise HTTPException(detail=f"{collection!r} is not a versioned collection",
+                                status_code=status.HTTP_404_NOT_FOUND)
+        versions = self.published(collection)
+        if version is None:
+            older = [v for v in versions if v < self._number(live)]
+            if not older:
+                raise HTTPException(detail=f"No published version of {collection!r} older than {live}",
+                                    status_code=status.HTTP_404_NOT_FOUND)
+            version = older[-1]
+        elif version not in versions:
+            raise HTTPException(detail=f"{version_name(collection, version)} does not exist or was never published",
+                                status_code=status.HTTP_404_NOT_FOUND)
+
+        target = version_name(collection, version)
+        self.store.update_aliases({collection: target})
+        self._sync_manifest(collection, target)
+        self.vector.invalidate_collections()
+        answer_cache.clear()  # Cached answers may be built on the newer version
+        print(f"[versions] Rolled back {collection}: {live} -> {target}")
+        return {"collection": collection, "live": target, "previous": live}
+
+    def _sync_manifest(self, collection: str, target: str) -> None:
+        manifest = IndexManifest(settings.INDEX_MANIFEST_PATH)
+        chunks: Dict[str, List[str]] = {}
+        embeddings: Dict[str, Set[Optional[str]]] = {}
+        for payload in self.vector.scroll_points(target, {}, limit=self.store.count(target)):
+            chunks.setdefault(payload['source'], []).append(payload['chunk_hash'])
+            embeddings.setdefault(payload['source'], set()).add(payload.get(EMBEDDING_FIELD))
+        for source in manifest.sources():
+            entry = manifest.get(source) or {}
+            if entry.get('collection') == collection and source not in chunks:
+                manifest.remove(source)
+        for source, hashes in chunks.items():
+            # Unknown file hash: re-checked on the next run; mixed fingerprints force a re-embed
+            found = embeddings[source]
+            manifest.update(source, collection, "", hashes, found.pop() if len(found) == 1 else None)
+        manifest.save()
+
+    def drop(self, collection: str) -> List[str]:
+        """
+        Delete a collection with all its versions (and so its alias).
+        """
+        names = self.store.list_collections()
+        dropped = [version_name(collection, v) for v in self.versions(collection, names)]
+        if collection in names:
+            dropped.append(collection)
+        for name in dropped:
+            self.store.delete_collection(name)
+        self._forget(dropped)
+        self.store.update_aliases({collection: None})
+        self.vector.invalidate_collections()
+        return dropped
+
+    def status(self) -> Dict:
+        """
+        Every versioned collection with its live version and the versions kept.
+        """
+        names = self.store.list_collections()
+        aliases = self.store.list_aliases()
+        result: Dict[str, Dict] = {}
+        for collection in sorted({m['collection'] for m in map(VERSION_NAME.match, names) if m} | set(aliases)):
+            live = aliases.get(collection)
+            published = set(self.published(collection, names))
+            result[collection] = {
+                "live": live,
+                "versions": [
+                    {"name": version_name(collection, v), "points": self.store.count(version_name(collection, v)),
+                     "live": version_name(collection, v) == live, "published": v in published}
+                    for v in self.versions(collection, names)
+                ]
+            }
+        return result
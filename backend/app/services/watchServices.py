@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+from .ragServices import DATA_DIR, RAGService
+from .versionServices import CollectionVersions, versions_lock
+from ..utils.executors import index_executor, run_in_executor
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+
+class IndexWatcher:
+    def __init__(self, model, store, path: str = DATA_DIR, debounce_ms: int = 1600,
+                 step_ms: int = 50, force_polling: bool = False):
+        """
+        Live re-indexing of the data folder with watchfiles:
+        - bursts of file events are debounced into one batch (`debounce_ms`)
+        - only the changed '<role>/<file>' paths are re-chunked and re-embedded,
+          unchanged content is skipped by hash, removed files lose their points
+        - batches run on the index executor, so they never overlap an index job
+        - with VECTOR_VERSIONING, a batch builds and publishes new versions of the
+          collections it touches like an index job does (copy forward, verify, alias
+          swap, recorded for rollback and garbage collection)
+        """
+        self.model = model
+        self.store = store
+        self.path = path
+        self.debounce_ms = debounce_ms
+        self.step_ms = step_ms
+        self.force_polling = force_polling
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.files_changed = 0
+        self.last_batch: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    def _sources(self, changes: Iterable) -> Set[str]:
+        """
+        Map watchfiles events to document sources ('backend/resources/data/<role>/<file>').
+        """
+        root = Path(self.path).resolve()
+        sources = set()
+        for _, changed in changes:
+            changed_path = Path(changed).resolve()
+            if changed_path.parent.parent == root:  # Only files directly inside a role folder
+                sources.add(os.path.join(self.path, changed_path.parent.name, changed_path.name))
+        return sources
+
+    def _reindex(self, sources: Set[str]) -> Dict:
+        rag = RAGService(self.model, self.store)
+        rag.retrie_files(sources)
+        if not settings.VECTOR_VERSIONING:
+            with versions_lock:  # No rollback swaps an alias mid-batch
+                return rag.save_document()
+
+        # Removed files count too: their points are deleted from the new version
+        collections = {rag.vector.collection_for(rag.source_role(source)) for source in sources}
+        versions = CollectionVersions(rag.vector)
+        pipeline = rag.make_pipeline(on_commit=versions.publish)
+        with versions_lock:
+            pipeline.targets = versions.stage(collections)
+            try:
+                return rag.save_document(pipeline=pipeline)
+            except Exception:
+                versions.discard()
+                raise
+
+    async def _run(self) -> None:
+        from watchfiles import awatch  # Only needed when the watcher is enabled
+
+        try:
+            async for changes in awatch(self.path, debounce=self.debounce_ms, step=self.step_ms,
+                                        stop_event=self._stop, force_polling=self.force_polling):
+                sources = self._sources(changes)
+                if sources:
+                    await self._handle(sources)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"[watcher] Stopped -> {e}")
+
+    async def _handle(self, sources: Set[str]) -> None:
+        started = time.perf_counter()
+        try:
+            stats = await run_in_executor(index_executor, self._reindex, sources)
+        except Exception as e:
+            self.last_error = f"{sorted(sources)}: {e}"
+            print(f"[watcher] Re-index error -> {self.last_error}")
+            return
+        self.batches += 1
+        self.files_changed += len(sources)
+        self.last_batch = {
+            "files": sorted(sources),
+            "indexed": stats["files_indexed"],
+            "removed": stats["files_removed"],
+            "chunks_embedded": stats["chunks_embedded"],
+            "chunks_deleted": stats["chunks_deleted"],
+            "versions": stats.get("versions"),
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        print(f"[watcher] Re-indexed -> {self.last_batch}")
+
+    async def start(self) -> None:
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()  # awatch returns at its next step
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=settings.INDEX_JOB_SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "running": self._task is not None and not self._task.done(),
+            "batches": self.batches,
+            "files_changed": self.files_changed,
+            "last_batch": self.last_batch,
+            "last_error": self.last_error
+        }
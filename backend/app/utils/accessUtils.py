@@ -3,12 +3,13 @@ import datetime
 import jwt
 from ..config.settings import Settings
 from fastapi import HTTPException, status
+from .executors import password_executor, ExecutorBusyError
 
 settings = Settings()  # type: ignore # Load app settings (e.g., SECRET_KEY)
 
 def hash_password(plain_password: str) -> str:
-    # Generate a salt and hash the plain password
-    salt = bcrypt.gensalt()
+    # Generate a salt (configured cost factor) and hash the plain password
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(plain_password.encode('utf-8'), salt)
     return hashed.decode('utf-8')  # Return hashed password as string for DB storage
 
@@ -16,6 +17,25 @@ def check_password(plain_password: str, hashed_password: str) -> bool:
     # Check if plain password matches the hashed password
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+async def run_password_job(func, *args):
+    # Run bcrypt work on the dedicated pool; shed load with 503 when it's saturated
+    try:
+        return await password_executor.run(func, *args)
+    except ExecutorBusyError:
+        raise HTTPException(
+            detail="Server busy, please retry shortly",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"}
+        )
+
+async def hash_password_async(plain_password: str) -> str:
+    # Non-blocking variant of hash_password for async routes
+    return await run_password_job(hash_password, plain_password)
+
+async def check_password_async(plain_password: str, hashed_password: str) -> bool:
+    # Non-blocking variant of check_password for async routes
+    return await run_password_job(check_password, plain_password, hashed_password)
+
 def generate_token(payload, expires_in=36000):
     # Add expiration time to payload
     payload['exp'] = datetime.datetime.now() + datetime.timedelta(seconds=expires_in)
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 max_weight: Optional[int] = None, weigher: Optional[Callable[[Any], int]] = None):
+        """
+        Thread-safe, size-bounded LRU cache with optional TTL eviction.
+        - maxsize: maximum number of entries kept (least recently used evicted first)
+        - ttl: seconds an entry stays valid (None = never expires)
+        - max_weight / weigher: optional bound on the summed weight of values
+          (e.g. bytes, with weigher=len)
+        Tracks hit/miss/eviction counters for monitoring.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher or (lambda value: 1)
+        self.weight = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for key, or default if missing/expired.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.monotonic():
+                # Entry is stale, drop it
+                self._pop(key)
+                self.evictions += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)  # Mark as recently used
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries when full.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (expires_at, value)
+            self.weight += self.weigher(value)
+            while len(self._data) > self.maxsize or (
+                    self.max_weight is not None and self.weight > self.max_weight and len(self._data) > 1):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _pop(self, key: Hashable) -> None:
+        # Remove an entry and its weight (caller holds the lock)
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.weight -= self.weigher(item[1])
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove a single entry if present.
+        """
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        """
+        Remove all entries (counters are kept).
+        """
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache size and hit/miss counters.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "weight": self.weight,
+                "max_weight": self.max_weight,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,124 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class EmbeddingBatcher:
+    def __init__(self, model, max_batch: int = 32, window_ms: float = 5.0):
+        """
+        Micro-batching executor for query embeddings.
+        - Collects concurrent embed() calls for up to `window_ms` or `max_batch` items
+        - Runs them through a single batched `model.encode` on a worker thread
+        - Resolves each caller's future with its own vector
+        """
+        self.model = model
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-batcher")
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+
+    async def start(self) -> None:
+        """
+        Start the background batching loop on the running event loop.
+        """
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the batching loop, fail pending requests and release the worker thread.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self._queue and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+        self._executor.shutdown(wait=False)
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Queue a text for the next batch and wait for its embedding vector.
+        """
+        if self._queue is None or self._full is None:
+            raise RuntimeError("Embedding batcher not started")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        if self._queue.qsize() >= self.max_batch:
+            self._full.set()  # Flush early, the batch is full
+        return await future
+
+    async def _run(self) -> None:
+        """
+        Batching loop: wait for a first request, give others `window` seconds
+        to join (or until the batch is full), then encode them together.
+        """
+        assert self._queue is not None and self._full is not None
+        while True:
+            batch = [await self._queue.get()]
+
+            if self._queue.qsize() + 1 < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.window)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            # Drain whatever arrived, up to the batch limit
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """
+        Encode a batch on the worker thread and hand out the vectors.
+        Identical texts in one batch are only encoded once.
+        """
+        pending = [(text, future) for text, future in batch if not future.cancelled()]
+        if not pending:
+            return
+
+        unique: Dict[str, int] = {}
+        for text, _ in pending:
+            unique.setdefault(text, len(unique))
+        texts = list(unique)
+
+        try:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(
+                self._executor,
+                lambda: self.model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+            )
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(pending)
+        for text, future in pending:
+            if not future.done():
+                future.set_result(vectors[unique[text]].tolist())
+
+    def stats(self) -> Dict:
+        """
+        Return batch counters (number of batches, items and mean batch size).
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue else 0
+        }
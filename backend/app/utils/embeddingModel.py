@@ -0,0 +1,138 @@
+import os
+import time
+from typing import Dict, List, Tuple
+
+BACKENDS = ("torch", "onnx")
+PRECISIONS = ("fp32", "fp16", "bf16", "int8")
+
+
+def load_embedding_model(name: str, precision: str = "fp32", device: str = "cpu"):
+    """
+    Load the sentence transformer, optionally in reduced precision for CPU inference:
+    - fp16 / bf16: cast the weights (bf16 is usually the faster one on CPU)
+    - int8: dynamic quantization of the Linear layers (weights int8, activations quantized per batch)
+    The same model embeds documents and queries, so both stay in one vector space;
+    the precision is part of the embedding fingerprint, so the next index run re-embeds.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown embedding precision {precision!r}, expected one of {PRECISIONS}")
+
+    # Imported here so the ONNX backend and ingest worker processes never import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(name, device=device)
+    if precision == "fp32":
+        return model
+
+    import torch  # Only needed for the reduced-precision paths
+    if precision == "int8":
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model.to(torch.float16 if precision == "fp16" else torch.bfloat16)
+
+
+def embedding_fingerprint(backend: str, name: str, precision: str = "fp32", onnx_path: str = "",
+                          onnx_file: str = "model.onnx", max_seq_length: int = 256) -> str:
+    """
+    Identity of the vectors a model configuration produces (same arguments as
+    load_embedding_backend). The index manifest records it per file, and files
+    indexed under another fingerprint are re-embedded.
+    """
+    if backend == "onnx":
+        return f"onnx|{os.path.join(onnx_path, onnx_file)}|{max_seq_length}"
+    return f"{backend}|{name}|{precision}"
+
+
+def load_embedding_backend(backend: str, name: str, precision: str = "fp32", onnx_path: str = "",
+                           onnx_file: str = "model.onnx", max_seq_length: int = 256, threads: int = 0):
+    """
+    Load the embedding model for a backend:
+    - "torch": sentence-transformers on PyTorch (see load_embedding_model)
+    - "onnx": ONNX Runtime over an exported model directory, no torch import
+      (`onnx_file` picks the fp32 or the int8-quantized export)
+    Both produce the same normalised MiniLM embeddings (up to quantization error);
+    the backend is part of the embedding fingerprint, so the next index run re-embeds.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "onnx":
+        from .onnxEmbedding import OnnxEmbeddingModel
+        return OnnxEmbeddingModel(onnx_path, model_file=onnx_file, max_seq_length=max_seq_length, threads=threads)
+    return load_embedding_model(name, precision=precision)
+
+
+def warm_up(model, batch_size: int = 8) -> None:
+    """
+    Run a single query and a dummy batch so the first real request doesn't pay
+    for lazy initialisation (kernel selection, memory arenas, tokenizer caches).
+    """
+    model.encode("warm-up query", show_progress_bar=False)
+    if batch_size > 1:
+        texts = [f"warm-up document {i} " * (8 * (i + 1)) for i in range(batch_size)]
+        model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+def start_embedding_model(backend: str, warmup_batch: int = 8, **kwargs) -> Tuple[object, Dict]:
+    """
+    Load + warm up the embedding model; returns (model, startup report) where the
+    report holds the backend, load/warm-up seconds and the `ready` flag.
+    """
+    started = time.perf_counter()
+    model = load_embedding_backend(backend, **kwargs)
+    loaded = time.perf_counter()
+    if warmup_batch:
+        warm_up(model, warmup_batch)
+    report = {
+        "backend": backend,
+        "model": str(getattr(model, "model_path", kwargs.get("name"))),
+        "dimension": int(model.get_sentence_embedding_dimension()),
+        "load_s": round(loaded - started, 3),
+        "warmup_s": round(time.perf_counter() - loaded, 3),
+        "ready": True
+    }
+    return model, report
+
+
+def lowercases_input(model) -> bool:
+    """
+    Whether the model's tokenizer lowercases its input (uncased models such as MiniLM),
+    so the case of a text can't change its embedding. False when unknown.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    flag = getattr(tokenizer, "do_lower_case", None)
+    if flag is None:
+        flag = (getattr(tokenizer, "init_kwargs", None) or {}).get("do_lower_case")
+    return bool(flag)
+
+
+def token_lengths(model, texts: List[str]) -> List[int]:
+    """
+    Token count of each text as the model will see it (special tokens included,
+    truncated to the model's max sequence length). Falls back to word counts.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    max_length = getattr(model, "max_seq_length", None) or 512
+    if tokenizer is None:
+        return [min(len(t.split()) + 2, max_length) for t in texts]
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_length)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def plan_batches(lengths: List[int], max_batch: int, token_budget: int) -> List[List[int]]:
+    """
+    Group text indices into batches of similar length to minimise padding:
+    - sort by token length (longest first)
+    - cut a batch when it reaches `max_batch` texts or when its padded size
+      (texts x longest length) would exceed `token_budget`
+    So short texts get large batches and long texts smaller ones.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for i in order:
+        longest = lengths[batch[0]] if batch else lengths[i]
+        if batch and (len(batch) >= max_batch or (len(batch) + 1) * longest > token_budget):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
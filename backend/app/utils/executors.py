@@ -0,0 +1,112 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+from ..config.settings import Settings
+
+settings = Settings()  # type: ignore
+
+
+class ExecutorBusyError(RuntimeError):
+    """
+    Raised when a BoundedExecutor already has its maximum number of pending jobs.
+    """
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int, max_pending: int, name: str):
+        """
+        Dedicated thread pool with a limit on queued + running jobs.
+        Submissions beyond `max_pending` fail fast with ExecutorBusyError
+        instead of letting latency pile up behind the queue.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking function on the pool, or raise ExecutorBusyError when saturated.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorBusyError("Executor queue is full")
+            self.pending += 1
+        try:
+            return await run_in_executor(self._executor, func, *args, **kwargs)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        """
+        Return pool size, queue depth and completion/rejection counters.
+        """
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+
+# Bounded pool for blocking SQLite calls made from async routes
+db_executor = ThreadPoolExecutor(max_workers=settings.DB_WORKERS, thread_name_prefix="db")
+
+# Bounded pool for CPU-heavy work so it can't flood the loop's threadpool
+cpu_executor = ThreadPoolExecutor(max_workers=settings.CPU_WORKERS, thread_name_prefix="cpu")
+
+# Process pool for CPU-bound rendering (WeasyPrint layout) that would otherwise hold the GIL;
+# "spawn" keeps workers independent of the parent's threads and loaded models
+process_executor = ProcessPoolExecutor(
+    max_workers=settings.PROCESS_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+)
+
+# Process pool for document reading/chunking during ingestion
+ingest_executor = ProcessPoolExecutor(
+    max_workers=settings.INGEST_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+)
+
+# Background index jobs run one at a time (they share the ingest pool and the embedding model)
+index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-job")
+
+# Dedicated pool for bcrypt hashing/verification; a login burst can't starve chat requests
+password_executor = BoundedExecutor(
+    max_workers=settings.PASSWORD_WORKERS,
+    max_pending=settings.PASSWORD_QUEUE_LIMIT,
+    name="password"
+)
+
+
+async def run_in_executor(executor: Executor, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking function on the given executor and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """
+    Release the worker threads (called on app shutdown).
+    """
+    db_executor.shutdown(wait=False)
+    cpu_executor.shutdown(wait=False)
+    password_executor.shutdown()
+    process_executor.shutdown(wait=False, cancel_futures=True)
+    ingest_executor.shutdown(wait=False, cancel_futures=True)
+    index_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,17 +1,34 @@
-from typing import Any, Dict, Optional
-from fastapi import Request, status, Depends
+from typing import Any, Dict, Optional, Set
+from fastapi import Request, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .accessUtils import decode_token
-from ..services.usersServices import UsersServices
-from ..db.base import get_db
+from ..services.usersServices import UsersServices, user_cache, cache_user
+from ..db.base import db_session
+from .executors import db_executor, run_in_executor
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+
+def admin_usernames() -> Set[str]:
+    # Comma-separated ADMIN_USERS setting as a set
+    return {name.strip() for name in settings.ADMIN_USERS.split(",") if name.strip()}
+
 
 class AccessTokenBearer(HTTPBearer):
     def __init__(self, auto_error=True):
         # Initialize the HTTPBearer with optional auto error handling
         super().__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request, db=Depends(get_db)) -> Any:
+    @staticmethod
+    def load_user(user_id: int) -> Dict:
+        # Cache miss: read the user with a pooled connection and cache it
+        with db_session() as conn:
+            user = UsersServices(conn).get_user_by_id(user_id)
+        return cache_user(user) if user else {}
+
+    async def __call__(self, request: Request) -> Any:
         try:
             # Extract credentials (token) from the Authorization header
             creds = await super().__call__(request)
@@ -24,22 +41,29 @@ class AccessTokenBearer(HTTPBearer):
             # Decode JWT token
             token_data = decode_token(creds.credentials)
 
-            # Verify token and fetch user
-            user_service = UsersServices(db)
-            user = user_service.get_user_by_id(token_data.get("id"))
+            # Verify token and fetch user (in-process cache first, DB only on a miss)
+            user_id = token_data.get("id")
+            user = user_cache.get(user_id)
+            if user is None:
+                user = await run_in_executor(db_executor, self.load_user, user_id)
+            else:
+                user = dict(user)
 
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="User not found or invalid token"
                 )
-            print(creds)
+
             # Attach extra info
             token = creds.credentials
             api_key = token_data.get("api_key")
         
             return {"user":user, "api_key": api_key, "token":token}
-        
+
+        except HTTPException:
+            # Keep 401/403 as they are
+            raise
         except Exception as e:
             # Catch any unexpected errors
             raise HTTPException(
@@ -55,3 +79,18 @@ class AccessTokenBearer(HTTPBearer):
             return None
         user = user_service.get_user_by_id(user_id)
         return user
+
+
+class AdminBearer(AccessTokenBearer):
+    async def __call__(self, request: Request) -> Any:
+        """
+        AccessTokenBearer that also requires the user to be listed in ADMIN_USERS (403 otherwise).
+        The role is chosen at registration, so it can't grant admin rights.
+        """
+        auth = await super().__call__(request)
+        if auth["user"]["username"] not in admin_usernames():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        return auth
@@ -1,10 +1,22 @@
-import os
-from fastapi.responses import Response
+import asyncio
+import hashlib
+from typing import Dict
+from fastapi.responses import StreamingResponse
 import markdown
 from weasyprint import HTML
-import tempfile
+from .cache import LRUCache
+from .executors import process_executor, run_in_executor
+from ..config.settings import Settings
 
-def markdown_pdf(markdown_txt: str) -> str:
+settings = Settings()  # type: ignore
+
+# Rendered PDFs keyed by content hash, bounded by count and total bytes
+pdf_cache = LRUCache(maxsize=settings.PDF_CACHE_SIZE, max_weight=settings.PDF_CACHE_BYTES, weigher=len)
+
+# Renders currently in progress, so concurrent requests for the same content share one
+_inflight: Dict[str, asyncio.Future] = {}
+
+def markdown_pdf(markdown_txt: str) -> bytes:
     # Convert markdown text to HTML, enabling table support
     html_content = markdown.markdown(markdown_txt, extensions=["tables"])
 
@@ -37,23 +49,51 @@ def markdown_pdf(markdown_txt: str) -> str:
     # Combine CSS, company header, and HTML content
     full_html = f"{css_styles}<h1>FinSolve Technologies</h1>{html_content}"
 
-    # Create a temporary PDF file and write the rendered HTML to it
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-        pdf_path = tmp_pdf.name
-        HTML(string=full_html).write_pdf(pdf_path)  # Render PDF
+    # Render straight to an in-memory buffer (no temporary file)
+    return HTML(string=full_html).write_pdf()
+
+
+async def render_pdf(markdown_txt: str, etag: str) -> bytes:
+    # Serve from cache, join an in-flight render, or render in the process pool
+    pdf_bytes = pdf_cache.get(etag)
+    if pdf_bytes is not None:
+        return pdf_bytes
 
-    return pdf_path  # Return path to the generated PDF file
+    if etag in _inflight:
+        return await _inflight[etag]
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[etag] = future
+    try:
+        pdf_bytes = await run_in_executor(process_executor, markdown_pdf, markdown_txt)
+        if len(pdf_bytes) <= settings.PDF_CACHE_BYTES:
+            pdf_cache.set(etag, pdf_bytes)
+        future.set_result(pdf_bytes)
+        return pdf_bytes
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark as retrieved when nobody else is waiting
+        raise
+    finally:
+        _inflight.pop(etag, None)
+
+
+def iter_chunks(data: bytes, size: int = 64 * 1024):
+    # Stream the PDF in fixed-size chunks
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
 
 
 # Helper async function to serve the generated PDF as an HTTP response
 async def download_pdf(markdown_txt: str):
-    pdf_path = markdown_pdf(markdown_txt)  # Convert markdown to PDF
-    with open(pdf_path, "rb") as f:
-        pdf_bytes = f.read()  # Read PDF bytes
-    os.remove(pdf_path)  # Clean up the temporary PDF file
+    # Content hash doubles as the cache key and the ETag (served from POST /chat/start, so no 304s)
+    etag = f'"{hashlib.sha256(markdown_txt.encode("utf-8")).hexdigest()}"'
+
+    pdf_bytes = await render_pdf(markdown_txt, etag)
 
     # Return the PDF as a streaming response with correct media type
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf"
+    return StreamingResponse(
+        iter_chunks(pdf_bytes),
+        media_type="application/pdf",
+        headers={"Content-Length": str(len(pdf_bytes)), "ETag": etag}
     )
@@ -0,0 +1,123 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import numpy as np
+
+
+class _TokenizerAdapter:
+    def __init__(self, tokenizer):
+        """
+        Callable like a Hugging Face tokenizer, as far as token_lengths() needs:
+        returns {"input_ids": [...]} without padding; `do_lower_case` like a
+        BERT tokenizer's, read from the tokenizer.json normalizer.
+        """
+        self.tokenizer = tokenizer
+        self.do_lower_case = self._lowercases(json.loads(tokenizer.to_str()).get("normalizer"))
+
+    @classmethod
+    def _lowercases(cls, normalizer: Optional[Dict]) -> bool:
+        # BertNormalizer(lowercase=True), Lowercase, or either inside a Sequence
+        if not normalizer:
+            return False
+        if normalizer.get("type") == "Sequence":
+            return any(cls._lowercases(n) for n in normalizer.get("normalizers", []))
+        return normalizer.get("type") == "Lowercase" or bool(normalizer.get("lowercase"))
+
+    def __call__(self, texts: List[str], add_special_tokens: bool = True, truncation: bool = True,
+                 max_length: Optional[int] = None) -> Dict[str, List[List[int]]]:
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=add_special_tokens)
+        # The shared tokenizer pads to the batch's longest text: keep only the real tokens
+        return {"input_ids": [e.ids[:sum(e.attention_mask)] for e in encodings]}
+
+
+class OnnxEmbeddingModel:
+    def __init__(self, path: str, model_file: str = "model.onnx", max_seq_length: int = 256,
+                 threads: int = 0, normalize: bool = True):
+        """
+        Sentence embeddings with ONNX Runtime + the `tokenizers` library (no torch import):
+        - `path` holds an exported transformer (`model_file`, also looked up under `onnx/`)
+          and its `tokenizer.json`, e.g. the ONNX export shipped with the model on the Hub
+        - mean pooling over the attention mask + L2 normalisation, like the
+          sentence-transformers pipeline of all-MiniLM-L6-v2 (skipped when the graph
+          already outputs `sentence_embedding`)
+        Exposes the subset of the SentenceTransformer API the app uses
+        (encode, tokenizer, max_seq_length, get_sentence_embedding_dimension).
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        directory = Path(path)
+        model_path = directory / model_file
+        if not model_path.exists():
+            model_path = directory / "onnx" / model_file  # Hugging Face repo layout
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX model {model_file!r} not found in {directory}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.model_path = model_path
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        self._pooled = "sentence_embedding" in outputs
+        self._output = "sentence_embedding" if self._pooled else outputs[0]
+
+        self.max_seq_length = max_seq_length
+        self.normalize = normalize
+        self._tokenizer = Tokenizer.from_file(str(directory / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_seq_length)
+        pad_token = "[PAD]" if self._tokenizer.token_to_id("[PAD]") is not None else "<pad>"
+        self._tokenizer.enable_padding(pad_id=self._tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+        self.tokenizer = _TokenizerAdapter(self._tokenizer)
+        self._dimension: Optional[int] = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            # Static hidden size from the graph, else from one real encode
+            shape = next(o.shape for o in self.session.get_outputs() if o.name == self._output)
+            last = shape[-1] if shape else None
+            self._dimension = last if isinstance(last, int) else int(self.encode("dimension").shape[-1])
+        return self._dimension
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64), "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feed["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        output = self.session.run([self._output], feed)[0]
+        if not self._pooled:
+            # Mean pooling over real tokens (padding masked out)
+            weights = mask[..., None].astype(np.float32)
+            output = (output * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        return output.astype(np.float32, copy=False)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = False,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # Longest first, like sentence-transformers, so each batch pads to a similar length
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        embedded = np.concatenate([
+            self._embed([texts[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(order), batch_size)
+        ])
+        vectors = np.empty_like(embedded)
+        vectors[order] = embedded
+        if self.normalize or normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+
+def quantize_onnx_model(source: str, target: str) -> None:
+    """
+    Dynamic int8 quantization of an exported model (weights int8, activations
+    quantized at run time): about 4x smaller and usually faster on CPU.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
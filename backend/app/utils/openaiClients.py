@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from ..config.settings import Settings
+
+settings = Settings()  # type: ignore
+
+
+class OpenAIClientPool:
+    def __init__(self, maxsize: int = 64, timeout: float = 60.0, max_retries: int = 2,
+                 base_url: Optional[str] = None, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0):
+        """
+        Process-wide registry of AsyncOpenAI clients keyed by API key.
+        - Reuses one client (and its keep-alive connection pool) per key
+        - Evicts the least recently used client when more than `maxsize` keys are active
+        - Applies the configured timeout, retries and optional base_url
+          (e.g. a local OpenAI-compatible stub)
+        """
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients: "OrderedDict[str, AsyncOpenAI]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _key(api_key: Optional[str]) -> str:
+        # Never keep raw API keys as registry keys
+        return hashlib.sha256((api_key or "").encode('utf-8')).hexdigest()
+
+    def get(self, api_key: Optional[str]) -> AsyncOpenAI:
+        """
+        Return the pooled client for an API key, creating it on first use.
+        """
+        key = self._key(api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=DefaultAsyncHttpxClient(limits=self.limits, timeout=self.timeout)
+            )
+            self._clients[key] = client
+            self.created += 1
+
+            while len(self._clients) > self.maxsize:
+                _, evicted = self._clients.popitem(last=False)
+                self.evicted += 1
+                self._close_later(evicted)
+            return client
+
+    def _close_later(self, client: AsyncOpenAI) -> None:
+        """
+        Close an evicted client once requests still using it have had time to finish.
+        """
+        grace = self.timeout * (self.max_retries + 1)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop (e.g. sync caller), the client is released with its last reference
+        loop.call_later(grace, lambda: asyncio.ensure_future(client.close()))
+
+    async def aclose(self) -> None:
+        """
+        Close every pooled client (called on app shutdown).
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await client.close()
+
+    def stats(self) -> Dict:
+        """
+        Return pool size and creation/eviction counters.
+        """
+        return {
+            "size": len(self._clients),
+            "maxsize": self.maxsize,
+            "created": self.created,
+            "evicted": self.evicted
+        }
+
+
+# Shared registry used by LLMServices
+openai_clients = OpenAIClientPool(
+    maxsize=settings.OPENAI_POOL_SIZE,
+    timeout=settings.OPENAI_TIMEOUT,
+    max_retries=settings.OPENAI_MAX_RETRIES,
+    base_url=settings.OPENAI_BASE_URL,
+    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.OPENAI_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+)
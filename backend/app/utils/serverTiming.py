@@ -0,0 +1,21 @@
+import time
+from typing import Dict
+
+
+class StageTimer:
+    def __init__(self):
+        """
+        Per-request stage timings, reported as a `Server-Timing` header
+        (shown by browser dev tools, collected by backend/benchmarks/load_bench.py).
+        Each mark() records the time since the previous mark.
+        """
+        self.timings: Dict[str, float] = {}  # Stage -> milliseconds
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def header(self) -> str:
+        return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in self.timings.items())
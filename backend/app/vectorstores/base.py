@@ -0,0 +1,112 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+
+
+@dataclass
+class StoredPoint:
+    """
+    A point returned by a vector store: search hit (with score) or scrolled record (optionally with vector).
+    """
+    id: str
+    payload: Dict = field(default_factory=dict)
+    score: float = 0.0
+    vector: Optional[List[float]] = None
+
+
+class VectorStore(ABC):
+    """
+    Minimal vector-store interface used by VectorService.
+    - Points are anything with `id`, `vector` and `payload` attributes (e.g. qdrant PointStruct)
+    - `conditions` are exact payload matches ANDed together; a list-valued payload
+      field matches when any element equals the value
+    - Similarity is cosine; higher scores are better
+    - Aliases are stable names pointing at a collection; every point/search
+      method also accepts an alias
+    """
+
+    @abstractmethod
+    def collection_exists(self, name: str) -> bool:
+        """
+        True for an existing collection or alias.
+        """
+
+    @abstractmethod
+    def create_collection(self, name: str, dim: int, quantization: str = "none") -> None:
+        """
+        Create a cosine collection; `quantization` is "none", "scalar" (int8) or "binary".
+        """
+
+    @abstractmethod
+    def delete_collection(self, name: str) -> None: ...
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        """
+        Names of the physical collections (aliases not included).
+        """
+
+    @abstractmethod
+    def list_aliases(self) -> Dict[str, str]:
+        """
+        Alias -> collection it points at.
+        """
+
+    @abstractmethod
+    def update_aliases(self, aliases: Dict[str, Optional[str]]) -> None:
+        """
+        Point every alias at its collection (None removes the alias) in one atomic
+        change: a search never sees some aliases switched and others not.
+        """
+
+    @abstractmethod
+    def upsert(self, name: str, points: Sequence[Any], wait: bool = True) -> None: ...
+
+    @abstractmethod
+    def delete(self, name: str, ids: Sequence[str], wait: bool = True) -> None: ...
+
+    @abstractmethod
+    def search(self, name: str, vector: List[float], limit: int, conditions: Optional[Dict] = None,
+               oversampling: Optional[float] = None, rescore: bool = True) -> List[StoredPoint]:
+        """
+        Top-`limit` points by cosine similarity. On quantized collections,
+        `limit * oversampling` candidates are scored on the quantized vectors and,
+        with `rescore`, re-ranked with the full-precision ones.
+        """
+
+    @abstractmethod
+    def scroll(self, name: str, conditions: Optional[Dict] = None, limit: int = 256, offset: Any = None,
+               with_vectors: bool = False) -> Tuple[List[StoredPoint], Any]:
+        """
+        Page through points; returns (points, next offset or None when done).
+        """
+
+    @abstractmethod
+    def count(self, name: str) -> int: ...
+
+    def create_payload_index(self, name: str, field_name: str, schema: str) -> None:
+        """
+        Index a payload field ("keyword", "integer" or "float"); optional for a backend.
+        """
+
+    def flush(self) -> None:
+        """
+        Make un-awaited (wait=False) writes durable; optional for a backend.
+        """
+
+    async def asearch(self, name: str, vector: List[float], limit: int, conditions: Optional[Dict] = None,
+                      oversampling: Optional[float] = None, rescore: bool = True) -> List[StoredPoint]:
+        return await run_in_threadpool(self.search, name, vector, limit, conditions, oversampling, rescore)
+
+    async def alist_collections(self) -> List[str]:
+        return await run_in_threadpool(self.list_collections)
+
+    async def alist_aliases(self) -> Dict[str, str]:
+        return await run_in_threadpool(self.list_aliases)
+
+    async def aclose(self) -> None:
+        self.flush()
+
+    def stats(self) -> Dict:
+        return {"backend": type(self).__name__}
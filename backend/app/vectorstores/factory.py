@@ -0,0 +1,29 @@
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from .base import VectorStore
+from .numpyStore import NumpyStore
+from .qdrantStore import QdrantStore
+from ..config.settings import Settings
+
+settings = Settings() # type: ignore
+
+
+def create_vector_store() -> VectorStore:
+    """
+    Build the vector store selected by VECTOR_STORE:
+    - "qdrant": the Qdrant server at QDRANT_URL (sync + async clients)
+    - "qdrant_local": Qdrant's embedded local mode at QDRANT_LOCAL_PATH (":memory:" or a
+      directory), e.g. for tests and benchmarks; searches run in the threadpool
+    - "numpy": the in-process NumPy store persisted under NUMPY_STORE_PATH (no server needed)
+    """
+    if settings.VECTOR_STORE == "numpy":
+        return NumpyStore(settings.NUMPY_STORE_PATH, dtype=settings.NUMPY_STORE_DTYPE)
+    if settings.VECTOR_STORE == "qdrant_local":
+        if settings.QDRANT_LOCAL_PATH == ":memory:":
+            return QdrantStore(QdrantClient(location=":memory:"))
+        return QdrantStore(QdrantClient(path=settings.QDRANT_LOCAL_PATH))
+    if settings.VECTOR_STORE != "qdrant":
+        raise ValueError(f"Unknown VECTOR_STORE {settings.VECTOR_STORE!r}, expected 'qdrant', 'qdrant_local' or 'numpy'")
+    return QdrantStore(
+        QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_KEY),
+        AsyncQdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_KEY)
+    )
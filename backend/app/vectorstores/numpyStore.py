@@ -0,0 +1,414 @@
+import json
+import math
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .base import StoredPoint, VectorStore
+from .quantization import make_quantizer
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    # Indices of the k best scores, best first (argpartition, then sort only those k)
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+
+class _Collection:
+    def __init__(self, dim: int, dtype: np.dtype, quantization: str = "none"):
+        """
+        One collection: a row-per-point matrix of unit vectors plus parallel ids/payloads.
+        The matrix may be a read-only memmap until the first write.
+        With quantization, compact codes are kept in RAM, row-aligned with the matrix:
+        writes encode their rows with the current quantizer, saves refit it on the whole collection,
+        and the full-precision matrix is only read to rescore candidates.
+        """
+        self.dim = dim
+        self.dtype = dtype
+        self.quantization = quantization
+        self.quantizer = None
+        self.codes: Optional[np.ndarray] = None
+        self.matrix: np.ndarray = np.empty((0, dim), dtype=dtype)
+        self.size = 0
+        self.ids: List[str] = []
+        self.payloads: List[Dict] = []
+        self.rows: Dict[str, int] = {}
+        self.field_index: Dict[str, Dict[Any, np.ndarray]] = {}  # field -> value -> rows (lazy)
+        self.dirty = False
+        self.generation = 0  # Bumped by every write; tells a finished save whether it is still current
+
+    def _writable(self, extra: int) -> None:
+        # Copy a memmap into RAM / grow capacity (doubling) before writing
+        needed = self.size + extra
+        if isinstance(self.matrix, np.memmap) or needed > len(self.matrix):
+            capacity = max(needed, 2 * len(self.matrix), 64)
+            grown = np.empty((capacity, self.dim), dtype=self.dtype)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+        if self.codes is not None and needed > len(self.codes):
+            grown = np.empty((max(needed, 2 * len(self.codes), 64), self.codes.shape[1]), dtype=self.codes.dtype)
+            grown[:self.size] = self.codes[:self.size]
+            self.codes = grown
+
+    def _encode(self, rows: List[int]) -> None:
+        # Keep the codes in step with the written rows (the writer pays for it, never a search)
+        if self.quantization == "none":
+            return
+        if self.quantizer is None:
+            # First write: fit on what there is, the next save refits on the whole collection
+            self.quantizer = make_quantizer(self.quantization)
+            self.quantizer.fit(self.matrix[:self.size])
+            self.codes = self.quantizer.encode(self.matrix[:self.size])
+        elif rows:
+            self.codes[rows] = self.quantizer.encode(self.matrix[rows])
+
+    def upsert(self, points: Sequence[Any]) -> None:
+        self._writable(len(points))
+        written = []
+        for p in points:
+            vector = np.asarray(p.vector, dtype=np.float32)
+            if vector.shape != (self.dim,):
+                raise ValueError(f"Vector dimension {vector.shape} does not match collection dimension {self.dim}")
+            norm = np.linalg.norm(vector)
+            point_id = str(p.id)
+            row = self.rows.get(point_id)
+            if row is None:
+                row = self.size
+                self.size += 1
+                self.ids.append(point_id)
+                self.payloads.append({})
+                self.rows[point_id] = row
+            self.matrix[row] = vector / norm if norm else vector
+            self.payloads[row] = dict(p.payload or {})
+            written.append(row)
+        self._encode(written)
+        self.field_index.clear()
+        self.dirty = True
+        self.generation += 1
+
+    def delete(self, ids: Sequence[str]) -> None:
+        rows = [self.rows[str(i)] for i in ids if str(i) in self.rows]
+        if not rows:
+            return
+        self._writable(0)
+        for row in sorted(rows, reverse=True):
+            # Swap-remove: move the last row into the freed slot
+            last = self.size - 1
+            removed = self.ids[row]
+            if row != last:
+                self.matrix[row] = self.matrix[last]
+                if self.codes is not None:
+                    self.codes[row] = self.codes[last]
+                self.ids[row] = self.ids[last]
+                self.payloads[row] = self.payloads[last]
+                self.rows[self.ids[row]] = row
+            self.ids.pop()
+            self.payloads.pop()
+            del self.rows[removed]
+            self.size -= 1
+        self.field_index.clear()
+        self.dirty = True
+        self.generation += 1
+
+    def _field_rows(self, field_name: str, value: Any) -> np.ndarray:
+        index = self.field_index.get(field_name)
+        if index is None:
+            # Inverted index field value -> rows, rebuilt lazily after writes
+            buckets: Dict[Any, List[int]] = {}
+            for row, payload in enumerate(self.payloads):
+                values = payload.get(field_name)
+                for v in values if isinstance(values, list) else [values]:
+                    if v is not None:
+                        buckets.setdefault(v, []).append(row)
+            index = {v: np.asarray(r, dtype=np.int64) for v, r in buckets.items()}
+            self.field_index[field_name] = index
+        return index.get(value, np.empty(0, dtype=np.int64))
+
+    def candidate_rows(self, conditions: Optional[Dict]) -> Optional[np.ndarray]:
+        """
+        Rows matching every condition, or None for "all rows".
+        """
+        if not conditions:
+            return None
+        rows: Optional[np.ndarray] = None
+        for key, value in conditions.items():
+            matched = self._field_rows(key, value)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows
+
+
+class NumpyStore(VectorStore):
+    def __init__(self, path: str, dtype: str = "float32"):
+        """
+        In-process vector store for small corpora (no network, no server):
+        - one unit-normalised float32/float16 matrix per collection, so cosine is a dot product
+        - exact top-k with a vectorised matmul + argpartition
+        - persisted as `<path>/<collection>/vectors.npy` (memory-mapped on load) + `points.json`,
+          aliases in `<path>/aliases.json`
+        Writes made with wait=False are persisted on flush(); wait=True persists immediately.
+        A save copies the collection under the lock and writes the files outside it,
+        so searches only wait for the copy, not for the disk.
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # One save at a time, taken before _lock
+        self.searches = 0
+        self._aliases: Dict[str, str] = self._load_aliases()
+
+    def _dir(self, name: str) -> Path:
+        return self.path / name
+
+    def _load_aliases(self) -> Dict[str, str]:
+        try:
+            with open(self.path / "aliases.json", encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_aliases(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / "aliases.json.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._aliases, f)
+        os.replace(tmp_path, self.path / "aliases.json")
+
+    def _resolve(self, name: str) -> str:
+        return self._aliases.get(name, name)
+
+    def _get(self, name: str) -> _Collection:
+        collection = self._collections.get(name) or self._load(name)
+        if collection is None:
+            raise KeyError(f"Collection {name!r} does not exist")
+        return collection
+
+    def _load(self, name: str) -> Optional[_Collection]:
+        directory = self._dir(name)
+        if not (directory / "points.json").exists():
+            return None
+        with open(directory / "points.json", encoding='utf-8') as f:
+            meta = json.load(f)
+        collection = _Collection(meta['dim'], np.dtype(meta.get('dtype', self.dtype.name)),
+                                 meta.get('quantization', "none"))
+        collection.ids = meta['ids']
+        collection.payloads = meta['payloads']
+        collection.size = len(collection.ids)
+        collection.rows = {point_id: row for row, point_id in enumerate(collection.ids)}
+        if collection.size:
+            collection.matrix = np.load(directory / "vectors.npy", mmap_mode='r')
+            if collection.quantization != "none":
+                codes = np.load(directory / "codes.npy") if (directory / "codes.npy").exists() else None
+                if 'quantizer' in meta and codes is not None and len(codes) == collection.size:
+                    collection.quantizer = make_quantizer(collection.quantization, meta['quantizer'])
+                    collection.codes = codes
+                else:
+                    collection._encode([])  # Saved without (matching) codes: fit once here
+        self._collections[name] = collection
+        return collection
+
+    def _write(self, name: str, collection: _Collection, matrix: np.ndarray, ids: List[str], payloads: List[Dict],
+               quantizer: Any, codes: Optional[np.ndarray]) -> None:
+        # Write to temp files, then rename, so a crash never leaves a half-written collection
+        directory = self._dir(name)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp_vectors = directory / "vectors.tmp.npy"
+        np.save(tmp_vectors, matrix)
+        os.replace(tmp_vectors, directory / "vectors.npy")
+        meta = {"dim": collection.dim, "dtype": collection.dtype.name, "quantization": collection.quantization}
+        if codes is not None:
+            tmp_codes = directory / "codes.tmp.npy"
+            np.save(tmp_codes, codes)
+            os.replace(tmp_codes, directory / "codes.npy")
+            meta["quantizer"] = quantizer.state()
+        tmp_meta = directory / "points.json.tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({**meta, "ids": ids, "payloads": payloads}, f)
+        os.replace(tmp_meta, directory / "points.json")
+
+    def _save(self, names: Sequence[str]) -> None:
+        """
+        Persist the dirty collections among `names`. Must not be called with _lock held.
+        """
+        with self._save_lock:
+            with self._lock:
+                # Copy the state to write; payload dicts are replaced on write, never mutated
+                snapshots = [
+                    (name, collection, collection.generation, np.array(collection.matrix[:collection.size]),
+                     list(collection.ids), list(collection.payloads))
+                    for name, collection in ((n, self._collections.get(n)) for n in names)
+                    if collection is not None and collection.dirty
+                ]
+                for _, collection, *_ in snapshots:
+                    collection.dirty = False
+
+            refitted = []
+            try:
+                for name, collection, generation, matrix, ids, payloads in snapshots:
+                    quantizer, codes = None, None
+                    if collection.quantization != "none" and len(matrix):
+                        # Refit on the whole snapshot (writes encoded with params fitted on earlier data)
+                        quantizer = make_quantizer(collection.quantization)
+                        quantizer.fit(matrix)
+                        codes = quantizer.encode(matrix)
+                        refitted.append((name, collection, generation, quantizer, codes))
+                    self._write(name, collection, matrix, ids, payloads, quantizer, codes)
+            except Exception:
+                with self._lock:
+                    for _, collection, *_ in snapshots:
+                        collection.dirty = True  # Retried by the next flush()
+                raise
+
+            with self._lock:
+                for name, collection, generation, quantizer, codes in refitted:
+                    if generation != collection.generation or self._collections.get(name) is not collection:
+                        continue  # Written to since: keep the incremental codes, the next save refits
+                    collection.quantizer, collection.codes = quantizer, codes
+                    # Quantized collections keep only the codes in RAM; originals are memory-mapped
+                    collection.matrix = np.load(self._dir(name) / "vectors.npy", mmap_mode='r')
+
+    def collection_exists(self, name: str) -> bool:
+        with self._lock:
+            name = self._resolve(name)
+            return name in self._collections or (self._dir(name) / "points.json").exists()
+
+    def create_collection(self, name: str, dim: int, quantization: str = "none") -> None:
+        with self._lock:
+            make_quantizer(quantization)  # Validate the mode
+            collection = _Collection(dim, self.dtype, quantization)
+            collection.dirty = True
+            self._collections[name] = collection
+        self._save([name])
+
+    def delete_collection(self, name: str) -> None:
+        with self._save_lock, self._lock:  # Not while a save may still write its files
+            self._collections.pop(name, None)
+            shutil.rmtree(self._dir(name), ignore_errors=True)
+            if name in self._aliases.values():
+                # Like Qdrant: aliases of a deleted collection go with it
+                self._aliases = {a: c for a, c in self._aliases.items() if c != name}
+                self._save_aliases()
+
+    def list_collections(self) -> List[str]:
+        with self._lock:
+            on_disk = {p.parent.name for p in self.path.glob("*/points.json")} if self.path.exists() else set()
+            return sorted(on_disk | set(self._collections))
+
+    def list_aliases(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._aliases)
+
+    def update_aliases(self, aliases: Dict[str, Optional[str]]) -> None:
+        with self._lock:
+            updated = dict(self._aliases)
+            for alias, collection in aliases.items():
+                if collection is None:
+                    updated.pop(alias, None)
+                    continue
+                if not self.collection_exists(collection) or collection in self._aliases:
+                    raise KeyError(f"Collection {collection!r} does not exist")
+                if alias in self._collections or (self._dir(alias) / "points.json").exists():
+                    raise ValueError(f"Alias {alias!r} clashes with a collection name")
+                updated[alias] = collection
+            self._aliases = updated  # Searches resolve through the new map from now on
+            self._save_aliases()
+
+    def upsert(self, name: str, points: Sequence[Any], wait: bool = True) -> None:
+        with self._lock:
+            name = self._resolve(name)
+            self._get(name).upsert(points)
+        if wait:
+            self._save([name])
+
+    def delete(self, name: str, ids: Sequence[str], wait: bool = True) -> None:
+        with self._lock:
+            name = self._resolve(name)
+            self._get(name).delete(ids)
+        if wait:
+            self._save([name])
+
+    def search(self, name: str, vector: List[float], limit: int, conditions: Optional[Dict] = None,
+               oversampling: Optional[float] = None, rescore: bool = True) -> List[StoredPoint]:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+        with self._lock:
+            self.searches += 1
+            collection = self._get(self._resolve(name))
+            rows = collection.candidate_rows(conditions)
+            count = collection.size if rows is None else len(rows)
+            if not count:
+                return []
+            k = min(limit, count)
+            quantizer = collection.quantizer
+
+            if quantizer is None:
+                matrix = collection.matrix[:collection.size] if rows is None else collection.matrix[rows]
+                scores = matrix.astype(np.float32, copy=False) @ query
+                top = _top(scores, k)
+                selected, top_scores = (top if rows is None else rows[top]), scores[top]
+            else:
+                # Approximate scores on the codes, keep k * oversampling candidates
+                codes = collection.codes[:collection.size] if rows is None else collection.codes[rows]
+                approx = quantizer.scores(query, codes)
+                candidates = _top(approx, min(count, max(k, math.ceil(k * (oversampling or 1.0)))))
+                selected = candidates if rows is None else rows[candidates]
+                if rescore:
+                    # Re-rank the candidates with the full-precision vectors (sorted rows read sequentially)
+                    selected = np.sort(selected)
+                    exact = collection.matrix[selected].astype(np.float32, copy=False) @ query
+                    order = _top(exact, k)
+                    selected, top_scores = selected[order], exact[order]
+                else:
+                    selected, top_scores = selected[:k], approx[candidates[:k]]
+
+            return [
+                StoredPoint(id=collection.ids[r], payload=collection.payloads[r], score=float(score))
+                for r, score in zip(selected.tolist(), top_scores.tolist())
+            ]
+
+    def scroll(self, name: str, conditions: Optional[Dict] = None, limit: int = 256, offset: Any = None,
+               with_vectors: bool = False) -> Tuple[List[StoredPoint], Any]:
+        with self._lock:
+            collection = self._get(self._resolve(name))
+            rows = collection.candidate_rows(conditions)
+            rows = np.arange(collection.size) if rows is None else np.sort(rows)
+            start = int(offset or 0)
+            page = rows[start:start + limit]
+            points = [StoredPoint(
+                id=collection.ids[r],
+                payload=collection.payloads[r],
+                vector=collection.matrix[r].astype(np.float32).tolist() if with_vectors else None
+            ) for r in page]
+            next_offset = start + limit if start + limit < len(rows) else None
+            return points, next_offset
+
+    def count(self, name: str) -> int:
+        with self._lock:
+            return self._get(self._resolve(name)).size
+
+    def flush(self) -> None:
+        with self._lock:
+            dirty = [name for name, collection in self._collections.items() if collection.dirty]
+        self._save(dirty)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "numpy",
+                "dtype": self.dtype.name,
+                "searches": self.searches,
+                "aliases": dict(self._aliases),
+                "collections": {
+                    name: {
+                        "points": c.size,
+                        "quantization": c.quantization,
+                        "memmap": isinstance(c.matrix, np.memmap),
+                        "ram_bytes": (0 if isinstance(c.matrix, np.memmap) else c.matrix.nbytes)
+                                     + (c.codes.nbytes if c.codes is not None else 0)
+                    }
+                    for name, c in self._collections.items()
+                }
+            }
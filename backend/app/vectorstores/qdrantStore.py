@@ -0,0 +1,174 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, VectorParams
+from qdrant_client.http.models import (
+    BinaryQuantization, BinaryQuantizationConfig, CreateAlias, CreateAliasOperation, DeleteAlias,
+    DeleteAliasOperation, FieldCondition, Filter, MatchValue, PayloadSchemaType, PointIdsList,
+    QuantizationSearchParams, Range, ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams
+)
+from .base import StoredPoint, VectorStore
+
+
+class QdrantStore(VectorStore):
+    def __init__(self, client: QdrantClient, async_client: Optional[AsyncQdrantClient] = None):
+        """
+        Qdrant-backed store: sync client for indexing, optional async client
+        for request-time search (falls back to the sync client in the threadpool).
+        """
+        self.client = client
+        self.async_client = async_client
+
+    @staticmethod
+    def build_filter(conditions: Optional[Dict]) -> Optional[Filter]:
+        """
+        Build an AND filter of exact matches (floats as a closed range, since
+        Qdrant only matches keywords, integers and booleans exactly).
+        """
+        if not conditions:
+            return None
+        must = []
+        for key, value in conditions.items():
+            if isinstance(value, float):
+                must.append(FieldCondition(key=key, range=Range(gte=value, lte=value)))
+            else:
+                must.append(FieldCondition(key=key, match=MatchValue(value=value)))
+        return Filter(must=must)
+
+    @staticmethod
+    def _point(result, with_vector: bool = False) -> StoredPoint:
+        return StoredPoint(
+            id=str(result.id),
+            payload=result.payload or {},
+            score=getattr(result, "score", 0.0),
+            vector=result.vector if with_vector else None
+        )
+
+    def collection_exists(self, name: str) -> bool:
+        return self.client.collection_exists(collection_name=name) or name in self.list_aliases()
+
+    @staticmethod
+    def quantization_config(quantization: str):
+        """
+        Qdrant quantization config: quantized vectors pinned in RAM, originals left on disk.
+        """
+        if quantization == "scalar":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+        if quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        if quantization != "none":
+            raise ValueError(f"Unknown quantization {quantization!r}")
+        return None
+
+    @staticmethod
+    def search_params(oversampling: Optional[float], rescore: bool) -> Optional[SearchParams]:
+        if oversampling is None and rescore:
+            return None  # Server defaults
+        return SearchParams(quantization=QuantizationSearchParams(rescore=rescore, oversampling=oversampling))
+
+    def create_collection(self, name: str, dim: int, quantization: str = "none") -> None:
+        config = self.quantization_config(quantization)
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(
+                size=dim,
+                distance=Distance.COSINE,   # Similarity metric for search
+                on_disk=config is not None  # Quantized: only the codes need to stay in RAM
+            ),
+            quantization_config=config,
+            timeout=120
+        )
+
+    def delete_collection(self, name: str) -> None:
+        self.client.delete_collection(name)
+
+    def list_collections(self) -> List[str]:
+        return [c.name for c in self.client.get_collections().collections]
+
+    def list_aliases(self) -> Dict[str, str]:
+        return {a.alias_name: a.collection_name for a in self.client.get_aliases().aliases}
+
+    def update_aliases(self, aliases: Dict[str, Optional[str]]) -> None:
+        # Qdrant applies all operations of one request atomically: delete + create switches an alias
+        current = self.list_aliases()
+        operations: List[Any] = []
+        for alias, collection in aliases.items():
+            if alias in current:
+                operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+            if collection is not None:
+                operations.append(CreateAliasOperation(
+                    create_alias=CreateAlias(collection_name=collection, alias_name=alias)
+                ))
+        if operations:
+            self.client.update_collection_aliases(change_aliases_operations=operations)
+
+    def upsert(self, name: str, points: Sequence[Any], wait: bool = True) -> None:
+        self.client.upsert(collection_name=name, points=list(points), wait=wait)
+
+    def delete(self, name: str, ids: Sequence[str], wait: bool = True) -> None:
+        self.client.delete(collection_name=name, points_selector=PointIdsList(points=list(ids)), wait=wait)
+
+    def search(self, name: str, vector: List[float], limit: int, conditions: Optional[Dict] = None,
+               oversampling: Optional[float] = None, rescore: bool = True) -> List[StoredPoint]:
+        results = self.client.search(
+            collection_name=name,
+            query_vector=vector,
+            query_filter=self.build_filter(conditions),
+            search_params=self.search_params(oversampling, rescore),
+            limit=limit,
+            with_payload=True
+        )
+        return [self._point(r) for r in results]
+
+    async def asearch(self, name: str, vector: List[float], limit: int, conditions: Optional[Dict] = None,
+                      oversampling: Optional[float] = None, rescore: bool = True) -> List[StoredPoint]:
+        if self.async_client is None:
+            return await super().asearch(name, vector, limit, conditions, oversampling, rescore)
+        results = await self.async_client.search(
+            collection_name=name,
+            query_vector=vector,
+            query_filter=self.build_filter(conditions),
+            search_params=self.search_params(oversampling, rescore),
+            limit=limit,
+            with_payload=True
+        )
+        return [self._point(r) for r in results]
+
+    async def alist_collections(self) -> List[str]:
+        if self.async_client is None:
+            return await super().alist_collections()
+        return [c.name for c in (await self.async_client.get_collections()).collections]
+
+    async def alist_aliases(self) -> Dict[str, str]:
+        if self.async_client is None:
+            return await super().alist_aliases()
+        return {a.alias_name: a.collection_name for a in (await self.async_client.get_aliases()).aliases}
+
+    def scroll(self, name: str, conditions: Optional[Dict] = None, limit: int = 256, offset: Any = None,
+               with_vectors: bool = False) -> Tuple[List[StoredPoint], Any]:
+        points, next_offset = self.client.scroll(
+            collection_name=name,
+            scroll_filter=self.build_filter(conditions),
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        return [self._point(p, with_vectors) for p in points], next_offset
+
+    def count(self, name: str) -> int:
+        return self.client.count(collection_name=name, exact=True).count
+
+    def create_payload_index(self, name: str, field_name: str, schema: str) -> None:
+        self.client.create_payload_index(
+            collection_name=name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType(schema)
+        )
+
+    async def aclose(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.close()
+        self.client.close()
+
+    def stats(self) -> Dict:
+        return {"backend": "qdrant"}
@@ -0,0 +1,79 @@
+from typing import Dict, Optional
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+# Number of set bits for every byte value (binary codes are compared with XOR + popcount)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class ScalarQuantizer:
+    def __init__(self, quantile: float = 0.99):
+        """
+        int8-style scalar quantization: every component is mapped to 0..255 over the
+        [lo, hi] range covering `quantile` of all values (outliers are clipped).
+        4x smaller than float32; dot products are recovered as lo*sum(q) + scale*(codes @ q).
+        fit() only learns the range; encode() can then be applied to any rows.
+        """
+        self.quantile = quantile
+        self.lo = 0.0
+        self.scale = 1.0
+
+    def fit(self, matrix: np.ndarray) -> None:
+        values = np.asarray(matrix, dtype=np.float32)
+        tail = (1 - self.quantile) / 2
+        self.lo, hi = (float(v) for v in np.quantile(values, [tail, 1 - tail])) if values.size else (0.0, 1.0)
+        self.scale = (hi - self.lo) / 255 or 1.0
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        values = np.asarray(matrix, dtype=np.float32)
+        return np.clip(np.rint((values - self.lo) / self.scale), 0, 255).astype(np.uint8)
+
+    def scores(self, query: np.ndarray, codes: np.ndarray, block: int = 4096) -> np.ndarray:
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block):  # Bounded temporary float32 copies
+            out[start:start + block] = codes[start:start + block].astype(np.float32) @ query
+        return self.lo * float(query.sum()) + self.scale * out
+
+    def state(self) -> Dict:
+        return {"lo": self.lo, "scale": self.scale}
+
+
+class BinaryQuantizer:
+    def __init__(self):
+        """
+        1-bit quantization: each component keeps only its sign (32x smaller than float32).
+        Similarity is estimated from the Hamming distance between query and vector codes;
+        it is coarse, so it is meant to be used with oversampling + rescoring.
+        """
+        self.dim = 0
+
+    def fit(self, matrix: np.ndarray) -> None:
+        self.dim = matrix.shape[1]
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        return np.packbits(np.asarray(matrix) > 0, axis=1)
+
+    def scores(self, query: np.ndarray, codes: np.ndarray, block: int = 4096) -> np.ndarray:
+        query_code = np.packbits(query > 0)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block):
+            distance = _POPCOUNT[np.bitwise_xor(codes[start:start + block], query_code)].sum(axis=1, dtype=np.int32)
+            out[start:start + block] = 1 - 2 * distance / self.dim  # Approximate cosine in [-1, 1]
+        return out
+
+    def state(self) -> Dict:
+        return {"dim": self.dim}
+
+
+def make_quantizer(mode: str, state: Optional[Dict] = None):
+    """
+    Quantizer for a mode ("none" -> None), restored from a saved state() if given.
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization {mode!r}, expected one of {QUANTIZATION_MODES}")
+    quantizer = ScalarQuantizer() if mode == "scalar" else BinaryQuantizer() if mode == "binary" else None
+    if quantizer is not None and state:
+        for key, value in state.items():
+            setattr(quantizer, key, value)
+    return quantizer
@@ -0,0 +1,117 @@
+"""
+Embedding backends: cold start (imports + model load + warm-up, measured in a
+fresh process), first-query latency, steady-state per-query latency and
+agreement with the first backend (mean cosine of the same texts).
+
+Backends are `torch[:precision]` or `onnx[:model file]`, e.g. the PyTorch model
+vs. the fp32 and int8 ONNX exports (see backend/scripts/export_onnx_model.py).
+
+Run from the repository root:
+    python -m backend.benchmarks.embedding_backend_bench --backends torch onnx:model.onnx onnx:model_int8.onnx
+"""
+import argparse
+import glob
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+
+
+def load_queries(pattern: str, count: int) -> List[str]:
+    # Short query-like texts: corpus lines with at least four words
+    lines = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            lines.extend(line.strip() for line in f if len(line.split()) >= 4)
+    return [lines[i % len(lines)] for i in range(count)]
+
+
+def child(spec: str, args: argparse.Namespace, output: str) -> None:
+    # Runs in a fresh interpreter so the import cost (torch vs. onnxruntime) is included
+    started = time.perf_counter()
+    from backend.app.utils.embeddingModel import load_embedding_backend, warm_up
+    backend, _, option = spec.partition(":")
+    model = load_embedding_backend(
+        backend,
+        name=args.model,
+        precision=(option or "fp32") if backend == "torch" else "fp32",
+        onnx_path=args.onnx_path,
+        onnx_file=(option or "model.onnx") if backend == "onnx" else "model.onnx"
+    )
+    loaded = time.perf_counter()
+    warm_up(model, args.warmup_batch)
+    ready = time.perf_counter()
+
+    queries = load_queries(args.data, args.queries)
+    first_start = time.perf_counter()
+    model.encode(queries[0], show_progress_bar=False)
+    first_ms = (time.perf_counter() - first_start) * 1000
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.encode(query, show_progress_bar=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    start = time.perf_counter()
+    vectors = model.encode(queries, batch_size=32, show_progress_bar=False)
+    batch_s = time.perf_counter() - start
+    np.save(output + ".npy", np.asarray(vectors, dtype=np.float32))
+
+    report = {
+        "startup_s": round(ready - started, 3),
+        "import_load_s": round(loaded - started, 3),
+        "warmup_s": round(ready - loaded, 3),
+        "first_query_ms": round(first_ms, 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "batch_queries_per_s": round(len(queries) / batch_s, 1)
+    }
+    with open(output + ".json", 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx:model.onnx", "onnx:model_int8.onnx"])
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-path", default="backend/app/database/onnx")
+    parser.add_argument("--data", default="backend/resources/data/*/*.md")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup-batch", type=int, default=8)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args, args.output)
+        return
+
+    reference = None
+    with tempfile.TemporaryDirectory() as workdir:
+        for i, spec in enumerate(args.backends):
+            output = str(Path(workdir) / str(i))
+            command = [sys.executable, "-m", "backend.benchmarks.embedding_backend_bench", "--child", spec,
+                       "--output", output, "--model", args.model, "--onnx-path", args.onnx_path,
+                       "--data", args.data, "--queries", str(args.queries), "--warmup-batch", str(args.warmup_batch)]
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode:
+                print(f"{spec:<24} failed: {result.stderr.strip().splitlines()[-1:]}")
+                continue
+            with open(output + ".json", encoding='utf-8') as f:
+                report: Dict = json.load(f)
+            vectors = np.load(output + ".npy")
+            if reference is None:
+                reference = vectors
+            report["cosine_vs_first"] = round(float(np.mean(np.sum(vectors * reference, axis=1))), 4)
+            print(f"{spec:<24}", report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Document-embedding throughput: one model.encode per document (old embed_chunks)
+vs. cross-document, length-bucketed batches (ingestion pipeline), optionally
+with a reduced-precision model.
+
+Run from the repository root:
+    python -m backend.benchmarks.embedding_batch_bench --repeat 4 --precision fp32
+"""
+import argparse
+import glob
+import time
+from typing import Dict, List
+from backend.app.services.vectorServices import split_text
+from backend.app.utils.embeddingModel import load_embedding_model, plan_batches, token_lengths
+
+
+def load_corpus(pattern: str, repeat: int) -> List[List[str]]:
+    # Chunk every file like the indexer does; repeat the corpus to get a meaningful size
+    documents = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            documents.append(split_text(f.read(), 300, 40))
+    return [chunks for _ in range(repeat) for chunks in documents]
+
+
+def per_document(model, documents: List[List[str]], batch_size: int) -> Dict:
+    lengths = [token_lengths(model, chunks) for chunks in documents]
+    # sentence-transformers pads each batch of `batch_size` to its longest text
+    padded = 0
+    for doc_lengths in lengths:
+        ordered = sorted(doc_lengths, reverse=True)
+        padded += sum(len(ordered[i:i + batch_size]) * ordered[i] for i in range(0, len(ordered), batch_size))
+    start = time.perf_counter()
+    for chunks in documents:
+        model.encode(chunks, batch_size=batch_size, show_progress_bar=False)
+    return summarize(time.perf_counter() - start, sum(map(len, documents)), sum(map(sum, lengths)), padded)
+
+
+def bucketed(model, documents: List[List[str]], max_batch: int, token_budget: int) -> Dict:
+    texts = [chunk for chunks in documents for chunk in chunks]
+    lengths = token_lengths(model, texts)
+    batches = plan_batches(lengths, max_batch, token_budget)
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches)
+    start = time.perf_counter()
+    for batch in batches:
+        model.encode([texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False)
+    return summarize(time.perf_counter() - start, len(texts), sum(lengths), padded)
+
+
+def summarize(seconds: float, chunks: int, tokens: int, padded: int) -> Dict:
+    return {
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "chunks_per_s": round(chunks / seconds, 1),
+        "padding_waste": round(1 - tokens / padded, 4) if padded else 0.0
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--precision", default="fp32", help="fp32 | fp16 | bf16 | int8")
+    parser.add_argument("--data", default="backend/resources/data/*/*")
+    parser.add_argument("--repeat", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--token-budget", type=int, default=2048)
+    args = parser.parse_args()
+
+    model = load_embedding_model(args.model, precision=args.precision)
+    documents = load_corpus(args.data, args.repeat)
+    model.encode(documents[0][:2], show_progress_bar=False)  # Warm-up
+
+    print(f"{len(documents)} documents, precision={args.precision}")
+    print("per-document :", per_document(model, documents, args.batch))
+    print("bucketed     :", bucketed(model, documents, args.batch, args.token_budget))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+End-to-end load test of the API with local stand-ins, so it needs no network:
+- the OpenAI-compatible stub (backend/benchmarks/openai_stub.py) with a configurable
+  time to first token and token rate
+- the embedded Qdrant (VECTOR_STORE=qdrant_local, in memory) or the in-process NumPy store
+- a throwaway SQLite database, index manifest and vector directory
+
+For every concurrency level it drives POST /api/v1/rag/ (waiting for the index job),
+/api/v1/auth/login, /api/v1/chat/start and /api/v1/chat/history, and reports per
+endpoint the throughput, status codes and p50/p95/p99 latency; per stage the chat
+pipeline timings from the Server-Timing header and the index job's stage throughput.
+
+Results are saved as JSON. With --baseline, a p95 latency or throughput more than
+--threshold worse than the baseline run is reported as a regression (exit code 1).
+
+Run from the repository root (the embedding model must be available offline, e.g. in the
+Hugging Face cache, or use EMBEDDING_BACKEND=onnx with an exported model):
+    python -m backend.benchmarks.load_bench --concurrency 1 8 32 --output bench.json
+    python -m backend.benchmarks.load_bench --concurrency 1 8 32 --baseline bench.json --output bench-new.json
+Against a running server (which then needs its own OpenAI stub and vector store):
+    python -m backend.benchmarks.load_bench --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+import numpy as np
+
+ROLES = ["engineering", "finance", "general", "hr", "marketing", "executives"]
+
+# Prompts with these words are PDF export requests in /chat/start, not RAG questions
+EXPORT_WORDS = re.compile(r"\b(download|get|save|export|fetch|send|give me|copy|retrieve|dl|grab)\b", re.IGNORECASE)
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "n": len(samples_ms),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(np.mean(samples_ms)), 2),
+        "max_ms": round(float(np.max(samples_ms)), 2)
+    }
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    # "history;dur=1.20, embed;dur=3.41" -> {"history": 1.2, "embed": 3.41}
+    timings: Dict[str, float] = {}
+    for metric in (header or "").split(","):
+        name, _, params = metric.strip().partition(";")
+        match = re.search(r"dur=([\d.]+)", params)
+        if name and match:
+            timings[name] = float(match.group(1))
+    return timings
+
+
+def load_prompts(pattern: str, count: int, seed: int) -> List[str]:
+    # Question-like corpus lines (markdown stripped), sampled reproducibly
+    lines = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                text = re.sub(r"[#*|>`_\-]+", " ", line).strip()
+                if len(text.split()) >= 4 and not EXPORT_WORDS.search(text):
+                    lines.append(" ".join(text.split()[:24]))
+    rng = random.Random(seed)
+    return [f"What does this say: {rng.choice(lines)}?" for _ in range(count)]
+
+
+class Recorder:
+    def __init__(self):
+        """
+        Latencies, status codes and stage timings of one endpoint at one concurrency level.
+        """
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.elapsed = 0.0
+
+    def add(self, seconds: float, status_code: int, stages: Optional[Dict[str, float]] = None) -> None:
+        self.latencies.append(seconds * 1000)
+        self.statuses[str(status_code)] += 1
+        for stage, ms in (stages or {}).items():
+            self.stages.setdefault(stage, []).append(ms)
+
+    def report(self) -> Dict:
+        ok = sum(n for code, n in self.statuses.items() if code.startswith("2"))
+        return dict(
+            percentiles(self.latencies),
+            requests_per_s=round(len(self.latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            ok=ok,
+            errors=len(self.latencies) - ok,
+            statuses=dict(self.statuses)
+        )
+
+
+async def drive(requests: int, concurrency: int, call: Callable[[int], Awaitable[None]], recorder: Recorder) -> None:
+    """
+    Run `requests` calls with `concurrency` workers pulling from a shared counter.
+    """
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for i in counter:
+            await call(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    recorder.elapsed = time.perf_counter() - started
+
+
+async def bench_rag(client: httpx.AsyncClient, args, concurrency: int, admin: Dict) -> Dict:
+    recorder = Recorder()
+    jobs = set()
+    headers = {"Authorization": f"Bearer {admin['token']}"}  # Indexing endpoints are admin-only
+
+    async def call(_: int) -> None:
+        start = time.perf_counter()
+        response = await client.post("/api/v1/rag/", headers=headers)
+        recorder.add(time.perf_counter() - start, response.status_code)
+        if response.status_code < 300:
+            jobs.add(response.json()["job"]["id"])
+
+    await drive(args.rag_requests, concurrency, call, recorder)
+
+    # Concurrent requests share one job; wait for it (up to --timeout) and keep its stage throughput
+    index_jobs = []
+    for job_id in sorted(jobs):
+        deadline = time.monotonic() + args.timeout
+        while True:
+            job = (await client.get(f"/api/v1/rag/jobs/{job_id}", headers=headers)).json()
+            if job["status"] not in ("queued", "running"):
+                break
+            if time.monotonic() >= deadline:
+                job["status"] = "timed_out"  # Progress so far is still reported
+                break
+            await asyncio.sleep(0.2)
+        progress = job.get("progress") or {}
+        index_jobs.append({
+            "status": job["status"],
+            "error": job.get("error"),
+            "seconds": progress.get("seconds"),
+            "files_indexed": progress.get("files_indexed"),
+            "files_skipped": progress.get("files_skipped"),
+            "chunks_embedded": progress.get("chunks_embedded"),
+            "stages": progress.get("stages")
+        })
+    return {"endpoint": recorder.report(), "jobs": index_jobs}
+
+
+async def bench_login(client: httpx.AsyncClient, args, concurrency: int, users: List[Dict]) -> Dict:
+    recorder = Recorder()
+
+    async def call(i: int) -> None:
+        user = users[i % len(users)]
+        start = time.perf_counter()
+        response = await client.post("/api/v1/auth/login", json={
+            "username": user["username"], "password": user["password"], "api_key": args.api_key
+        })
+        recorder.add(time.perf_counter() - start, response.status_code)
+
+    await drive(args.login_requests, concurrency, call, recorder)
+    return recorder.report()
+
+
+async def bench_chat(client: httpx.AsyncClient, args, concurrency: int, users: List[Dict], prompts: List[str]) -> Dict:
+    recorder = Recorder()
+
+    async def call(i: int) -> None:
+        user = users[i % len(users)]
+        headers = {"Authorization": f"Bearer {user['token']}"}
+        body = {"prompt": prompts[i % len(prompts)], "stream": args.stream}
+        start = time.perf_counter()
+        if not args.stream:
+            response = await client.post("/api/v1/chat/start", json=body, headers=headers)
+            recorder.add(time.perf_counter() - start, response.status_code,
+                         parse_server_timing(response.headers.get("server-timing")))
+            return
+        stages = {}
+        async with client.stream("POST", "/api/v1/chat/start", json=body, headers=headers) as response:
+            stages = parse_server_timing(response.headers.get("server-timing"))
+            async for line in response.aiter_lines():
+                if line.startswith("data:") and "first_token" not in stages:
+                    stages["first_token"] = (time.perf_counter() - start) * 1000  # Client-side TTFT
+        recorder.add(time.perf_counter() - start, response.status_code, stages)
+
+    await drive(args.requests, concurrency, call, recorder)
+    return {"endpoint": recorder.report(),
+            "stages": {stage: percentiles(samples) for stage, samples in recorder.stages.items()}}
+
+
+async def bench_history(client: httpx.AsyncClient, args, concurrency: int, users: List[Dict]) -> Dict:
+    recorder = Recorder()
+
+    async def call(i: int) -> None:
+        user = users[i % len(users)]
+        start = time.perf_counter()
+        response = await client.get("/api/v1/chat/history", headers={"Authorization": f"Bearer {user['token']}"})
+        recorder.add(time.perf_counter() - start, response.status_code)
+
+    await drive(args.requests, concurrency, call, recorder)
+    return recorder.report()
+
+
+async def setup_user(client: httpx.AsyncClient, args, role: str, username: Optional[str] = None) -> Dict:
+    # Register a fresh user (or reuse `username` if it already exists) and log it in once
+    user = {"username": username or f"bench_{role}_{uuid.uuid4().hex[:8]}", "password": "bench-password", "role": role}
+    response = await client.post("/api/v1/auth/register", json={k: user[k] for k in ("username", "password", "role")})
+    if username is None:
+        response.raise_for_status()
+    response = await client.post("/api/v1/auth/login", json={
+        "username": user["username"], "password": user["password"], "api_key": args.api_key
+    })
+    response.raise_for_status()
+    user["token"] = response.json()["token"]
+    return user
+
+
+async def setup_users(client: httpx.AsyncClient, args) -> List[Dict]:
+    # One user per role (executives fan out over every collection)
+    return [await setup_user(client, args, role) for role in args.roles]
+
+
+async def run_benchmark(args, base_url: str) -> Dict:
+    prompts = load_prompts(args.data, max(args.requests, 1), args.seed)
+    levels = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        users = await setup_users(client, args)
+        admin = await setup_user(client, args, "executives", args.admin_user)  # Indexing and /metrics are admin-only
+        for concurrency in args.concurrency:
+            print(f"-- concurrency {concurrency}")
+            rag = await bench_rag(client, args, concurrency, admin)
+            login = await bench_login(client, args, concurrency, users)
+            chat = await bench_chat(client, args, concurrency, users, prompts)
+            history = await bench_history(client, args, concurrency, users)
+            level = {
+                "concurrency": concurrency,
+                "endpoints": {
+                    "rag": rag["endpoint"],
+                    "login": login,
+                    "chat_start": chat["endpoint"],
+                    "chat_history": history
+                },
+                "stages": {
+                    "chat_start": chat["stages"],
+                    "index_job": rag["jobs"][0]["stages"] if rag["jobs"] else None
+                },
+                "index_jobs": rag["jobs"]
+            }
+            print_level(level)
+            levels.append(level)
+        metrics = (await client.get("/api/v1/metrics/", headers={"Authorization": f"Bearer {admin['token']}"})).json()
+    return {"levels": levels, "server_metrics": metrics}
+
+
+def print_level(level: Dict) -> None:
+    for name, report in level["endpoints"].items():
+        if report.get("n"):
+            print(f"  {name:<14} {report['requests_per_s']:>8} req/s  p50 {report['p50_ms']:>8} ms  "
+                  f"p95 {report['p95_ms']:>8} ms  p99 {report['p99_ms']:>8} ms  errors {report['errors']}")
+    for stage, report in (level["stages"]["chat_start"] or {}).items():
+        if report.get("n"):
+            print(f"    stage {stage:<10} p50 {report['p50_ms']:>8} ms  p95 {report['p95_ms']:>8} ms  p99 {report['p99_ms']:>8} ms")
+    for job in level["index_jobs"]:
+        print(f"  index job      {job['status']} in {job['seconds']} s, {job['files_indexed']} files indexed, "
+              f"{job['files_skipped']} skipped, {job['chunks_embedded']} chunks embedded")
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_delta_ms: float = 5.0) -> List[str]:
+    """
+    Regressions vs. a baseline run, matched by concurrency level: p95 latency
+    (endpoints and chat stages) up, or throughput down, by more than `threshold`.
+    p95 increases under `min_delta_ms` are noise on millisecond-scale stages and ignored.
+    """
+    regressions = []
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in current["levels"]:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        pairs = [(f"c={level['concurrency']} {name}", report, old["endpoints"].get(name, {}))
+                 for name, report in level["endpoints"].items()]
+        pairs += [(f"c={level['concurrency']} stage {name}", report, (old["stages"].get("chat_start") or {}).get(name, {}))
+                  for name, report in (level["stages"].get("chat_start") or {}).items()]
+        for label, new, before in pairs:
+            if new.get("p95_ms") and before.get("p95_ms") and new["p95_ms"] > before["p95_ms"] * (1 + threshold) \
+                    and new["p95_ms"] - before["p95_ms"] >= min_delta_ms:
+                regressions.append(f"{label}: p95 {before['p95_ms']} -> {new['p95_ms']} ms")
+            if new.get("requests_per_s") and before.get("requests_per_s") \
+                    and new["requests_per_s"] < before["requests_per_s"] * (1 - threshold):
+                regressions.append(f"{label}: throughput {before['requests_per_s']} -> {new['requests_per_s']} req/s")
+    return regressions
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float, log: Path) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode}, see {log}:\n{log.read_text()[-2000:]}")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} not ready after {timeout} s, see {log}")
+
+
+class LocalStack:
+    def __init__(self, args, workdir: str):
+        """
+        Start the OpenAI stub and the backend (uvicorn) as subprocesses on free ports,
+        with every piece of state in `workdir`; both are stopped on exit.
+        """
+        self.args = args
+        self.workdir = Path(workdir)
+        self.processes: List[subprocess.Popen] = []
+        self.url = ""
+
+    def _spawn(self, command: List[str], env: Dict, name: str) -> subprocess.Popen:
+        log = open(self.workdir / f"{name}.log", 'w', encoding='utf-8')
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        self.processes.append(process)
+        return process
+
+    def __enter__(self) -> "LocalStack":
+        args = self.args
+        stub_port, api_port = free_port(), free_port()
+        stub = self._spawn([sys.executable, "-m", "backend.benchmarks.openai_stub", "--port", str(stub_port),
+                            "--latency-ms", str(args.llm_latency_ms), "--tokens-per-s", str(args.llm_tokens_per_s),
+                            "--completion-tokens", str(args.llm_tokens)], dict(os.environ), "openai_stub")
+        wait_until_ready(f"http://127.0.0.1:{stub_port}/v1/models", stub, 30, self.workdir / "openai_stub.log")
+
+        env = dict(os.environ)
+        env.setdefault("SECRET_KEY", "bench-secret")
+        env.setdefault("QDRANT_URL", "http://127.0.0.1:6333")  # Required settings, unused by local stores
+        env.setdefault("QDRANT_KEY", "")
+        env.update({
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+            "VECTOR_STORE": args.vector_store,
+            "QDRANT_LOCAL_PATH": ":memory:",
+            "NUMPY_STORE_PATH": str(self.workdir / "vectors"),
+            "DB_PATH": str(self.workdir / "bench.db"),
+            "INDEX_MANIFEST_PATH": str(self.workdir / "index_manifest.json"),
+            "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower(),
+            "ADMIN_USERS": args.admin_user,
+            "INDEX_WATCH": "false",
+            "INDEX_JOB_RESUME": "false"
+        })
+        api = self._spawn([sys.executable, "-m", "uvicorn", "backend.run:app", "--port", str(api_port),
+                           "--log-level", "warning"], env, "backend")
+        wait_until_ready(f"http://127.0.0.1:{api_port}/api/v1/health/ready", api, args.startup_timeout,
+                         self.workdir / "backend.log")
+        self.url = f"http://127.0.0.1:{api_port}"
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of a local stack")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Chat start / history requests per level")
+    parser.add_argument("--login-requests", type=int, default=40, help="Logins per level (bcrypt-bound)")
+    parser.add_argument("--rag-requests", type=int, default=10, help="/rag/ requests per level (they share one job)")
+    parser.add_argument("--roles", nargs="+", default=ROLES, choices=ROLES)
+    parser.add_argument("--admin-user", default="bench_admin",
+                        help="A username in the server's ADMIN_USERS (registered if missing, password bench-password)")
+    parser.add_argument("--stream", action="store_true", help="Chat with Server-Sent Events (adds a first_token stage)")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache on")
+    parser.add_argument("--vector-store", default="qdrant_local", choices=["qdrant_local", "numpy"])
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=60.0)
+    parser.add_argument("--llm-tokens", type=int, default=120)
+    parser.add_argument("--data", default="backend/resources/data/*/*.md")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--api-key", default="sk-bench")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds per request, and per index job to finish")
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore smaller p95 increases")
+    args = parser.parse_args()
+
+    meta = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("api_key", "output", "baseline")}
+    }
+    if args.url:
+        results = asyncio.run(run_benchmark(args, args.url))
+    else:
+        with tempfile.TemporaryDirectory(prefix="load_bench_") as workdir, LocalStack(args, workdir) as stack:
+            results = asyncio.run(run_benchmark(args, stack.url))
+    results = {"meta": meta, **results}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) vs. {args.baseline} (threshold {args.threshold:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regression vs. {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
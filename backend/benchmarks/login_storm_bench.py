@@ -0,0 +1,95 @@
+"""
+Chat latency during a login storm.
+
+Measures p50/p95/p99 of an authenticated chat endpoint first on its own, then
+while a burst of concurrent logins hammers bcrypt. With the dedicated password
+pool, chat latency should stay flat and excess logins get 503 instead of queueing.
+
+Start the backend first (uvicorn backend.run:app), then from the repository root:
+    python -m backend.benchmarks.login_storm_bench --url http://127.0.0.1:8000 --logins 400
+Use --chat-path /api/v1/chat/start (with an OpenAI stub behind OPENAI_BASE_URL)
+to measure the full chat pipeline instead of the history endpoint.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List
+import httpx
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {
+        "n": len(ordered),
+        "p50_ms": round(pick(0.50), 1),
+        "p95_ms": round(pick(0.95), 1),
+        "p99_ms": round(pick(0.99), 1),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 1)
+    }
+
+
+async def chat_load(client: httpx.AsyncClient, args, token: str, duration: float) -> List[float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if args.chat_path.endswith("/start"):
+                await client.post(args.chat_path, json={"prompt": "What is our leave policy?"}, headers=headers)
+            else:
+                await client.get(args.chat_path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[worker() for _ in range(args.chat_concurrency)])
+    return latencies
+
+
+async def login_storm(client: httpx.AsyncClient, args, credentials: Dict) -> Counter:
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.login_concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            response = await client.post("/api/v1/auth/login", json=credentials)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*[login() for _ in range(args.logins)])
+    return statuses
+
+
+async def main(args) -> None:
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    credentials = {"username": username, "password": "bench-password", "api_key": args.api_key}
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        await client.post("/api/v1/auth/register", json={"username": username, "password": "bench-password", "role": "general"})
+        token = (await client.post("/api/v1/auth/login", json=credentials)).json()["token"]
+
+        baseline = await chat_load(client, args, token, args.duration)
+
+        storm_task = asyncio.create_task(login_storm(client, args, credentials))
+        during = await chat_load(client, args, token, args.duration)
+        statuses = await storm_task
+
+    print(f"chat endpoint: {args.chat_path}")
+    print(f"  baseline        {percentiles(baseline)}")
+    print(f"  during storm    {percentiles(during)}")
+    print(f"login statuses: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--chat-path", default="/api/v1/chat/history")
+    parser.add_argument("--chat-concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement phase")
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--login-concurrency", type=int, default=100)
+    parser.add_argument("--api-key", default="sk-bench")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""
+OpenAI-compatible chat completions stub for load tests and benchmarks (no network, no API key).
+
+Models an LLM with a time to first token (`--latency-ms`) and a generation rate
+(`--tokens-per-s`) for an answer of `--completion-tokens` tokens, streamed or not:
+    non-streaming: one response after latency + tokens / rate
+    streaming:     first chunk after latency, then one token per 1 / rate seconds
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1, e.g.:
+    python -m backend.benchmarks.openai_stub --port 8765 --latency-ms 300 --tokens-per-s 60
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+ANSWER = ("Based on the provided context, the figures for the requested period are summarised below "
+          "with the main drivers, the comparison with the previous quarter and the next steps planned by the team.")
+
+
+def make_app(latency_ms: float = 300.0, tokens_per_s: float = 60.0, completion_tokens: int = 120) -> FastAPI:
+    app = FastAPI()
+    words = ANSWER.split(" ")
+    # One word per token, cycling through the canned answer
+    tokens: List[str] = [("" if i == 0 else " ") + words[i % len(words)] for i in range(completion_tokens)]
+    stats = {"requests": 0, "streams": 0, "completion_tokens": 0}
+
+    def chunk(completion_id: str, delta: Dict, finish_reason=None) -> str:
+        body = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": "gpt-4o", "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(body)}\n\n"
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stats")
+    async def handle_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def completions(req: Request):
+        body = await req.json()
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        stats["requests"] += 1
+        stats["completion_tokens"] += len(tokens)
+
+        if body.get("stream"):
+            stats["streams"] += 1
+
+            async def stream():
+                await asyncio.sleep(latency_ms / 1000)
+                yield chunk(completion_id, {"role": "assistant", "content": ""})
+                for token in tokens:
+                    yield chunk(completion_id, {"content": token})
+                    await asyncio.sleep(1 / tokens_per_s)
+                yield chunk(completion_id, {}, "stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(latency_ms / 1000 + len(tokens) / tokens_per_s)
+        return {
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": "gpt-4o",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                      "total_tokens": prompt_tokens + len(tokens)}
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=60.0, help="Generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=120, help="Tokens per answer")
+    args = parser.parse_args()
+    uvicorn.run(make_app(args.latency_ms, args.tokens_per_s, args.completion_tokens),
+                host=args.host, port=args.port, log_level="warning")
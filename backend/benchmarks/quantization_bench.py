@@ -0,0 +1,147 @@
+"""
+Vector quantization on our corpus: recall@k against exact float32 search,
+query latency and vector memory for no quantization, int8 scalar and binary
+quantization, with and without oversampling + full-precision rescoring.
+
+Queries are the opening words of sampled chunks, so every query has a
+realistic neighbourhood in the corpus. Duplicate chunks are dropped, since
+identical vectors would make the exact top-k (the ground truth) ambiguous;
+point --data at more documents for a bigger corpus. Memory is the store's RAM
+footprint (codes + in-RAM vectors) for the NumPy store, or the server's
+resident-memory growth for Qdrant.
+
+Run from the repository root (NumPy store in a temp dir by default, or a Qdrant server with --url):
+    python -m backend.benchmarks.quantization_bench --queries 200 --k 8
+    python -m backend.benchmarks.quantization_bench --url http://localhost:6333 --api-key ...
+"""
+import argparse
+import glob
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+from backend.app.services.vectorServices import split_text
+from backend.app.utils.embeddingModel import load_embedding_model
+from backend.app.vectorstores.base import VectorStore
+from backend.app.vectorstores.numpyStore import NumpyStore
+from backend.app.vectorstores.qdrantStore import QdrantStore
+
+COLLECTION = "quantbench"
+CONFIGS: List[Tuple[str, Optional[float], bool]] = [
+    ("none", None, True),
+    ("scalar", 1.0, False),
+    ("scalar", 2.0, True),
+    ("binary", 1.0, False),
+    ("binary", 2.0, True),
+    ("binary", 4.0, True),
+]
+
+
+def load_corpus(pattern: str) -> List[str]:
+    # Chunk every file like the indexer does; drop duplicate chunks so every query has one exact top-k
+    chunks: Dict[str, None] = {}
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            chunks.update(dict.fromkeys(split_text(f.read(), 300, 40)))
+    return list(chunks)
+
+
+def make_queries(chunks: List[str], count: int, words: int, rng: np.random.Generator) -> List[str]:
+    picked = rng.choice(len(chunks), size=min(count, len(chunks)), replace=False)
+    return [" ".join(chunks[i].split()[:words]) for i in picked]
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    # Ground truth: brute-force cosine on float32 (vectors are unit-normalised by the model)
+    scores = queries @ vectors.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def memory_bytes(store: VectorStore, url: Optional[str], api_key: Optional[str]) -> int:
+    if not url:
+        return store.stats()["collections"][COLLECTION]["ram_bytes"]
+    headers = {"api-key": api_key} if api_key else {}
+    for line in httpx.get(f"{url.rstrip('/')}/metrics", headers=headers).text.splitlines():
+        if line.startswith("memory_resident_bytes"):
+            return int(float(line.split()[-1]))
+    return 0
+
+
+def build(store: VectorStore, vectors: np.ndarray, quantization: str, batch: int = 256) -> None:
+    if store.collection_exists(COLLECTION):
+        store.delete_collection(COLLECTION)
+    store.create_collection(COLLECTION, dim=vectors.shape[1], quantization=quantization)
+    for start in range(0, len(vectors), batch):
+        store.upsert(COLLECTION, [
+            PointStruct(id=str(uuid.UUID(int=start + i)), vector=v.tolist(), payload={"row": start + i})
+            for i, v in enumerate(vectors[start:start + batch])
+        ], wait=False)
+    store.flush()
+
+
+def run(store: VectorStore, queries: np.ndarray, truth: List[set], k: int,
+        oversampling: Optional[float], rescore: bool) -> Dict:
+    store.search(COLLECTION, queries[0].tolist(), k, oversampling=oversampling, rescore=rescore)  # Warm-up
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = store.search(COLLECTION, query.tolist(), k, oversampling=oversampling, rescore=rescore)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({h.payload["row"] for h in hits} & expected) / len(expected))
+    latencies.sort()
+    return {
+        f"recall@{k}": round(statistics.fmean(recalls), 4),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Qdrant URL (default: NumPy store in a temp dir)")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--data", default="backend/resources/data/*/*")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=12)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    model = load_embedding_model(args.model)
+    chunks = load_corpus(args.data)
+    print(f"Embedding {len(chunks)} chunks...")
+    vectors = np.asarray(model.encode(chunks, batch_size=64, normalize_embeddings=True, show_progress_bar=False),
+                         dtype=np.float32)
+    queries = np.asarray(model.encode(make_queries(chunks, args.queries, args.query_words, rng),
+                                      normalize_embeddings=True, show_progress_bar=False), dtype=np.float32)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    workdir = tempfile.TemporaryDirectory()
+    store: VectorStore = (QdrantStore(QdrantClient(url=args.url, api_key=args.api_key)) if args.url
+                          else NumpyStore(workdir.name))
+    print(f"{len(vectors)} x {vectors.shape[1]} vectors ({vectors.nbytes / 2 ** 20:.1f} MiB float32), "
+          f"{len(queries)} queries, backend={type(store).__name__}")
+
+    built = None
+    for quantization, oversampling, rescore in CONFIGS:
+        if quantization != built:
+            before = memory_bytes(store, args.url, args.api_key) if args.url else 0
+            build(store, vectors, quantization)
+            built = quantization
+        stats = run(store, queries, truth, args.k, oversampling, rescore)
+        memory = memory_bytes(store, args.url, args.api_key) - before
+        print(f"{quantization:<7} oversampling={oversampling} rescore={rescore!s:<5}",
+              {**stats, "memory_mb": round(memory / 2 ** 20, 2)})
+
+    store.delete_collection(COLLECTION)
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
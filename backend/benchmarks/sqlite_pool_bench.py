@@ -0,0 +1,92 @@
+"""
+Concurrent chat-history insert/read throughput: per-request connections in the
+default rollback-journal mode (old get_db) vs. the pooled WAL connections.
+
+Run from the repository root:
+    python -m backend.benchmarks.sqlite_pool_bench --threads 16 --ops 2000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from backend.app.db.pool import ConnectionPool
+from backend.app.db.queries import Queries
+
+
+def setup_db(path: str) -> None:
+    # Same schema + index as create_tables, left in the default journal mode
+    with sqlite3.connect(path) as conn:
+        conn.execute(Queries.create_user_table)
+        conn.execute(Queries.create_conversation_table)
+        for migration in Queries.migrations:
+            conn.execute(migration)
+        conn.commit()
+
+
+def make_per_request(path: str):
+    @contextmanager
+    def session():
+        # Mirrors the original get_db: a fresh connection per request
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return session
+
+
+def run(session, threads: int, ops: int, users: int = 50) -> dict:
+    payload = "x" * 500
+
+    def insert(i: int) -> None:
+        with session() as conn:
+            conn.execute(Queries.insert_chat, (i % users, "prompt", payload, datetime.now().isoformat()))
+            conn.commit()
+
+    def read(i: int) -> None:
+        with session() as conn:
+            conn.execute(Queries.fetch_recent_chats, (i % users, 3)).fetchall()
+
+    def mixed(i: int) -> None:
+        # Roughly one write per four reads, like a chat turn plus history/auth lookups
+        insert(i) if i % 5 == 0 else read(i)
+
+    results = {}
+    for name, fn in (("insert", insert), ("read", read), ("mixed", mixed)):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(fn, range(ops)))
+        elapsed = time.perf_counter() - start
+        results[name] = round(ops / elapsed, 1)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        after_path = os.path.join(tmp, "after.db")
+        setup_db(before_path)
+        setup_db(after_path)
+
+        before = run(make_per_request(before_path), args.threads, args.ops)
+
+        pool = ConnectionPool(after_path, size=args.threads)
+        after = run(pool.connection, args.threads, args.ops)
+        pool.close()
+
+    print(f"{'ops/sec':<10}{'per-request':>14}{'pooled WAL':>14}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<10}{before[name]:>14}{after[name]:>14}{after[name] / before[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Per-role collections vs. one shared collection with an indexed role payload field:
+query latency for a normal role and for executives (fan-out + merge vs. one
+unfiltered search), and the storage footprint of each layout.
+
+The in-process Qdrant brute-forces every search and ignores payload indexes
+(filters are evaluated in Python), so only a server run (--url) reflects the
+HNSW and payload-index behaviour this compares.
+
+Run from the repository root (in-process Qdrant by default, or a server with --url):
+    python -m backend.benchmarks.vector_layout_bench --points 5000 --queries 300
+    python -m backend.benchmarks.vector_layout_bench --url http://localhost:6333 --api-key ...
+"""
+import argparse
+import asyncio
+import heapq
+import statistics
+import time
+import tracemalloc
+import uuid
+from typing import Dict, List, Optional
+import httpx
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PayloadSchemaType, PointStruct, VectorParams
+from backend.app.services.vectorServices import ROLE_FIELD, VectorService
+from backend.app.vectorstores.qdrantStore import QdrantStore
+
+ROLES = ["engineering", "finance", "general", "hr", "marketing"]
+DIM = 384
+PREFIX = "layoutbench_"
+
+
+def random_vectors(count: int, rng: np.random.Generator) -> np.ndarray:
+    vectors = rng.standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def create(client: AsyncQdrantClient, name: str) -> None:
+    if await client.collection_exists(name):
+        await client.delete_collection(name)
+    await client.create_collection(name, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE))
+
+
+async def upload(client: AsyncQdrantClient, name: str, vectors: np.ndarray, role: str, batch: int = 256) -> None:
+    for start in range(0, len(vectors), batch):
+        await client.upsert(name, [
+            PointStruct(id=str(uuid.uuid4()), vector=v.tolist(), payload={"text": "x" * 200, ROLE_FIELD: role})
+            for v in vectors[start:start + batch]
+        ])
+
+
+def memory_bytes(url: Optional[str], api_key: Optional[str]) -> int:
+    # Server: Qdrant's resident memory from /metrics; in-process: Python heap via tracemalloc
+    if not url:
+        return tracemalloc.get_traced_memory()[0]
+    headers = {"api-key": api_key} if api_key else {}
+    for line in httpx.get(f"{url.rstrip('/')}/metrics", headers=headers).text.splitlines():
+        if line.startswith("memory_resident_bytes"):
+            return int(float(line.split()[-1]))
+    return 0
+
+
+async def build_per_role(client: AsyncQdrantClient, corpus: Dict[str, np.ndarray]) -> None:
+    for role, vectors in corpus.items():
+        await create(client, f"{PREFIX}{role}")
+        await upload(client, f"{PREFIX}{role}", vectors, role)
+
+
+async def build_shared(client: AsyncQdrantClient, corpus: Dict[str, np.ndarray]) -> None:
+    shared = f"{PREFIX}shared"
+    await create(client, shared)
+    await client.create_payload_index(shared, ROLE_FIELD, field_schema=PayloadSchemaType.KEYWORD)
+    for role, vectors in corpus.items():
+        await upload(client, shared, vectors, role)
+
+
+async def measured_build(client: AsyncQdrantClient, build, corpus: Dict[str, np.ndarray],
+                         url: Optional[str], api_key: Optional[str]) -> int:
+    before = memory_bytes(url, api_key)
+    await build(client, corpus)
+    await asyncio.sleep(2 if url else 0)  # Let the server's optimizer settle
+    return memory_bytes(url, api_key) - before
+
+
+async def timed(queries: np.ndarray, search) -> Dict:
+    latencies: List[float] = []
+    for q in queries:
+        start = time.perf_counter()
+        await search(q.tolist())
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "mean_ms": round(statistics.fmean(latencies), 2)
+    }
+
+
+async def footprint(client: AsyncQdrantClient, names: List[str], memory: int) -> Dict:
+    info = [await client.get_collection(n) for n in names]
+    return {
+        "collections": len(names),
+        "memory_mb": round(memory / 2 ** 20, 1),
+        "points": sum(i.points_count or 0 for i in info),
+        "segments": sum(i.segments_count or 0 for i in info),
+        "indexed_vectors": sum(i.indexed_vectors_count or 0 for i in info)
+    }
+
+
+async def main(url: Optional[str], api_key: Optional[str], points: int, queries: int, limit: int) -> None:
+    client = AsyncQdrantClient(url=url, api_key=api_key) if url else AsyncQdrantClient(location=":memory:")
+    rng = np.random.default_rng(0)
+    vector = VectorService(model=None, store=QdrantStore(client=None, async_client=client))
+    vector.search_limit = limit
+    if not url:
+        print("In-process Qdrant: no HNSW / payload indexes, filtered-search numbers are not representative")
+    print(f"Building {len(ROLES)} x {points} points in both layouts...")
+    corpus = {role: random_vectors(points, rng) for role in ROLES}
+    if not url:
+        tracemalloc.start()
+    per_role_memory = await measured_build(client, build_per_role, corpus, url, api_key)
+    shared_memory = await measured_build(client, build_shared, corpus, url, api_key)
+    tracemalloc.stop()
+    query_vectors = random_vectors(queries, rng)
+    shared = f"{PREFIX}shared"
+
+    async def per_role_one(q):
+        return await vector.asearch(f"{PREFIX}hr", q)
+
+    async def per_role_exec(q):
+        results = await asyncio.gather(*[vector.asearch(f"{PREFIX}{r}", q) for r in ROLES])
+        return heapq.nlargest(limit, (h for res in results for h in res), key=lambda a: a['score'])
+
+    async def shared_one(q):
+        return await vector.asearch(shared, q, {ROLE_FIELD: "hr"})
+
+    async def shared_exec(q):
+        return await vector.asearch(shared, q)
+
+    results = {
+        "per_role": {
+            "role_query": await timed(query_vectors, per_role_one),
+            "executive_query": await timed(query_vectors, per_role_exec),
+            "storage": await footprint(client, [f"{PREFIX}{r}" for r in ROLES], per_role_memory)
+        },
+        "shared": {
+            "role_query": await timed(query_vectors, shared_one),
+            "executive_query": await timed(query_vectors, shared_exec),
+            "storage": await footprint(client, [shared], shared_memory)
+        }
+    }
+    for layout, stats in results.items():
+        print(layout, stats)
+
+    for name in [shared] + [f"{PREFIX}{r}" for r in ROLES]:
+        await client.delete_collection(name)
+    await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Qdrant URL (default: in-process Qdrant)")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--points", type=int, default=5000, help="Points per role")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.api_key, args.points, args.queries, args.limit))
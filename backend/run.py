@@ -1,13 +1,22 @@
+import time
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from .app.routes.authRoute import auth_router
 from .app.routes.chatRoute import chat_router
 from .app.routes.ragRoute import rag_router
+from .app.routes.metricsRoute import metrics_router
+from .app.routes.healthRoute import health_router
+from .app.services.jobServices import index_jobs
+from .app.services.watchServices import IndexWatcher
 from .app.middlewares.errorHandler import register_global_exception_handlers
-from sentence_transformers import SentenceTransformer
 from .app.db.db_init import create_tables
+from .app.db.base import db_pool
 from .app.config.settings import Settings
-from qdrant_client import QdrantClient
+from .app.utils.embeddingBatcher import EmbeddingBatcher
+from .app.utils.embeddingModel import start_embedding_model
+from .app.utils.executors import shutdown_executors
+from .app.utils.openaiClients import openai_clients
+from .app.vectorstores.factory import create_vector_store
 
 settings = Settings() # type: ignore
 
@@ -15,21 +24,63 @@ settings = Settings() # type: ignore
 async def lifespan(app: FastAPI):
     try:
         # Startup logic
+        started = time.perf_counter()
+        app.state.embedding_status = {"ready": False}
         create_tables()
 
-        # Load sentence transformer
-        model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2", device="cpu")
+        # Load the embedding model (PyTorch or ONNX Runtime) and warm it up before serving
+        model, status = start_embedding_model(
+            settings.EMBEDDING_BACKEND,
+            warmup_batch=settings.EMBEDDING_WARMUP_BATCH,
+            name=settings.EMBEDDING_MODEL,
+            precision=settings.EMBEDDING_PRECISION,
+            onnx_path=settings.EMBEDDING_ONNX_PATH,
+            onnx_file=settings.EMBEDDING_ONNX_FILE,
+            max_seq_length=settings.EMBEDDING_MAX_SEQ_LENGTH,
+            threads=settings.EMBEDDING_THREADS
+        )
 
-        # Qdrant client connection
-        qdrant_client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_KEY)
+        # Micro-batching executor for concurrent query embeddings
+        batcher = EmbeddingBatcher(model, max_batch=settings.EMBED_BATCH_MAX, window_ms=settings.EMBED_BATCH_WINDOW_MS)
+        await batcher.start()
+
+        # Vector store selected by VECTOR_STORE (Qdrant server or in-process NumPy)
+        vector_store = create_vector_store()
 
         # Attach to app.state for reuse across routes
         app.state.chunk_model = model
-        app.state.qdrant_client = qdrant_client
+        app.state.vector_store = vector_store
+        app.state.embedding_batcher = batcher
+
+        # Resume index jobs a previous process left unfinished
+        resumed = index_jobs.resume(model, vector_store)
+        if resumed:
+            print(f"Resuming {resumed} index job(s)")
+
+        # Optional live re-indexing of changed data files
+        watcher = None
+        if settings.INDEX_WATCH:
+            watcher = IndexWatcher(model, vector_store, debounce_ms=settings.INDEX_WATCH_DEBOUNCE_MS,
+                                   force_polling=settings.INDEX_WATCH_POLLING)
+            await watcher.start()
+        app.state.index_watcher = watcher
+
+        # Ready for traffic: report how long startup took
+        app.state.embedding_status = {**status, "startup_s": round(time.perf_counter() - started, 3)}
+        print(f"Startup done -> {app.state.embedding_status}")
 
         yield  # Hand over control to the app
 
         # Shutdown logic
+        app.state.embedding_status = {**app.state.embedding_status, "ready": False}  # Stop taking traffic
+        if watcher is not None:
+            await watcher.stop()
+        index_jobs.shutdown(timeout=settings.INDEX_JOB_SHUTDOWN_TIMEOUT)  # Checkpoint the running job
+        await batcher.stop()
+        await vector_store.aclose()
+        await openai_clients.aclose()
+        shutdown_executors()
+        db_pool.close()
         print("App is shutting down")
     except Exception as e:
         print(f"Init error: -> {e}")
@@ -44,3 +95,5 @@ register_global_exception_handlers(app)
 app.include_router(router=chat_router, prefix='/api/v1/chat', tags=['chat'])
 app.include_router(router=auth_router, prefix='/api/v1/auth', tags=['auth'])
 app.include_router(router=rag_router, prefix='/api/v1/rag', tags=['rag'])
+app.include_router(router=metrics_router, prefix='/api/v1/metrics', tags=['metrics'])
+app.include_router(router=health_router, prefix='/api/v1/health', tags=['health'])
@@ -0,0 +1,36 @@
+"""
+Prepare a local ONNX copy of the embedding model for EMBEDDING_BACKEND=onnx:
+downloads the ONNX export published with the model on the Hugging Face Hub plus
+its tokenizer into EMBEDDING_ONNX_PATH, and optionally writes an int8
+dynamically-quantized copy (EMBEDDING_ONNX_FILE=model_int8.onnx).
+
+Run from the repository root:
+    python -m backend.scripts.export_onnx_model --int8
+"""
+import argparse
+import shutil
+from pathlib import Path
+from huggingface_hub import hf_hub_download
+from backend.app.utils.onnxEmbedding import quantize_onnx_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--out", default="backend/app/database/onnx")
+    parser.add_argument("--int8", action="store_true", help="Also write model_int8.onnx")
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for filename, target in (("onnx/model.onnx", "model.onnx"), ("tokenizer.json", "tokenizer.json")):
+        shutil.copyfile(hf_hub_download(args.model, filename), out / target)
+        print(f"{args.model}/{filename} -> {out / target}")
+
+    if args.int8:
+        quantize_onnx_model(str(out / "model.onnx"), str(out / "model_int8.onnx"))
+        print(f"int8 model -> {out / 'model_int8.onnx'}")
+
+
+if __name__ == "__main__":
+    main()
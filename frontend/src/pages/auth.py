@@ -47,7 +47,7 @@ def login_page():
                 st.session_state.token = user_model.token
                 st.session_state.user = user_model.user
 
-                # Retrieve and load previous conversation history after login
+                # Load the latest page of conversation history after login
                 retrieve_history()
 
                 # Refresh the app to switch to chat UI or main app page
@@ -124,6 +124,7 @@ def logout():
     # Clear session data such as auth token and messages
     st.session_state.token = None 
     st.session_state.messages = []
+    st.session_state.history_cursor = None
 
     # Refresh app to redirect to login page
     st.rerun()
\ No newline at end of file
@@ -1,8 +1,29 @@
 import streamlit as st
 import requests
+import json
 from .auth import logout
+from ..utils.history import retrieve_history
 from ..schemas.schemas import User
 
+
+# Parse Server-Sent Events from the backend and yield the answer tokens
+def stream_tokens(response):
+    event = "message"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            # Blank line ends an event
+            event = "message"
+            continue
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[len("data:"):].strip())
+            if event == "error":
+                raise Exception(data.get("msg", "Streaming failed"))
+            if "token" in data:
+                yield data["token"]
+
+
 # Main chat UI function
 def chat_ui():
     st.title("FinSolve Technologies Chatbot")
@@ -18,6 +39,12 @@ def chat_ui():
         if st.button("🔒 Logout"):
             logout()
 
+    # Older history is fetched one page at a time, on demand
+    if st.session_state.get("history_cursor") is not None:
+        if st.button("⬆️ Load older messages"):
+            retrieve_history(before=st.session_state.history_cursor)
+            st.rerun()
+
     # Display existing chat history
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -32,42 +59,47 @@ def chat_ui():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Make POST request to backend API
-        try:
-            response = requests.post(
-                "http://127.0.0.1:8000/api/v1/chat/start",
-                json={"prompt": prompt},
-                headers={
-                    "Authorization": f"Bearer {st.session_state.token}"
-                }
-            )
-            response.raise_for_status()
-
-            # Check the response content type
-            content_type = response.headers.get("content-type", "")
-
-            # If it's a PDF, show download button
-            if "application/pdf" in content_type:
-                st.success("📄 PDF is ready to download!")
-                st.download_button(
-                    label="📥 Click to download PDF",
-                    data=response.content,
-                    file_name=f"{user.username}_{user.role.value}_summary.pdf",
-                    mime="application/pdf"
+        # Display assistant response as it arrives
+        with st.chat_message("assistant"):
+            # Make POST request to backend API (streaming mode)
+            try:
+                response = requests.post(
+                    "http://127.0.0.1:8000/api/v1/chat/start",
+                    json={"prompt": prompt, "stream": True},
+                    headers={
+                        "Authorization": f"Bearer {st.session_state.token}"
+                    },
+                    stream=True
                 )
-                assistant_text = "✅ I've generated a PDF summary for you!"
-            else:
-                # If it's text response, parse and display
-                assistant_reply = response.json()
-                assistant_text = assistant_reply.get('response', 'No response received.')
+                response.raise_for_status()
 
-        except Exception as e:
-            # Handle any errors during request
-            assistant_text = f"❌ Error: {str(e)}"
+                # Check the response content type
+                content_type = response.headers.get("content-type", "")
 
-        # Display assistant response
-        with st.chat_message("assistant"):
-            st.markdown(assistant_text)
+                # If it's a PDF, show download button
+                if "application/pdf" in content_type:
+                    st.success("📄 PDF is ready to download!")
+                    st.download_button(
+                        label="📥 Click to download PDF",
+                        data=response.content,
+                        file_name=f"{user.username}_{user.role.value}_summary.pdf",
+                        mime="application/pdf"
+                    )
+                    assistant_text = "✅ I've generated a PDF summary for you!"
+                    st.markdown(assistant_text)
+                elif "text/event-stream" in content_type:
+                    # Render tokens as they are streamed
+                    assistant_text = st.write_stream(stream_tokens(response))
+                else:
+                    # If it's text response, parse and display
+                    assistant_reply = response.json()
+                    assistant_text = assistant_reply.get('response', 'No response received.')
+                    st.markdown(assistant_text)
+
+            except Exception as e:
+                # Handle any errors during request
+                assistant_text = f"❌ Error: {str(e)}"
+                st.markdown(assistant_text)
 
         # Save assistant response to session
         st.session_state.messages.append({"role": "assistant", "content": assistant_text})
@@ -1,30 +1,43 @@
 import streamlit as st
 import requests
 
-# Function to retrieve chat history from backend
-def retrieve_history():
+# Messages per history page
+PAGE_SIZE = 20
+
+# Function to retrieve one page of chat history, older than `before` (latest page by default)
+def retrieve_history(before=None):
+    params = {"limit": PAGE_SIZE}
+    if before is not None:
+        params["before"] = before
+
     # Send GET request to backend `/history` endpoint with user credentials
     response = requests.get(
         "http://127.0.0.1:8000/api/v1/chat/history",
+        params=params,
         headers={
             "Authorization": f"Bearer {st.session_state.token}"
         }
     )
 
-    # Parse JSON response containing previous chat entries
-    mesages = response.json()
+    # Parse JSON response containing one page of previous chat entries (oldest first)
+    page = response.json()
+
+    # Cursor of the next older page, None once the oldest page is loaded
+    st.session_state.history_cursor = page.get("next_cursor")
 
     # Initialize the messages list in session state if not already present
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
-    # Loop through each entry and append user and assistant messages to the session state
-    for entry in mesages:
-        st.session_state.messages.append({
-            "role": "user", 
+    # Turn each entry into user and assistant messages, placed before the ones already shown
+    older = []
+    for entry in page["items"]:
+        older.append({
+            "role": "user",
             "content": entry["prompt"]
         })
-        st.session_state.messages.append({
-            "role": "assistant", 
+        older.append({
+            "role": "assistant",
             "content": entry["response"]
         })
+    st.session_state.messages = older + st.session_state.messages